@@ -0,0 +1,61 @@
+"""
+Shared pytest options and fixtures for the kubectl test suites
+"""
+
+import os
+
+import pytest
+
+# Session prefetch fixtures (cluster_snapshot, kube_namespace)
+from kubectl_prefetch import cluster_snapshot, kube_namespace  # noqa: F401
+from kubectl_replay import RecordingTransport, ReplayTransport
+from kubectl_transport import make_transport
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('kubectl', 'SAS Viya cluster tests')
+    group.addoption('--namespace', default=os.environ.get('KUBECTL_NAMESPACE', 'sas-viya'),
+                    help='Namespace the integration tests check')
+    group.addoption('--record', metavar='ARCHIVE', default=None,
+                    help='Save every cluster response the integration tests read to ARCHIVE')
+    group.addoption('--replay', metavar='ARCHIVE', default=None,
+                    help='Run the integration tests against ARCHIVE instead of a cluster')
+    group.addoption('--wait-ready', metavar='SECONDS', type=float, default=0,
+                    help='Wait up to SECONDS for required deployments to become ready '
+                         '(e.g. during a rollout) instead of failing at once')
+    group.addoption('--state-dir', default=os.environ.get('KUBECTL_STATE_DIR'),
+                    help='Keep history between runs (e.g. restart counts) in this directory')
+
+
+@pytest.fixture(scope="session")
+def kube_transport(request):
+    """Transport for the integration tests: live, recording or replaying"""
+    record = request.config.getoption('--record')
+    replay = request.config.getoption('--replay')
+    if record and replay:
+        raise pytest.UsageError("--record and --replay cannot be combined")
+
+    if replay:
+        transport = ReplayTransport(replay)
+    else:
+        transport = make_transport()
+        if record:
+            transport = RecordingTransport(transport, record)
+    yield transport
+    transport.close()
+
+
+@pytest.fixture(scope="session")
+def state_dir(request):
+    """Directory for state kept between runs, or None to keep it in memory"""
+    return request.config.getoption('--state-dir')
+
+
+@pytest.fixture
+def failing_kubectl(tmp_path, monkeypatch):
+    """Put a kubectl that prints nothing and exits non-zero first on PATH"""
+    kubectl = tmp_path / 'kubectl'
+    kubectl.write_text('#!/bin/sh\nexit 1\n')
+    kubectl.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{tmp_path}{os.pathsep}{os.environ.get('PATH', '')}")
+    return kubectl
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Fake Kubernetes API Server
+Serves canned resources over HTTP so the transports and checks can be
+exercised without a cluster
+"""
+
+import argparse
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from kubectl_transport import RESOURCES
+
+# (API path prefix, plural) -> (kind, namespaced), the reverse of RESOURCES
+ROUTES = {
+    (prefix, plural): (kind, namespaced)
+    for kind, (prefix, plural, namespaced) in RESOURCES.items()
+}
+
+
+def _lookup(obj: Dict, dotted: str):
+    for part in dotted.split('.'):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(part)
+    return obj
+
+
+def matches_labels(item: Dict, selector: Optional[str]) -> bool:
+    """Evaluate an equality-based label selector (a=b, a!=b, a)"""
+    if not selector:
+        return True
+    labels = item.get('metadata', {}).get('labels') or {}
+    for term in selector.split(','):
+        term = term.strip()
+        if '!=' in term:
+            key, value = term.split('!=', 1)
+            if labels.get(key.strip()) == value.strip():
+                return False
+        elif '=' in term:
+            key, value = term.replace('==', '=').split('=', 1)
+            if labels.get(key.strip()) != value.strip():
+                return False
+        elif term not in labels:
+            return False
+    return True
+
+
+def matches_fields(item: Dict, selector: Optional[str]) -> bool:
+    """Evaluate an equality-based field selector (type=Warning, metadata.name=x)"""
+    if not selector:
+        return True
+    for term in selector.split(','):
+        negate = '!=' in term
+        key, value = term.replace('!=', '=').replace('==', '=').split('=', 1)
+        actual = _lookup(item, key.strip())
+        if (str(actual) == value.strip()) == negate:
+            return False
+    return True
+
+
+class FakeKubeApiServer:
+    """In-memory API server for list, get, watch and pod log requests"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        # (kind, namespace) -> items
+        self.objects = {}
+        # (namespace, pod, container) -> log lines; container None for the default
+        self.logs = {}
+        self.requests = []
+        self.connections = 0
+        self.bytes_sent = 0
+        self.resource_version = 0
+        # (resourceVersion, kind, namespace, event type, object) for watches
+        self.history = []
+        # Watches starting before this resourceVersion get 410 Gone
+        self.history_floor = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stopping = False
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _stamp(self, item: Dict):
+        self.resource_version += 1
+        item.setdefault('metadata', {})['resourceVersion'] = str(self.resource_version)
+
+    def add(self, kind: str, items: List[Dict], namespace: Optional[str] = None):
+        """Register objects of a kubectl resource kind"""
+        with self._lock:
+            for item in items:
+                self._stamp(item)
+            self.objects.setdefault((kind, namespace), []).extend(items)
+
+    def add_logs(self, namespace: str, pod: str, lines: List[str],
+                 container: Optional[str] = None):
+        """Register the log of a pod's container"""
+        with self._lock:
+            self.logs[(namespace, pod, container)] = list(lines)
+
+    def log_lines(self, path: str, query: Dict[str, str]) -> Optional[List[str]]:
+        """Lines for a .../pods/<name>/log request, or None if the pod has no log"""
+        segments = [s for s in path.split('/') if s]
+        namespace, pod = segments[3], segments[5]
+        with self._lock:
+            lines = self.logs.get((namespace, pod, query.get('container')))
+        if lines is not None and query.get('tailLines'):
+            lines = lines[-int(query['tailLines']):]
+        return lines
+
+    def emit(self, kind: str, event_type: str, item: Dict,
+             namespace: Optional[str] = None):
+        """Apply an ADDED/MODIFIED/DELETED change and notify open watches"""
+        with self._changed:
+            self._stamp(item)
+            name = item['metadata'].get('name')
+            store = self.objects.setdefault((kind, namespace), [])
+            store[:] = [i for i in store if i['metadata'].get('name') != name]
+            if event_type != 'DELETED':
+                store.append(item)
+            self.history.append((self.resource_version, kind, namespace, event_type, item))
+            self._changed.notify_all()
+
+    def compact(self):
+        """Forget watch history, as etcd compaction does"""
+        with self._lock:
+            self.history = []
+            self.history_floor = self.resource_version
+
+    def start(self) -> 'FakeKubeApiServer':
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._changed:
+            self._stopping = True
+            self._changed.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _route(self, path: str):
+        """Split a REST path into (kind, namespace, name)"""
+        segments = [s for s in path.split('/') if s]
+        prefix_len = 2 if segments[:1] == ['api'] else 3
+        prefix = '/' + '/'.join(segments[:prefix_len])
+        rest = segments[prefix_len:]
+
+        namespace = None
+        if len(rest) >= 3 and rest[0] == 'namespaces':
+            namespace, rest = rest[1], rest[2:]
+        if not rest or (prefix, rest[0]) not in ROUTES:
+            return None
+        kind, namespaced = ROUTES[(prefix, rest[0])]
+        name = rest[1] if len(rest) > 1 else None
+        return kind, namespace if namespaced else None, name
+
+    def _items(self, kind: str, namespace: Optional[str]) -> List[Dict]:
+        with self._lock:
+            if namespace is not None:
+                return list(self.objects.get((kind, namespace), []))
+            return [item for (k, _), items in self.objects.items() if k == kind
+                    for item in items]
+
+    def handle(self, path: str, query: Dict[str, str]):
+        """Return (status, body) for a GET request"""
+        route = self._route(path)
+        if route is None:
+            return 404, {'kind': 'Status', 'code': 404, 'reason': 'NotFound'}
+        kind, namespace, name = route
+
+        items = self._items(kind, namespace)
+        if name:
+            for item in items:
+                if item.get('metadata', {}).get('name') == name:
+                    return 200, item
+            return 404, {'kind': 'Status', 'code': 404, 'reason': 'NotFound'}
+
+        items = [
+            item for item in items
+            if matches_labels(item, query.get('labelSelector'))
+            and matches_fields(item, query.get('fieldSelector'))
+        ]
+        metadata = {'resourceVersion': str(self.resource_version)}
+
+        # Server-side pagination: the continue token is the next offset
+        if query.get('limit'):
+            start = int(query.get('continue') or 0)
+            end = start + int(query['limit'])
+            if end < len(items):
+                metadata['continue'] = str(end)
+                metadata['remainingItemCount'] = len(items) - end
+            items = items[start:end]
+
+        return 200, {
+            'kind': 'List',
+            'apiVersion': 'v1',
+            'metadata': metadata,
+            'items': items,
+        }
+
+    def watch_events(self, path: str, query: Dict[str, str]):
+        """Yield watch events for a request until its timeout passes"""
+        route = self._route(path)
+        if route is None:
+            return
+        kind, namespace, _ = route
+        deadline = time.monotonic() + float(query.get('timeoutSeconds', 5))
+
+        with self._lock:
+            last = int(query.get('resourceVersion') or self.resource_version)
+            if last < self.history_floor:
+                yield {'type': 'ERROR', 'object': {
+                    'kind': 'Status', 'code': 410, 'reason': 'Expired',
+                    'message': f'too old resource version: {last}'}}
+                return
+
+        while True:
+            with self._changed:
+                pending = [entry for entry in self.history if entry[0] > last]
+                if not pending:
+                    remaining = deadline - time.monotonic()
+                    if self._stopping:
+                        return
+                    if remaining <= 0:
+                        # Like the API server, confirm the cursor before a
+                        # timed-out watch closes when bookmarks were asked for
+                        if query.get('allowWatchBookmarks') == 'true':
+                            yield {'type': 'BOOKMARK', 'object': {'metadata': {
+                                'resourceVersion': str(self.resource_version)}}}
+                        return
+                    self._changed.wait(remaining)
+                    continue
+
+            for rv, event_kind, event_ns, event_type, item in pending:
+                last = rv
+                if event_kind != kind or (namespace is not None and event_ns != namespace):
+                    continue
+                if not (matches_labels(item, query.get('labelSelector')) and
+                        matches_fields(item, query.get('fieldSelector'))):
+                    continue
+                yield {'type': event_type, 'object': item}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                with server._lock:
+                    server.requests.append(self.path)
+
+                if query.get('watch') in ('1', 'true'):
+                    self._stream(server.watch_events(parts.path, query))
+                    return
+                if parts.path.endswith('/log'):
+                    self._log(server.log_lines(parts.path, query))
+                    return
+
+                status, payload = server.handle(parts.path, query)
+                if status == 200 and 'as=PartialObjectMetadataList' in self.headers.get('Accept', ''):
+                    payload = dict(payload, kind='PartialObjectMetadataList', items=[
+                        {'metadata': item.get('metadata', {})} for item in payload['items']
+                    ])
+                body = json.dumps(payload).encode() + b'\n'
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_sent += len(body)
+
+            def _stream(self, events):
+                # Newline-delimited JSON over chunked encoding, like the real API
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for event in events:
+                    line = json.dumps(event).encode() + b'\n'
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+                    self.wfile.flush()
+                self.wfile.write(b'0\r\n\r\n')
+
+            def _log(self, lines):
+                if lines is None:
+                    body = json.dumps({'kind': 'Status', 'code': 404}).encode()
+                    self.send_response(404)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                # Plain text over chunked encoding, one chunk per line
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for line in lines:
+                    data = line.encode() + b'\n'
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                self.wfile.write(b'0\r\n\r\n')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve canned Kubernetes resources')
+    parser.add_argument('fixture', help='JSON file mapping "kind" or "kind/namespace" to item lists')
+    parser.add_argument('--port', type=int, default=8001, help='Port to listen on')
+    args = parser.parse_args()
+
+    server = FakeKubeApiServer(port=args.port)
+    with open(args.fixture) as f:
+        for key, items in json.load(f).items():
+            kind, _, namespace = key.partition('/')
+            server.add(kind, items, namespace or None)
+
+    print(f"Fake API server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+SAS Viya Health Check Benchmarks
+Runs every check against generated namespaces of 100 to 50,000 pods through
+an in-process transport, reports throughput and peak memory, and compares
+the results with stored baselines so regressions fail CI
+"""
+
+import contextlib
+import gc
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fake_kube_api import matches_fields, matches_labels
+from kubectl_health_checks import SASViyaKubectlTester
+from kubectl_query import Fields, metadata_only, project, project_list
+from kubectl_snapshot import ClusterSnapshot
+from kubectl_transport import DEFAULT_PAGE_SIZE, TransportError, iter_list_items, list_metadata
+
+CHECKS = (
+    'test_pod_health',
+    'test_persistent_volumes',
+    'test_services',
+    'test_ingress',
+    'test_resource_usage',
+    'test_recent_events',
+)
+
+DEFAULT_SIZES = (100, 1000, 10000)
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'benchmark_baselines.json')
+
+# Allowed slowdown and memory growth over the baseline before a run fails.
+# Times are compared as multiples of a reference workload timed in the same
+# run, so a slower machine does not read as a regression; the tolerance
+# still absorbs noise from shared runners. Memory is nearly deterministic
+TIME_TOLERANCE = 1.0
+MEMORY_TOLERANCE = 0.25
+# Absolute slack so sub-millisecond checks do not fail on timer noise
+TIME_SLACK = 0.005
+MEMORY_SLACK = 256 * 1024
+
+# Pods in the reference workload every timing is divided by
+REFERENCE_PODS = 1000
+
+SERVICES = ('sas-logon-app', 'sas-files', 'sas-folders', 'sas-identities',
+            'sas-cas-server-default', 'sas-studio-app', 'sas-model-repository',
+            'sas-report-renderer', 'sas-workflow', 'sas-audit')
+REASONS = ('BackOff', 'Unhealthy', 'FailedMount', 'FailedScheduling', 'Pulled', 'Started')
+
+
+def synthetic_namespace(pods: int, seed: int = 0) -> Dict[str, List[Dict]]:
+    """
+    Generate a namespace shaped like a SAS Viya deployment.
+
+    Roughly 2% of pods are pending or failing, there is one service (with
+    endpoints) per 20 pods, one PVC per 10 pods and two events per pod.
+    """
+    rng = random.Random(seed)
+    namespace = {kind: [] for kind in ('pods', 'services', 'endpoints', 'events', 'pvc',
+                                       'ingress', 'nodes', 'podmetrics', 'nodemetrics')}
+
+    service_count = max(1, pods // 20)
+    service_names = [f"{SERVICES[i % len(SERVICES)]}-{i}" for i in range(service_count)]
+
+    for i in range(pods):
+        service = service_names[i % service_count]
+        roll = rng.random()
+        phase = 'Pending' if roll < 0.01 else 'Failed' if roll < 0.015 else 'Running'
+        ready = phase == 'Running' and roll >= 0.02
+        namespace['pods'].append({
+            'metadata': {
+                'name': f"{service}-{i:06d}",
+                'namespace': 'sas-viya',
+                'uid': f"{rng.getrandbits(64):016x}",
+                'labels': {'app': service, 'sas.com/deployment': 'sas-viya'},
+                'annotations': {'sas.com/component-version': '2.12.0'},
+            },
+            'spec': {
+                'nodeName': f"node-{i % 50}",
+                'containers': [{
+                    'name': service,
+                    'image': f"cr.sas.com/viya-4-x64_oci_linux_2-docker/{service}:1.2.3",
+                    'resources': {'requests': {'cpu': '100m', 'memory': '256Mi'},
+                                  'limits': {'cpu': '2', 'memory': '2Gi'}},
+                    'env': [{'name': f"SAS_ENV_{n}", 'value': 'x' * 16} for n in range(8)],
+                }],
+            },
+            'status': {
+                'phase': phase,
+                'podIP': f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                'containerStatuses': [{
+                    'name': service,
+                    'ready': ready,
+                    'restartCount': rng.randint(0, 3),
+                    'state': {'running': {}} if ready else
+                             {'waiting': {'reason': 'CrashLoopBackOff'}},
+                }],
+            },
+        })
+
+    for index, service in enumerate(service_names):
+        namespace['services'].append({
+            'metadata': {'name': service, 'labels': {'app': service}},
+            'spec': {'selector': {'app': service},
+                     'ports': [{'port': 443, 'targetPort': 8443}]},
+        })
+        members = namespace['pods'][index::service_count]
+        namespace['endpoints'].append({
+            'metadata': {'name': service},
+            # Every 25th service has no ready endpoints
+            'subsets': [] if index % 25 == 24 else [{
+                'addresses': [{'ip': p['status']['podIP'],
+                               'targetRef': {'name': p['metadata']['name']}}
+                              for p in members],
+                'ports': [{'port': 8443}],
+            }],
+        })
+
+    for i in range(pods * 2):
+        target = namespace['pods'][i % pods]['metadata']['name']
+        reason = REASONS[rng.randrange(len(REASONS))]
+        namespace['events'].append({
+            'metadata': {'name': f"{target}.{i:x}"},
+            'involvedObject': {'kind': 'Pod', 'name': target},
+            'type': 'Warning' if reason in REASONS[:4] else 'Normal',
+            'reason': reason,
+            'message': f"{reason} for container in pod {target}",
+            'count': rng.randint(1, 50),
+        })
+
+    for i in range(max(1, pods // 10)):
+        namespace['pvc'].append({
+            'metadata': {'name': f"sas-data-{i}"},
+            'status': {'phase': 'Bound' if i % 40 else 'Pending'},
+        })
+
+    namespace['ingress'].append({
+        'metadata': {'name': 'sas-viya'},
+        'spec': {'rules': [{'host': 'viya.example.com', 'http': {'paths': [
+            {'path': f"/{name}", 'backend': {'service': {'name': name}}}
+            for name in service_names[:200]
+        ]}}]},
+        'status': {'loadBalancer': {'ingress': [{'hostname': 'lb.example.com'}]}},
+    })
+
+    for pod in namespace['pods']:
+        namespace['podmetrics'].append({
+            'metadata': {'name': pod['metadata']['name']},
+            'containers': [{'name': pod['spec']['containers'][0]['name'], 'usage': {
+                'cpu': f"{rng.randint(1, 2000) * 10 ** 6}n",
+                'memory': f"{rng.randint(64, 2100)}Mi",
+            }}],
+        })
+
+    for i in range(min(50, pods)):
+        namespace['nodes'].append({
+            'metadata': {'name': f"node-{i}"},
+            'status': {'allocatable': {'cpu': '15890m', 'memory': '63Gi'}},
+        })
+        namespace['nodemetrics'].append({
+            'metadata': {'name': f"node-{i}"},
+            'usage': {'cpu': f"{rng.randint(1000, 15000)}m",
+                      'memory': f"{rng.randint(8, 62) * 1024 ** 2}Ki"},
+        })
+    return namespace
+
+
+class SyntheticTransport:
+    """
+    Serves a generated namespace in-process.
+
+    Responses are encoded as JSON once, like bytes arriving from the API
+    server, so the checks pay the same parse and projection costs they do
+    against a real cluster without any network time.
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, objects: Dict[str, List[Dict]]):
+        self.objects = objects
+        self.instrumentation = None
+        self._encoded = {}
+
+    def _select(self, kind: str, selector: Optional[str],
+                field_selector: Optional[str]) -> List[Dict]:
+        if kind not in self.objects:
+            raise TransportError(f"Cannot list {kind}")
+        return [item for item in self.objects[kind]
+                if matches_labels(item, selector) and matches_fields(item, field_selector)]
+
+    def _encode(self, key: Tuple, build) -> bytes:
+        if key not in self._encoded:
+            self._encoded[key] = json.dumps(build()).encode()
+        return self._encoded[key]
+
+    def list(self, kind: str, namespace: Optional[str] = None,
+             selector: Optional[str] = None,
+             field_selector: Optional[str] = None,
+             fields: Fields = None) -> Optional[Dict]:
+        """Return the parsed list for a resource kind, or None on failure"""
+        if kind not in self.objects:
+            return None
+        partial = metadata_only(fields)
+
+        def build():
+            items = self._select(kind, selector, field_selector)
+            if partial:
+                items = [{'metadata': item['metadata']} for item in items]
+            return {'kind': 'List', 'metadata': {}, 'items': items}
+
+        body = self._encode(('list', kind, selector, field_selector, partial), build)
+        return project_list(json.loads(body), fields)
+
+    def get(self, kind: str, name: str,
+            namespace: Optional[str] = None) -> Optional[Dict]:
+        """Return a single object, or None if it does not exist"""
+        for item in self.objects.get(kind, []):
+            if item['metadata']['name'] == name:
+                return json.loads(json.dumps(item))
+        return None
+
+    def iter_items(self, kind: str, namespace: Optional[str] = None,
+                   selector: Optional[str] = None,
+                   field_selector: Optional[str] = None,
+                   limit: int = DEFAULT_PAGE_SIZE,
+                   fields: Fields = None,
+                   metadata: Optional[Dict] = None) -> Dict:
+        """Yield items page by page through the incremental parser"""
+        key = ('pages', kind, selector, field_selector, limit)
+        if key not in self._encoded:
+            items = self._select(kind, selector, field_selector)
+            pages = []
+            for start in range(0, max(len(items), 1), limit):
+                metadata = {'continue': str(start + limit)} if start + limit < len(items) else {}
+                pages.append(json.dumps({'kind': 'List', 'metadata': metadata,
+                                         'items': items[start:start + limit]}).encode())
+            self._encoded[key] = pages
+
+        for body in self._encoded[key]:
+            header = {}
+            for item in iter_list_items(io.BytesIO(body).read, header):
+                yield project(item, fields)
+            list_metadata(header, metadata)
+
+    def close(self):
+        pass
+
+
+def run_check(transport: SyntheticTransport, check: str,
+              page_size: int = DEFAULT_PAGE_SIZE) -> None:
+    """Run one check on a fresh snapshot so nothing is served from an earlier run"""
+    snapshot = ClusterSnapshot('sas-viya', transport=transport, ttl=0, page_size=page_size)
+    tester = SASViyaKubectlTester('sas-viya', snapshot=snapshot)
+    with contextlib.redirect_stdout(io.StringIO()):
+        getattr(tester, check)()
+
+
+def reference_workload() -> Callable[[], None]:
+    """
+    A fixed workload that checks' timings are divided by.
+
+    It parses and projects a page of generated pods, the work the checks
+    themselves spend most of their time on, so the ratios are comparable
+    between machines.
+    """
+    body = json.dumps({'kind': 'List', 'metadata': {},
+                       'items': synthetic_namespace(REFERENCE_PODS)['pods']}).encode()
+
+    def run():
+        for item in iter_list_items(io.BytesIO(body).read, {}):
+            project(item, ('metadata.name', 'status.phase', 'spec.containers[].resources'))
+    return run
+
+
+def timed(run: Callable[[], None]) -> float:
+    """Seconds one call takes, started from a collected heap"""
+    gc.collect()
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def benchmark(sizes=DEFAULT_SIZES, checks=CHECKS, repeat: int = 5,
+              page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict]:
+    """
+    Time every check at every namespace size; one result per (check, size).
+
+    Each result also gives its time relative to the reference workload,
+    which is what baselines store and regressions are judged on.
+    """
+    reference = reference_workload()
+    results = []
+    for size in sizes:
+        transport = SyntheticTransport(synthetic_namespace(size))
+        for check in checks:
+            # Warm-up run encodes the responses so only the check is measured
+            run_check(transport, check, page_size)
+
+            # The reference is timed alongside each check so a runner that
+            # slows down partway through a job slows both
+            timings, references = [], []
+            for _ in range(repeat):
+                references.append(timed(reference))
+                timings.append(timed(lambda: run_check(transport, check, page_size)))
+
+            # Peak memory is measured separately; tracing slows the check down
+            tracemalloc.start()
+            try:
+                run_check(transport, check, page_size)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            seconds, reference_seconds = min(timings), min(references)
+            results.append({
+                'check': check,
+                'pods': size,
+                'seconds': seconds,
+                'relative': seconds / reference_seconds,
+                'reference_seconds': reference_seconds,
+                'pods_per_second': size / seconds if seconds else float('inf'),
+                'peak_bytes': peak,
+            })
+    return results
+
+
+def load_baselines(path: str = BASELINES_PATH) -> Dict[str, Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results: List[Dict], path: str = BASELINES_PATH):
+    baselines = load_baselines(path)
+    for result in results:
+        baselines[f"{result['check']}/{result['pods']}"] = {
+            'relative': round(result['relative'], 4),
+            'peak_bytes': result['peak_bytes'],
+        }
+    with open(path, 'w') as f:
+        json.dump(dict(sorted(baselines.items())), f, indent=2)
+        f.write('\n')
+
+
+def find_regressions(results: List[Dict], baselines: Dict[str, Dict],
+                     time_tolerance: float = TIME_TOLERANCE,
+                     memory_tolerance: float = MEMORY_TOLERANCE) -> List[str]:
+    """Describe every result slower or larger than its baseline allows"""
+    regressions = []
+    for result in results:
+        key = f"{result['check']}/{result['pods']}"
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        # Baselines from before relative timing hold only seconds; those
+        # were machine-specific and are not compared
+        if 'relative' in baseline:
+            slack = TIME_SLACK / result['reference_seconds']
+            if result['relative'] > max(baseline['relative'] * (1 + time_tolerance),
+                                        baseline['relative'] + slack):
+                regressions.append(
+                    f"{key}: {result['relative']:.2f}x the reference workload vs "
+                    f"baseline {baseline['relative']:.2f}x ({result['seconds']:.4f}s)")
+        if result['peak_bytes'] > max(baseline['peak_bytes'] * (1 + memory_tolerance),
+                                      baseline['peak_bytes'] + MEMORY_SLACK):
+            regressions.append(
+                f"{key}: peak {result['peak_bytes'] / 2**20:.1f} MiB vs baseline "
+                f"{baseline['peak_bytes'] / 2**20:.1f} MiB")
+    return regressions
+
+
+def print_results(results: List[Dict]):
+    print(f"{'Check':<26} {'Pods':>7} {'Seconds':>9} {'Relative':>9} {'Pods/s':>11} "
+          f"{'Peak MiB':>9}")
+    print('-' * 76)
+    for r in results:
+        print(f"{r['check']:<26} {r['pods']:>7} {r['seconds']:>9.4f} {r['relative']:>9.2f} "
+              f"{r['pods_per_second']:>11.0f} {r['peak_bytes'] / 2**20:>9.2f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the health checks on synthetic namespaces')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Pod counts to generate (e.g. 100 1000 10000 50000)')
+    parser.add_argument('--check', action='append', choices=CHECKS, dest='checks',
+                        help='Check to benchmark; repeat for more (default: all)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Timed runs per check; the fastest is reported')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help='Items per paginated list request for pods and events')
+    parser.add_argument('--baselines', default=BASELINES_PATH, help='Baseline file')
+    parser.add_argument('--update-baselines', action='store_true',
+                        help='Store these results as the new baselines')
+    parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE,
+                        help='Allowed fractional slowdown over the baseline, '
+                             'relative to the reference workload')
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE,
+                        help='Allowed fractional peak memory growth over the baseline')
+    parser.add_argument('--json', dest='json_path', help='Write the results to this file')
+    args = parser.parse_args()
+
+    results = benchmark(args.sizes, args.checks or CHECKS, args.repeat, args.page_size)
+    print_results(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baselines:
+        save_baselines(results, args.baselines)
+        print(f"\nBaselines written to {args.baselines}")
+        sys.exit(0)
+
+    regressions = find_regressions(results, load_baselines(args.baselines),
+                                   args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  - {regression}")
+    sys.exit(1 if regressions else 0)
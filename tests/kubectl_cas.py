@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+CAS Server Topology Checks
+Reads everything the CAS checks need (controller and worker pods,
+endpoints, config maps, PVCs, network policies, HPAs and pod metrics) in
+one concurrent batch, builds the node-to-worker topology in memory and
+checks worker placement and endpoint coverage
+"""
+
+import json
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from kubectl_resources import format_cpu, format_memory, parse_cpu, parse_memory
+from kubectl_results import CheckResult
+from kubectl_snapshot import ClusterSnapshot
+from kubectl_transport import TRANSPORTS, make_transport
+
+CONTROLLER_SELECTOR = 'app.kubernetes.io/name=sas-cas-server-default-controller'
+WORKER_SELECTOR = 'app.kubernetes.io/name=sas-cas-server-default-worker'
+
+# Object fields the CAS checks read
+CAS_POD_FIELDS = ('metadata.name', 'spec.nodeName', 'status.phase', 'status.podIP',
+                  'status.containerStatuses[].ready')
+CAS_ENDPOINT_FIELDS = ('metadata.name', 'subsets[].addresses', 'subsets[].notReadyAddresses')
+CAS_PVC_FIELDS = ('metadata.name', 'status.phase')
+CAS_HPA_FIELDS = ('metadata.name', 'spec.minReplicas', 'spec.maxReplicas',
+                  'status.currentReplicas')
+NAME_FIELDS = ('metadata.name',)
+
+# Most workers one node may carry beyond the least loaded worker node
+MAX_WORKER_SKEW = 1
+
+CAS_QUERIES = [
+    ('pods', CONTROLLER_SELECTOR, None, CAS_POD_FIELDS),
+    ('pods', WORKER_SELECTOR, None, CAS_POD_FIELDS),
+    ('endpoints', None, None, CAS_ENDPOINT_FIELDS),
+    ('configmap', None, None, NAME_FIELDS),
+    ('pvc', None, None, CAS_PVC_FIELDS),
+    ('networkpolicy', None, None, NAME_FIELDS),
+    ('hpa', None, None, CAS_HPA_FIELDS),
+    ('podmetrics', None, None, None),
+]
+
+
+def is_cas(item: Dict) -> bool:
+    """Objects are matched by name, as `kubectl get ... | grep cas` did"""
+    return 'cas' in item['metadata']['name']
+
+
+def _ready(pod: Dict) -> bool:
+    status = pod.get('status') or {}
+    containers = status.get('containerStatuses') or []
+    return status.get('phase') == 'Running' and bool(containers) and \
+        all(c.get('ready') for c in containers)
+
+
+class CasTopology:
+    """CAS pods grouped by node, with the endpoint addresses that serve them"""
+
+    __slots__ = ('controllers', 'workers', 'by_node', 'unscheduled', 'endpoints')
+
+    def __init__(self, controllers: Iterable[Dict], workers: Iterable[Dict],
+                 endpoints: Iterable[Dict] = ()):
+        self.controllers = list(controllers)
+        self.workers = list(workers)
+        # node -> worker pod names
+        self.by_node: Dict[str, List[str]] = defaultdict(list)
+        self.unscheduled: List[str] = []
+        for pod in self.workers:
+            node = (pod.get('spec') or {}).get('nodeName')
+            if node:
+                self.by_node[node].append(pod['metadata']['name'])
+            else:
+                self.unscheduled.append(pod['metadata']['name'])
+        # endpoints name -> (ready IPs, not-ready IPs), CAS endpoints only
+        self.endpoints: Dict[str, tuple] = {}
+        for item in endpoints:
+            if not is_cas(item):
+                continue
+            ready, not_ready = set(), set()
+            for subset in item.get('subsets') or []:
+                ready.update(a.get('ip') for a in subset.get('addresses') or [])
+                not_ready.update(a.get('ip') for a in subset.get('notReadyAddresses') or [])
+            self.endpoints[item['metadata']['name']] = (ready, not_ready)
+
+    @property
+    def skew(self) -> int:
+        """Difference in worker count between the busiest and idlest worker nodes"""
+        counts = [len(pods) for pods in self.by_node.values()]
+        return max(counts) - min(counts) if counts else 0
+
+    def crowded_nodes(self) -> Dict[str, List[str]]:
+        """Nodes running more than one worker"""
+        return {node: pods for node, pods in self.by_node.items() if len(pods) > 1}
+
+    def endpoints_without_addresses(self) -> List[str]:
+        return sorted(name for name, (ready, _) in self.endpoints.items() if not ready)
+
+    def pods_missing_from_endpoints(self) -> List[str]:
+        """Ready CAS pods whose IP no CAS endpoint serves"""
+        served = set()
+        for ready, _ in self.endpoints.values():
+            served |= ready
+        return [pod['metadata']['name'] for pod in self.controllers + self.workers
+                if _ready(pod) and (pod.get('status') or {}).get('podIP') not in served]
+
+
+def cas_usage(metrics: Iterable[Dict], names: Iterable[str]) -> List[Dict]:
+    """CPU and memory of the named pods, busiest CPU first"""
+    wanted = set(names)
+    usage = []
+    for item in metrics:
+        if item['metadata']['name'] not in wanted:
+            continue
+        containers = item.get('containers') or []
+        usage.append((
+            sum(parse_cpu(c.get('usage', {}).get('cpu')) for c in containers),
+            sum(parse_memory(c.get('usage', {}).get('memory')) for c in containers),
+            item['metadata']['name'],
+        ))
+    usage.sort(reverse=True)
+    return [{'pod': name, 'cpu': format_cpu(cpu), 'memory': format_memory(memory)}
+            for cpu, memory, name in usage]
+
+
+class CasChecker:
+    """Runs the CAS checks against one namespace's snapshot"""
+
+    def __init__(self, snapshot: ClusterSnapshot, max_skew: int = MAX_WORKER_SKEW):
+        self.snapshot = snapshot
+        self.max_skew = max_skew
+
+    def _items(self, kind: str, selector: Optional[str] = None,
+               fields=None) -> Optional[List[Dict]]:
+        data = self.snapshot.get(kind, selector, fields=fields)
+        return None if data is None else data.get('items', [])
+
+    def run(self) -> CheckResult:
+        """Fetch every input in one batch and evaluate the CAS topology"""
+        failed = self.snapshot.prefetch(CAS_QUERIES)
+
+        controllers = self._items('pods', CONTROLLER_SELECTOR, CAS_POD_FIELDS)
+        workers = self._items('pods', WORKER_SELECTOR, CAS_POD_FIELDS)
+        if controllers is None or workers is None:
+            return CheckResult('CAS Topology', False, {'error': 'Cannot get CAS pods'})
+        topology = CasTopology(controllers, workers,
+                               self._items('endpoints', fields=CAS_ENDPOINT_FIELDS) or [])
+        pvcs = [p for p in self._items('pvc', fields=CAS_PVC_FIELDS) or [] if is_cas(p)]
+        hpas = [h for h in self._items('hpa', fields=CAS_HPA_FIELDS) or [] if is_cas(h)]
+        metrics = self._items('podmetrics')
+
+        status = {
+            'controllers': {p['metadata']['name']: (p.get('status') or {}).get('phase')
+                            for p in controllers},
+            'workers': len(workers),
+            'workers_ready': sum(1 for p in workers if _ready(p)),
+            'worker_nodes': {node: len(pods) for node, pods in sorted(topology.by_node.items())},
+            'worker_skew': topology.skew,
+            'crowded_nodes': topology.crowded_nodes(),
+            'unscheduled_workers': topology.unscheduled,
+            'endpoints': sorted(topology.endpoints),
+            'endpoints_without_addresses': topology.endpoints_without_addresses(),
+            'pods_missing_from_endpoints': topology.pods_missing_from_endpoints(),
+            'configmaps': [c['metadata']['name'] for c in self._items('configmap', fields=NAME_FIELDS)
+                           or [] if is_cas(c)],
+            'unbound_pvcs': [p['metadata']['name'] for p in pvcs
+                             if (p.get('status') or {}).get('phase') != 'Bound'],
+            'network_policies': [n['metadata']['name'] for n in
+                                 self._items('networkpolicy', fields=NAME_FIELDS) or []
+                                 if is_cas(n)],
+            'autoscalers': {h['metadata']['name']: {
+                'min': (h.get('spec') or {}).get('minReplicas'),
+                'max': (h.get('spec') or {}).get('maxReplicas'),
+                'current': (h.get('status') or {}).get('currentReplicas')} for h in hpas},
+            'usage': cas_usage(metrics, [p['metadata']['name'] for p in controllers + workers])
+            if metrics is not None else None,
+            'unavailable': sorted({query[0] for query in failed}),
+        }
+
+        passed = (any(_ready(p) for p in controllers)
+                  and status['worker_skew'] <= self.max_skew
+                  and not status['unscheduled_workers']
+                  and not status['endpoints_without_addresses']
+                  and not status['pods_missing_from_endpoints']
+                  and not status['unbound_pvcs'])
+        return CheckResult('CAS Topology', passed, status)
+
+
+def print_report(result: CheckResult):
+    status = result.details
+    print(f"\n{'='*50}")
+    print("CAS Server Topology")
+    print('='*50)
+    if 'error' in status:
+        print(f"✗ {status['error']}")
+        return
+    for name, phase in status['controllers'].items() or [('(none)', 'missing')]:
+        print(f"Controller {name}: {phase}")
+    print(f"Workers: {status['workers_ready']}/{status['workers']} ready "
+          f"on {len(status['worker_nodes'])} nodes (skew {status['worker_skew']})")
+    for node, pods in status['crowded_nodes'].items():
+        print(f"  ⚠ {node} runs {len(pods)} workers: {', '.join(pods)}")
+    for name in status['unscheduled_workers']:
+        print(f"  ⚠ {name} is not scheduled on any node")
+    print(f"Endpoints: {', '.join(status['endpoints']) or 'none'}")
+    for name in status['endpoints_without_addresses']:
+        print(f"  ⚠ {name} has no ready addresses")
+    for name in status['pods_missing_from_endpoints']:
+        print(f"  ⚠ {name} is ready but not behind any CAS endpoint")
+    print(f"Config maps: {len(status['configmaps'])}")
+    for name in status['unbound_pvcs']:
+        print(f"  ⚠ PVC {name} is not bound")
+    print(f"Network policies: {', '.join(status['network_policies']) or 'none'}")
+    print(f"Autoscalers: {', '.join(status['autoscalers']) or 'No HPA configured for CAS'}")
+    if status['usage'] is not None:
+        for entry in status['usage'][:10]:
+            print(f"  {entry['pod']:<50} CPU: {entry['cpu']:>7}  Memory: {entry['memory']:>7}")
+    if status['unavailable']:
+        print(f"Could not read: {', '.join(status['unavailable'])}")
+    print(f"\nCAS Topology: {'✓ PASSED' if result.passed else '✗ FAILED'}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check SAS Viya CAS server topology')
+    parser.add_argument('--namespace', default='sas-viya', help='Kubernetes namespace')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='auto',
+                        help='Read cluster state via the API server directly, kubectl, '
+                             'or the API with kubectl fallback')
+    parser.add_argument('--context', default=None,
+                        help='kubeconfig context to test (default: current context)')
+    parser.add_argument('--max-skew', type=int, default=MAX_WORKER_SKEW,
+                        help='Largest allowed difference in workers per node')
+    parser.add_argument('--json', dest='json_path', help='Write the result to this file')
+    args = parser.parse_args()
+
+    transport = make_transport(args.transport, context=args.context)
+    result = CasChecker(ClusterSnapshot(args.namespace, transport=transport),
+                        max_skew=args.max_skew).run()
+    transport.close()
+
+    print_report(result)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(result.to_dict(), f, indent=2)
+    sys.exit(0 if result.passed else 1)
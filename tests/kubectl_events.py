@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Incremental Warning Event Ingestion
+Keeps warning events aggregated by (object, reason) across runs. Each run
+resumes a watch from the persisted cursor, so only events that changed
+since the previous run are transferred; the full list is read only on the
+first run or when the cursor has been compacted away (410 Gone)
+"""
+
+import heapq
+import http.client
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from kubectl_state import read_state, write_state
+from kubectl_transport import TransportError
+
+WARNING_SELECTOR = 'type=Warning'
+
+# Aggregates last seen this many seconds before the newest warning are dropped
+DEFAULT_RETENTION = 24 * 3600
+# Seconds the catch-up watch stays open; the API only accepts whole seconds
+DEFAULT_WATCH_TIMEOUT = 1
+STATE_VERSION = 1
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """RFC 3339 API timestamp (seconds or microseconds precision) as epoch seconds"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def event_time(event: Dict) -> Optional[float]:
+    """When an event last occurred, from whichever timestamp the API filled in"""
+    series = event.get('series') or {}
+    for value in (series.get('lastObservedTime'), event.get('lastTimestamp'),
+                  event.get('eventTime'), event.get('firstTimestamp'),
+                  (event.get('metadata') or {}).get('creationTimestamp')):
+        stamp = parse_timestamp(value)
+        if stamp is not None:
+            return stamp
+    return None
+
+
+def event_count(event: Dict) -> int:
+    """Occurrences an event object has accumulated so far"""
+    return (event.get('series') or {}).get('count') or event.get('count') or 1
+
+
+class EventAggregate:
+    """All occurrences of one reason on one object within the retention window"""
+
+    __slots__ = ('object', 'kind', 'reason', 'count', 'first_seen', 'last_seen', 'message')
+
+    def __init__(self, object: str, kind: str, reason: str, count: int = 0,
+                 first_seen: float = 0.0, last_seen: float = 0.0, message: str = ''):
+        self.object = object
+        self.kind = kind
+        self.reason = reason
+        self.count = count
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.message = message
+
+    def to_dict(self) -> Dict:
+        return {
+            'object': self.object,
+            'kind': self.kind,
+            'reason': self.reason,
+            'message': self.message,
+            'count': self.count,
+            'first_seen': datetime.fromtimestamp(self.first_seen).isoformat(),
+            'last_seen': datetime.fromtimestamp(self.last_seen).isoformat(),
+        }
+
+
+class WarningEvents:
+    """
+    Warning events aggregated by (object, reason), with the watch cursor.
+
+    An event object's count is cumulative, so each one's last applied count
+    is remembered by uid and only the increase is added when it is seen
+    again; a relist therefore never double counts. With a path the state
+    is loaded from and saved to disk, otherwise it lives for the process.
+    """
+
+    def __init__(self, path: Optional[str] = None, retention: float = DEFAULT_RETENTION):
+        self.path = path
+        self.retention = retention
+        self.resource_version: Optional[str] = None
+        # Newest occurrence applied; relisted events at or before it are known
+        self.last_timestamp = 0.0
+        # (object, reason) -> EventAggregate
+        self.aggregates: Dict[tuple, EventAggregate] = {}
+        # event uid -> (count applied, last seen)
+        self.seen: Dict[str, tuple] = {}
+        self.load()
+
+    def load(self):
+        state = read_state(self.path, STATE_VERSION)
+        if state is None:
+            return
+        self.resource_version = state.get('resource_version')
+        self.last_timestamp = state.get('last_timestamp', 0.0)
+        self.seen = state.get('seen', {})
+        for row in state.get('aggregates', []):
+            aggregate = EventAggregate(*row)
+            self.aggregates[(aggregate.object, aggregate.reason)] = aggregate
+
+    def save(self):
+        if not self.path:
+            return
+        write_state(self.path, {
+            'version': STATE_VERSION,
+            'resource_version': self.resource_version,
+            'last_timestamp': self.last_timestamp,
+            'seen': self.seen,
+            'aggregates': [[getattr(a, slot) for slot in EventAggregate.__slots__]
+                           for a in self.aggregates.values()],
+        })
+
+    def apply(self, event: Dict, now: Optional[float] = None,
+              known_before: Optional[float] = None):
+        """
+        Fold one event object into its aggregate. On a relist, known_before is
+        the cursor timestamp: unknown events no newer than it were already
+        counted before their uid was pruned.
+        """
+        metadata = event.get('metadata') or {}
+        involved = event.get('involvedObject') or event.get('regarding') or {}
+        uid = metadata.get('uid') or metadata.get('name') or \
+            f"{involved.get('name')}/{event.get('reason')}"
+        count = event_count(event)
+        stamp = event_time(event) or now or time.time()
+
+        previous = self.seen.get(uid)
+        if previous is None and known_before is not None and stamp <= known_before:
+            return
+        added = count - previous[0] if previous else count
+        self.seen[uid] = (count, stamp)
+        if added <= 0:
+            return
+
+        key = (involved.get('name', 'unknown'), event.get('reason', 'unknown'))
+        aggregate = self.aggregates.get(key)
+        if aggregate is None:
+            first = parse_timestamp(event.get('firstTimestamp')) or stamp
+            aggregate = self.aggregates[key] = EventAggregate(
+                key[0], involved.get('kind', ''), key[1], first_seen=first)
+        aggregate.count += added
+        if stamp >= aggregate.last_seen:
+            aggregate.last_seen = stamp
+            aggregate.message = event.get('message') or aggregate.message
+        self.last_timestamp = max(self.last_timestamp, stamp)
+
+    def prune(self):
+        """Drop aggregates and event uids not seen within the retention window"""
+        # Measured from the newest warning rather than the clock, so replaying
+        # an old recording keeps what it recorded
+        cutoff = self.last_timestamp - self.retention
+        self.aggregates = {k: a for k, a in self.aggregates.items() if a.last_seen >= cutoff}
+        self.seen = {uid: entry for uid, entry in self.seen.items() if entry[1] >= cutoff}
+
+    def newest(self, n: int = 5) -> List[EventAggregate]:
+        return heapq.nlargest(n, self.aggregates.values(), key=lambda a: a.last_seen)
+
+    def most_frequent(self, n: int = 5) -> List[EventAggregate]:
+        return heapq.nlargest(n, self.aggregates.values(), key=lambda a: (a.count, a.last_seen))
+
+    def _relist(self, items: Iterable[Dict], metadata: Dict):
+        """Apply a full list and resume from the list's resourceVersion"""
+        # Taken before applying: the list is in API order, not time order
+        cursor = self.last_timestamp or None
+        for event in items:
+            self.apply(event, known_before=cursor)
+        # The list's own resourceVersion, filled in once it is read, is the
+        # point to watch from; items' versions are opaque and may be long
+        # compacted. Without one the next run lists again
+        self.resource_version = metadata.get('resourceVersion')
+
+    def _catch_up(self, transport, namespace: str, timeout: int) -> bool:
+        """
+        Apply watch events since the cursor.
+
+        False if the cursor is too old, or if the watch ended without an
+        event or bookmark: that says nothing about whether the cursor is
+        still current or the cluster reachable, so the caller lists instead.
+        """
+        answered = False
+        for event in transport.watch('events', namespace, self.resource_version,
+                                     field_selector=WARNING_SELECTOR,
+                                     timeout_seconds=timeout):
+            answered = True
+            if event['type'] == 'ERROR':
+                if event['object'].get('code') == 410:
+                    return False
+                raise TransportError(f"Cannot watch events: {event['object'].get('message')}")
+            self.resource_version = event['object']['metadata'].get(
+                'resourceVersion', self.resource_version)
+            if event['type'] in ('ADDED', 'MODIFIED'):
+                self.apply(event['object'])
+        return answered
+
+    def sync(self, snapshot, timeout: int = DEFAULT_WATCH_TIMEOUT):
+        """Bring the aggregates up to date through a snapshot's transport"""
+        caught_up = False
+        if self.resource_version:
+            try:
+                caught_up = self._catch_up(snapshot.transport, snapshot.namespace, timeout)
+            except (OSError, http.client.HTTPException, ValueError, TransportError):
+                # Transports that cannot watch (e.g. replay) fall back to a list
+                caught_up = False
+        if not caught_up:
+            # Each event is folded in as it streams past, so projecting it
+            # first would only add a copy
+            metadata = {}
+            self._relist(snapshot.items('events', field_selector=WARNING_SELECTOR,
+                                        metadata=metadata), metadata)
+        self.prune()
+        self.save()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+SAS Viya Multi-Target Runner
+Runs the kubectl health checks against many (context, namespace) targets
+concurrently and merges the results into one report
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import yaml
+
+from kubectl_health_checks import SASViyaKubectlTester, ThreadLocalStdout, thread_local_stdout
+from kubectl_metrics import Instrumentation
+from kubectl_results import RunReport, write_reports
+from kubectl_snapshot import DEFAULT_TTL
+from kubectl_transport import DEFAULT_PAGE_SIZE, TRANSPORTS, make_transport
+
+
+class Target(NamedTuple):
+    context: Optional[str]
+    namespace: str
+
+    @property
+    def label(self) -> str:
+        return f"{self.context or '(current)'}/{self.namespace}"
+
+
+def parse_target(text: str) -> Target:
+    """Parse "context/namespace", or a bare namespace in the current context"""
+    context, _, namespace = text.rpartition('/')
+    return Target(context or None, namespace)
+
+
+def load_targets(path: str) -> List[Target]:
+    """Read targets from a YAML list of {context, namespace} mappings"""
+    with open(path) as f:
+        entries = yaml.safe_load(f) or []
+    return [Target(entry.get('context'), entry.get('namespace', 'sas-viya')) for entry in entries]
+
+
+class FanOutRunner:
+    """Runs SASViyaKubectlTester for every target with per-cluster limits"""
+
+    def __init__(self, targets: List[Target], transport: str = 'auto',
+                 workers: int = 8, per_cluster: int = 2, check_workers: int = 1,
+                 cache_ttl: float = DEFAULT_TTL, page_size: int = DEFAULT_PAGE_SIZE,
+                 transport_factory: Optional[Callable[[Optional[str]], object]] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 state_dir: Optional[str] = None):
+        self.targets = targets
+        self.per_cluster = per_cluster
+        self.check_workers = check_workers
+        self.cache_ttl = cache_ttl
+        self.page_size = page_size
+        # One collector for every target; records are labelled by context and namespace
+        self.instrumentation = instrumentation
+        # State kept between runs; files are per context and namespace
+        self.state_dir = state_dir
+        self.transport_factory = transport_factory or (
+            lambda context: make_transport(transport, context=context))
+
+        # Caps the total number of targets in flight across all clusters
+        self._global = threading.BoundedSemaphore(workers)
+        # One transport per cluster so namespaces share its connection pool
+        self._transports = {}
+        self._transports_guard = threading.Lock()
+
+    def _transport(self, context: Optional[str]):
+        with self._transports_guard:
+            if context not in self._transports:
+                self._transports[context] = self.transport_factory(context)
+            return self._transports[context]
+
+    def _run_target(self, target: Target, output: ThreadLocalStdout) -> Dict:
+        buffer = io.StringIO()
+        output.local.buffer = buffer
+        report = RunReport(target.namespace, target.context)
+        error = None
+        try:
+            with self._global:
+                tester = SASViyaKubectlTester(
+                    target.namespace,
+                    transport=self._transport(target.context),
+                    cache_ttl=self.cache_ttl,
+                    page_size=self.page_size,
+                    context=target.context,
+                    instrumentation=self.instrumentation,
+                    state_dir=self.state_dir,
+                )
+                report = tester.report
+                passed = tester.run_all_tests(workers=self.check_workers)
+        except Exception as e:
+            # One unreachable cluster must not abort the other targets
+            passed, error = False, str(e)
+            report.error = error
+        finally:
+            output.local.buffer = None
+
+        return {
+            'context': target.context,
+            'namespace': target.namespace,
+            'passed': passed,
+            'error': error,
+            'results': report.results,
+            'report': report,
+            'output': buffer.getvalue(),
+        }
+
+    def run(self) -> List[Dict]:
+        """Run every target; results come back in target order"""
+        # A small pool per cluster enforces the per-cluster concurrency limit
+        pools = {}
+        for target in self.targets:
+            if target.context not in pools:
+                pools[target.context] = ThreadPoolExecutor(
+                    max_workers=self.per_cluster,
+                    thread_name_prefix=f"fanout-{target.context or 'current'}")
+        with thread_local_stdout() as output:
+            try:
+                futures = [pools[target.context].submit(self._run_target, target, output)
+                           for target in self.targets]
+                return [future.result() for future in futures]
+            finally:
+                for pool in pools.values():
+                    pool.shutdown()
+                for transport in self._transports.values():
+                    transport.close()
+
+
+def print_summary(results: List[Dict]):
+    """Print one pass/fail line per target and per check"""
+    print("\n" + "="*60)
+    print("MULTI-TARGET SUMMARY")
+    print("="*60)
+
+    for result in results:
+        target = Target(result['context'], result['namespace'])
+        status = "✓ PASSED" if result['passed'] else "✗ FAILED"
+        print(f"{target.label}: {status}")
+        if result['error']:
+            print(f"  Error: {result['error']}")
+        for test in result['results']:
+            if not test.passed:
+                print(f"  - {test.test}: ✗ FAILED")
+
+    failed = sum(1 for r in results if not r['passed'])
+    print(f"\nTargets: {len(results) - failed} passed, {failed} failed")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Test many SAS Viya namespaces and clusters at once')
+    parser.add_argument('--target', action='append', default=[], metavar='CONTEXT/NAMESPACE',
+                        help='Target to test; repeat for more (bare NAMESPACE uses the current context)')
+    parser.add_argument('--targets-file', help='YAML list of {context, namespace} targets')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Maximum targets tested at the same time')
+    parser.add_argument('--per-cluster', type=int, default=2,
+                        help='Maximum targets tested at the same time within one cluster')
+    parser.add_argument('--check-workers', type=int, default=1,
+                        help='Checks run concurrently within each target')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='auto',
+                        help='Read cluster state via the API server directly, kubectl, '
+                             'or the API with kubectl fallback')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL,
+                        help='Seconds a fetched resource list is reused across checks')
+    parser.add_argument('--json', dest='json_path', help='Write the merged results to this file')
+    parser.add_argument('--junit-xml', default=None,
+                        help='Write results as JUnit XML, one test suite per target')
+    parser.add_argument('--report-html', default=None, help='Write results as HTML to this file')
+    parser.add_argument('--metrics-json', default=None,
+                        help='Write per-check and per-call timings to this JSON file')
+    parser.add_argument('--metrics-prom', default=None,
+                        help='Write timings as a Prometheus textfile (node_exporter textfile collector)')
+    parser.add_argument('--state-dir', default=os.environ.get('KUBECTL_STATE_DIR'),
+                        help='Keep state between runs (event cursors) in this directory')
+    args = parser.parse_args()
+
+    targets = [parse_target(t) for t in args.target]
+    if args.targets_file:
+        targets.extend(load_targets(args.targets_file))
+    if not targets:
+        parser.error("no targets given; use --target or --targets-file")
+
+    runner = FanOutRunner(targets, transport=args.transport, workers=args.workers,
+                          per_cluster=args.per_cluster, check_workers=args.check_workers,
+                          cache_ttl=args.cache_ttl,
+                          instrumentation=Instrumentation()
+                          if args.metrics_json or args.metrics_prom else None,
+                          state_dir=args.state_dir)
+    results = runner.run()
+
+    for result in results:
+        print(f"\n##### {Target(result['context'], result['namespace']).label} #####")
+        sys.stdout.write(result['output'])
+    print_summary(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'targets': [
+                    dict({k: v for k, v in r.items() if k not in ('output', 'report')},
+                         results=[t.to_dict() for t in r['results']])
+                    for r in results
+                ],
+            }, f, indent=2, default=str)
+    outputs = {'junit': args.junit_xml, 'html': args.report_html}
+    write_reports([r['report'] for r in results],
+                  {fmt: path for fmt, path in outputs.items() if path})
+    if args.metrics_json:
+        runner.instrumentation.write_json(args.metrics_json)
+    if args.metrics_prom:
+        runner.instrumentation.write_prometheus(args.metrics_prom)
+
+    sys.exit(0 if all(r['passed'] for r in results) else 1)
@@ -1,15 +1,160 @@
 #!/usr/bin/env python3
 
+import contextlib
+import io
+import os
 import subprocess
-import json
 import sys
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from kubectl_cas import CAS_POD_FIELDS, CONTROLLER_SELECTOR
+from kubectl_events import WarningEvents
+from kubectl_metrics import Instrumentation
+from kubectl_replay import RecordingTransport, ReplayTransport
+from kubectl_resources import NodeUsage, PodUsage, evaluate
+from kubectl_results import CheckResult, RunReport, write_reports
+from kubectl_scheduler import HIGH, LOW, Check, CheckRegistry, CheckScheduler
+from kubectl_snapshot import ClusterSnapshot, DEFAULT_TTL
+from kubectl_state import state_file
+from kubectl_transport import (
+    DEFAULT_PAGE_SIZE, KubectlTransport, TRANSPORTS, TransportError, make_transport
+)
+
+# Object fields each check reads. Only these are requested and retained:
+# metadata-only queries use PartialObjectMetadata, the rest are trimmed
+# as each object is parsed (see kubectl_query)
+NAMESPACE_FIELDS = ('metadata.name',)
+POD_HEALTH_FIELDS = ('metadata.name', 'status.phase', 'status.containerStatuses[].ready')
+PVC_FIELDS = ('metadata.name', 'status.phase')
+SERVICE_FIELDS = ('metadata.name',)
+ENDPOINT_FIELDS = ('metadata.name', 'subsets[].addresses')
+INGRESS_FIELDS = ('metadata.name', 'status.loadBalancer.ingress', 'spec.rules')
+POD_RESOURCE_FIELDS = ('metadata.name', 'spec.nodeName', 'spec.containers[].resources.limits')
+NODE_RESOURCE_FIELDS = ('metadata.name', 'status.allocatable')
+
+# Every check run_all_tests runs, with the lists it reads and its priority
+REGISTRY = CheckRegistry()
+
+def count_pod(pod_status: Dict, pod: Dict):
+    """Add one pod to the Pod Health counts"""
+    pod_name = pod['metadata']['name']
+    phase = pod['status']['phase']
+    pod_status['total'] += 1
+
+    if phase == 'Running':
+        # Check if all containers are ready
+        all_ready = all(
+            c.get('ready', False)
+            for c in pod['status'].get('containerStatuses', [])
+        )
+        if all_ready:
+            pod_status['running'] += 1
+        else:
+            pod_status['problematic_pods'].append({
+                'name': pod_name,
+                'issue': 'Containers not ready'
+            })
+    elif phase == 'Pending':
+        pod_status['pending'] += 1
+        pod_status['problematic_pods'].append({
+            'name': pod_name,
+            'issue': 'Pod pending'
+        })
+    elif phase == 'Failed':
+        pod_status['failed'] += 1
+        pod_status['problematic_pods'].append({
+            'name': pod_name,
+            'issue': 'Pod failed'
+        })
+    else:
+        pod_status['unknown'] += 1
+
+class ThreadLocalStdout(io.TextIOBase):
+    """sys.stdout proxy that routes each worker thread's prints to its own buffer"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, text: str) -> int:
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer if buffer is not None else self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+
+
+# Runs currently relying on the installed ThreadLocalStdout, and that proxy
+_stdout_lock = threading.Lock()
+_stdout_users = 0
+_stdout_proxy = None
+
+
+@contextlib.contextmanager
+def thread_local_stdout() -> Iterator[ThreadLocalStdout]:
+    """
+    Route sys.stdout through a ThreadLocalStdout while the block runs.
+    
+    Nested and concurrent callers (a fan-out whose targets run their checks
+    concurrently) share one proxy, which is removed when the last one ends,
+    so no caller restores sys.stdout under another.
+    """
+    global _stdout_users, _stdout_proxy
+    with _stdout_lock:
+        if not isinstance(sys.stdout, ThreadLocalStdout):
+            sys.stdout = _stdout_proxy = ThreadLocalStdout(sys.stdout)
+        proxy = sys.stdout
+        _stdout_users += 1
+    try:
+        yield proxy
+    finally:
+        with _stdout_lock:
+            _stdout_users -= 1
+            if not _stdout_users and _stdout_proxy is not None and sys.stdout is _stdout_proxy:
+                sys.stdout = _stdout_proxy.stream
+                _stdout_proxy = None
+
 
 class SASViyaKubectlTester:
-    def __init__(self, namespace: str = "sas-viya"):
+    def __init__(self, namespace: str = "sas-viya",
+                 snapshot: Optional[ClusterSnapshot] = None,
+                 cache_ttl: float = DEFAULT_TTL,
+                 transport=None,
+                 page_size: int = DEFAULT_PAGE_SIZE,
+                 context: Optional[str] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 state_dir: Optional[str] = None):
         self.namespace = namespace
-        self.test_results = []
+        # kubeconfig context to target; None uses the current context
+        self.context = context
+        # Results are recorded straight into the report the writers consume
+        self.report = RunReport(namespace, context)
+        self.test_results = self.report.results
+        # Per-thread result lists used while checks run concurrently
+        self._local = threading.local()
+        # Shared cache so each resource list is fetched once per run; streamed
+        # kinds are not cached, see _pod_pass
+        self.snapshot = snapshot or ClusterSnapshot(
+            namespace,
+            transport=transport or KubectlTransport(runner=self.run_kubectl, context=context),
+            ttl=cache_ttl,
+            page_size=page_size
+        )
+        # Per-check and per-call timings; shared with the transport unless it has its own
+        self.instrumentation = instrumentation
+        transport = self.snapshot.transport
+        if instrumentation is not None and getattr(transport, 'instrumentation', None) is None:
+            transport.instrumentation = instrumentation
+        # Warning events aggregated across runs; persisted when a state directory is given
+        self.events = WarningEvents(
+            state_file(state_dir, 'events', namespace, context) if state_dir else None)
+        # Outcome of the current run's single pass over the pods, once made
+        self._pods = None
+        self._pods_lock = threading.Lock()
+        self._in_run = False
         
     def run_kubectl(self, command: str) -> Tuple[bool, str]:
         """Execute kubectl command and return success status and output"""
@@ -27,60 +172,182 @@ class SASViyaKubectlTester:
         except Exception as e:
             return False, str(e)
     
-    def test_pod_health(self) -> Dict:
-        """Test all pods health in namespace"""
+    def _record(self, result: CheckResult):
+        """Store a check result for the current run"""
+        started = getattr(self._local, 'started', None)
+        if started is not None:
+            result.duration = time.perf_counter() - started
+        getattr(self._local, 'results', self.test_results).append(result)
+    
+    def _run_check(self, check):
+        """Run one check, timing it when instrumentation is enabled"""
+        self._local.started = time.perf_counter()
+        try:
+            if self.instrumentation is None:
+                return check()
+            with self.instrumentation.check(check.__name__, self.namespace, self.context):
+                return check()
+        finally:
+            self._local.started = None
+    
+    def _execute(self, check: Check) -> Tuple[bool, None]:
+        """Run a registered check; it passed if it recorded only passing results"""
+        recorded = len(self.test_results)
+        self._run_check(getattr(self, check.function.__name__))
+        results = self.test_results[recorded:]
+        return bool(results) and all(r.passed for r in results), None
+    
+    def _execute_isolated(self, check: Check,
+                          output: ThreadLocalStdout) -> Tuple[bool, Tuple[str, List]]:
+        """Run a registered check in a worker thread, capturing its output and results"""
+        buffer = io.StringIO()
+        output.local.buffer = buffer
+        self._local.results = []
+        try:
+            self._run_check(getattr(self, check.function.__name__))
+            results = self._local.results
+            passed = bool(results) and all(r.passed for r in results)
+            return passed, (buffer.getvalue(), results)
+        finally:
+            output.local.buffer = None
+            del self._local.results
+    
+    def _run_scheduled(self, workers: int) -> CheckScheduler:
+        """Run the registered checks, concurrently as their inputs arrive when workers > 1"""
+        scheduler = CheckScheduler(self.snapshot, REGISTRY, workers,
+                                   self.instrumentation, self.context)
+        self._pods, self._in_run = None, True
+        try:
+            if workers <= 1:
+                scheduler.run(self._execute)
+                return scheduler
+            
+            # Reuses the proxy of a fan-out running this target in a thread
+            with thread_local_stdout() as output:
+                outcomes = scheduler.run(lambda check: self._execute_isolated(check, output))
+        finally:
+            self._pods, self._in_run = None, False
+        
+        # Reported in registry order, whatever order the checks finished in
+        for _, (text, results) in outcomes:
+            sys.stdout.write(text)
+            self.test_results.extend(results)
+        return scheduler
+    
+    def _pod_pass(self, health: bool = True,
+                  usage: bool = True) -> Tuple[Optional[Dict], Optional[Dict[str, Tuple]]]:
+        """
+        Pod health counts and per-pod (node, cpu limit, memory limit).
+        
+        During a run both come from one pass over the pods, paged through
+        with the fields of every pod check, and the checks share it; a
+        check called on its own reads only what it asked for and gets None
+        for the other. Raises TransportError if the pods cannot be listed.
+        """
+        with self._pods_lock:
+            if self._pods is not None:
+                outcome = self._pods
+            else:
+                if self._in_run:
+                    health = usage = True
+                pod_status = {
+                    "total": 0,
+                    "running": 0,
+                    "pending": 0,
+                    "failed": 0,
+                    "unknown": 0,
+                    "problematic_pods": []
+                } if health else None
+                limits = {} if usage else None
+                readers = []
+                if health:
+                    readers.append((POD_HEALTH_FIELDS, lambda pod: count_pod(pod_status, pod)))
+                if usage:
+                    readers.append((POD_RESOURCE_FIELDS,
+                                    lambda pod: limits.__setitem__(pod['metadata']['name'],
+                                                                   PodUsage.limits_of(pod))))
+                try:
+                    self.snapshot.scan('pods', readers)
+                    outcome = (pod_status, limits)
+                except TransportError as e:
+                    outcome = e
+                if self._in_run:
+                    self._pods = outcome
+        if isinstance(outcome, TransportError):
+            raise outcome
+        return outcome
+    
+    @REGISTRY.register('Namespace', critical=True, needs=lambda namespace: [
+        ('namespace', None, f"metadata.name={namespace}", NAMESPACE_FIELDS)])
+    def test_namespace(self) -> Dict:
+        """Test that the namespace exists"""
         print(f"\n{'='*50}")
-        print("Testing Pod Health")
+        print("Testing Namespace")
         print('='*50)
         
-        cmd = f"kubectl get pods -n {self.namespace} -o json"
-        success, output = self.run_kubectl(cmd)
+        namespaces = self.snapshot.get('namespace', field_selector=f"metadata.name={self.namespace}",
+                                       fields=NAMESPACE_FIELDS)
         
-        if not success:
-            return {"status": "FAILED", "error": "Cannot get pods"}
+        if namespaces is None:
+            namespace_status = {"error": "Cannot get namespaces"}
+            self._record(CheckResult('Namespace', False, namespace_status))
+            return namespace_status
         
-        pods = json.loads(output)
-        pod_status = {
-            "total": 0,
-            "running": 0,
-            "pending": 0,
-            "failed": 0,
-            "unknown": 0,
-            "problematic_pods": []
-        }
+        exists = any(item['metadata']['name'] == self.namespace
+                     for item in namespaces.get('items', []))
+        namespace_status = {"namespace": self.namespace, "exists": exists}
+        print(f"Namespace {self.namespace}: {'found' if exists else 'not found'}")
+        
+        self._record(CheckResult('Namespace', exists, namespace_status))
         
+        return namespace_status
+    
+    @REGISTRY.register('CAS Controller', critical=True, needs=[
+        ('pods', CONTROLLER_SELECTOR, None, CAS_POD_FIELDS)])
+    def test_cas_controller(self) -> Dict:
+        """Test that a CAS controller pod is running and ready"""
+        print(f"\n{'='*50}")
+        print("Testing CAS Controller")
+        print('='*50)
+        
+        pods = self.snapshot.get('pods', CONTROLLER_SELECTOR, fields=CAS_POD_FIELDS)
+        
+        if pods is None:
+            controller_status = {"error": "Cannot get CAS controller pods"}
+            self._record(CheckResult('CAS Controller', False, controller_status))
+            return controller_status
+        
+        controller_status = {"controllers": {}, "ready": 0}
         for pod in pods.get('items', []):
-            pod_name = pod['metadata']['name']
-            phase = pod['status']['phase']
-            pod_status['total'] += 1
-            
-            if phase == 'Running':
-                # Check if all containers are ready
-                all_ready = all(
-                    c.get('ready', False) 
-                    for c in pod['status'].get('containerStatuses', [])
-                )
-                if all_ready:
-                    pod_status['running'] += 1
-                else:
-                    pod_status['problematic_pods'].append({
-                        'name': pod_name,
-                        'issue': 'Containers not ready'
-                    })
-            elif phase == 'Pending':
-                pod_status['pending'] += 1
-                pod_status['problematic_pods'].append({
-                    'name': pod_name,
-                    'issue': 'Pod pending'
-                })
-            elif phase == 'Failed':
-                pod_status['failed'] += 1
-                pod_status['problematic_pods'].append({
-                    'name': pod_name,
-                    'issue': 'Pod failed'
-                })
-            else:
-                pod_status['unknown'] += 1
+            status = pod.get('status') or {}
+            containers = status.get('containerStatuses') or []
+            controller_status['controllers'][pod['metadata']['name']] = status.get('phase')
+            if status.get('phase') == 'Running' and containers and \
+                    all(c.get('ready') for c in containers):
+                controller_status['ready'] += 1
+        
+        for name, phase in controller_status['controllers'].items():
+            print(f"Controller {name}: {phase}")
+        if not controller_status['controllers']:
+            print("No CAS controller pod found")
+        
+        test_passed = controller_status['ready'] > 0
+        self._record(CheckResult('CAS Controller', test_passed, controller_status))
+        
+        return controller_status
+    
+    @REGISTRY.register('Pod Health', priority=HIGH, needs=[
+        ('pods', None, None, POD_HEALTH_FIELDS)])
+    def test_pod_health(self) -> Dict:
+        """Test all pods health in namespace"""
+        print(f"\n{'='*50}")
+        print("Testing Pod Health")
+        print('='*50)
+        
+        try:
+            pod_status, _ = self._pod_pass(usage=False)
+        except TransportError:
+            return {"status": "FAILED", "error": "Cannot get pods"}
         
         # Print summary
         print(f"Total Pods: {pod_status['total']}")
@@ -94,27 +361,22 @@ class SASViyaKubectlTester:
                 print(f"  - {pod['name']}: {pod['issue']}")
         
         test_passed = pod_status['failed'] == 0 and pod_status['pending'] == 0
-        self.test_results.append({
-            'test': 'Pod Health',
-            'passed': test_passed,
-            'details': pod_status
-        })
+        self._record(CheckResult('Pod Health', test_passed, pod_status))
         
         return pod_status
     
+    @REGISTRY.register('Persistent Volumes', needs=[('pvc', None, None, PVC_FIELDS)])
     def test_persistent_volumes(self) -> Dict:
         """Test PVC status"""
         print(f"\n{'='*50}")
         print("Testing Persistent Volume Claims")
         print('='*50)
         
-        cmd = f"kubectl get pvc -n {self.namespace} -o json"
-        success, output = self.run_kubectl(cmd)
+        pvcs = self.snapshot.get('pvc', fields=PVC_FIELDS)
         
-        if not success:
+        if pvcs is None:
             return {"status": "FAILED", "error": "Cannot get PVCs"}
         
-        pvcs = json.loads(output)
         pvc_status = {
             "total": 0,
             "bound": 0,
@@ -148,27 +410,23 @@ class SASViyaKubectlTester:
                 print(f"  - {issue}")
         
         test_passed = pvc_status['pending'] == 0 and pvc_status['lost'] == 0
-        self.test_results.append({
-            'test': 'Persistent Volumes',
-            'passed': test_passed,
-            'details': pvc_status
-        })
+        self._record(CheckResult('Persistent Volumes', test_passed, pvc_status))
         
         return pvc_status
     
+    @REGISTRY.register('Services', needs=[
+        ('services', None, None, SERVICE_FIELDS), ('endpoints', None, None, ENDPOINT_FIELDS)])
     def test_services(self) -> Dict:
         """Test service endpoints"""
         print(f"\n{'='*50}")
         print("Testing Services")
         print('='*50)
         
-        cmd = f"kubectl get services -n {self.namespace} -o json"
-        success, output = self.run_kubectl(cmd)
+        services = self.snapshot.get('services', fields=SERVICE_FIELDS)
         
-        if not success:
+        if services is None:
             return {"status": "FAILED", "error": "Cannot get services"}
         
-        services = json.loads(output)
         critical_services = [
             'sas-logon-app',
             'sas-cas-server',
@@ -185,17 +443,21 @@ class SASViyaKubectlTester:
             "all_services": []
         }
         
+        # List endpoints once for the namespace and join by name
+        endpoints_by_name = self.snapshot.index('endpoints', fields=ENDPOINT_FIELDS)
+        
+        if endpoints_by_name is None:
+            return {"status": "FAILED", "error": "Cannot get endpoints"}
+        
         for service in services.get('items', []):
             service_name = service['metadata']['name']
             service_status['total'] += 1
             service_status['all_services'].append(service_name)
             
             # Check endpoints
-            cmd = f"kubectl get endpoints {service_name} -n {self.namespace} -o json"
-            ep_success, ep_output = self.run_kubectl(cmd)
+            endpoints = endpoints_by_name.get(service_name)
             
-            if ep_success:
-                endpoints = json.loads(ep_output)
+            if endpoints is not None:
                 subsets = endpoints.get('subsets', [])
                 if subsets and any(s.get('addresses') for s in subsets):
                     service_status['with_endpoints'] += 1
@@ -217,28 +479,23 @@ class SASViyaKubectlTester:
                 print(f"  - {service}")
         
         test_passed = len(service_status['critical_missing']) == 0
-        self.test_results.append({
-            'test': 'Services',
-            'passed': test_passed,
-            'details': service_status
-        })
+        self._record(CheckResult('Services', test_passed, service_status))
         
         return service_status
     
+    @REGISTRY.register('Ingress', needs=[('ingress', None, None, INGRESS_FIELDS)])
     def test_ingress(self) -> Dict:
         """Test ingress configuration"""
         print(f"\n{'='*50}")
         print("Testing Ingress")
         print('='*50)
         
-        cmd = f"kubectl get ingress -n {self.namespace} -o json"
-        success, output = self.run_kubectl(cmd)
+        ingresses = self.snapshot.get('ingress', fields=INGRESS_FIELDS)
         
-        if not success:
+        if ingresses is None:
             print("No ingress found or cannot get ingress")
             return {"status": "No ingress configured"}
         
-        ingresses = json.loads(output)
         ingress_status = {
             "total": 0,
             "with_address": 0,
@@ -270,101 +527,121 @@ class SASViyaKubectlTester:
                     print(f"    Path: {path} -> Service: {service}")
         
         test_passed = ingress_status['with_address'] > 0 if ingress_status['total'] > 0 else True
-        self.test_results.append({
-            'test': 'Ingress',
-            'passed': test_passed,
-            'details': ingress_status
-        })
+        self._record(CheckResult('Ingress', test_passed, ingress_status))
         
         return ingress_status
     
+    @REGISTRY.register('Resource Usage', needs=[
+        ('nodemetrics', None, None, None), ('nodes', None, None, NODE_RESOURCE_FIELDS),
+        ('podmetrics', None, None, None), ('pods', None, None, POD_RESOURCE_FIELDS)])
     def test_resource_usage(self) -> Dict:
-        """Test resource usage"""
+        """Test resource usage against container limits and node allocatable"""
         print(f"\n{'='*50}")
         print("Testing Resource Usage")
         print('='*50)
         
-        # Get node metrics
-        cmd = "kubectl top nodes --no-headers"
-        success, output = self.run_kubectl(cmd)
-        
-        if not success:
+        # Metrics come from the metrics API rather than `kubectl top` text;
+        # pods and pod metrics are streamed straight into numeric columns
+        node_metrics = self.snapshot.get('nodemetrics')
+        try:
+            if node_metrics is None:
+                raise TransportError("Cannot list nodemetrics")
+            # Limits are not kept past the join, so the names they hold are freed
+            pods = PodUsage.from_metrics(self.snapshot.items('podmetrics'),
+                                         limits=self._pod_pass(health=False)[1])
+        except TransportError:
+            # Clusters without metrics-server are not unhealthy; nothing is recorded
             print("Metrics server not available")
             return {"status": "Metrics not available"}
+        nodes = self.snapshot.get('nodes', fields=NODE_RESOURCE_FIELDS) or {}
+        
+        usage_status = evaluate(
+            pods, NodeUsage.from_metrics(node_metrics.get('items', []), nodes.get('items', []))
+        )
+        
+        print(f"Pods with metrics: {usage_status['pods']}")
+        print(f"Nodes with metrics: {usage_status['nodes']}")
+        for entry in usage_status['nodes_cpu_pressure'] + usage_status['nodes_memory_pressure']:
+            print(f"  ⚠ Node {entry['node']}: {entry['usage']} of {entry['allocatable']} "
+                  f"allocatable ({entry['percent']}%)")
+        for entry in usage_status['pods_near_cpu_limit'] + usage_status['pods_near_memory_limit']:
+            print(f"  ⚠ Pod {entry['pod']}: {entry['usage']} of {entry['limit']} limit "
+                  f"({entry['percent']}%)")
         
-        print("Node Resource Usage:")
-        print(output)
+        print(f"\nTop Pods by CPU in {self.namespace}:")
+        for entry in usage_status['top_cpu']:
+            print(f"  {entry['pod']:<50} CPU: {entry['cpu']:>7}  Memory: {entry['memory']:>7}")
         
-        # Get pod metrics for namespace
-        cmd = f"kubectl top pods -n {self.namespace} --no-headers | head -10"
-        success, output = self.run_kubectl(cmd)
+        test_passed = not any(usage_status[key] for key in (
+            'pods_near_cpu_limit', 'pods_near_memory_limit',
+            'nodes_cpu_pressure', 'nodes_memory_pressure'))
         
-        if success:
-            print(f"\nTop 10 Pods Resource Usage in {self.namespace}:")
-            print(output)
+        self._record(CheckResult('Resource Usage', test_passed, usage_status))
         
-        return {"status": "Completed"}
+        return usage_status
     
+    # Events are read through their own list-and-watch cursor, not the snapshot
+    @REGISTRY.register('Recent Events', priority=LOW)
     def test_recent_events(self) -> Dict:
         """Check for recent warning events"""
         print(f"\n{'='*50}")
         print("Checking Recent Events")
         print('='*50)
         
-        cmd = f"kubectl get events -n {self.namespace} --field-selector type=Warning -o json"
-        success, output = self.run_kubectl(cmd)
-        
-        if not success:
+        try:
+            self.events.sync(self.snapshot)
+        except TransportError:
             return {"status": "FAILED", "error": "Cannot get events"}
         
-        events = json.loads(output)
-        warning_events = []
+        newest = [a.to_dict() for a in self.events.newest(10)]
+        most_frequent = [a.to_dict() for a in self.events.most_frequent(5)]
         
-        for event in events.get('items', [])[-10:]:  # Last 10 warnings
-            warning_events.append({
-                'object': event.get('involvedObject', {}).get('name', 'unknown'),
-                'reason': event.get('reason', 'unknown'),
-                'message': event.get('message', 'no message'),
-                'count': event.get('count', 1)
-            })
-        
-        if warning_events:
-            print(f"Found {len(warning_events)} recent warning events:")
-            for event in warning_events[:5]:  # Show first 5
-                print(f"  - {event['object']}: {event['reason']} ({event['count']} times)")
+        if newest:
+            print(f"Found {len(self.events.aggregates)} warning event groups, newest first:")
+            for event in newest[:5]:
+                print(f"  - {event['object']}: {event['reason']} ({event['count']} times, "
+                      f"last {event['last_seen']})")
                 print(f"    {event['message'][:100]}...")
+            print("Most frequent:")
+            for event in most_frequent:
+                print(f"  - {event['object']}: {event['reason']} ({event['count']} times "
+                      f"since {event['first_seen']})")
         else:
             print("No recent warning events")
         
-        return {"warnings": warning_events}
+        return {"warnings": newest, "most_frequent": most_frequent}
     
-    def run_all_tests(self):
-        """Run all tests"""
+    def run_all_tests(self, workers: int = 1):
+        """
+        Run all registered tests, optionally on a pool of worker threads.
+        
+        Critical tests run first; if one fails the others are skipped.
+        """
         print("\n" + "="*60)
         print("SAS VIYA KUBECTL VALIDATION TESTS")
         print("="*60)
         print(f"Namespace: {self.namespace}")
         print(f"Timestamp: {datetime.now().isoformat()}")
+        self.report.start()
         
-        # Run all tests
-        self.test_pod_health()
-        self.test_persistent_volumes()
-        self.test_services()
-        self.test_ingress()
-        self.test_resource_usage()
-        self.test_recent_events()
+        scheduler = self._run_scheduled(workers)
+        self.report.finish()
         
         # Print summary
         print("\n" + "="*60)
         print("TEST SUMMARY")
         print("="*60)
         
-        passed = sum(1 for t in self.test_results if t['passed'])
-        failed = sum(1 for t in self.test_results if not t['passed'])
+        passed = sum(1 for t in self.test_results if t.passed)
+        failed = sum(1 for t in self.test_results if not t.passed)
         
         for test in self.test_results:
-            status = "✓ PASSED" if test['passed'] else "✗ FAILED"
-            print(f"{test['test']}: {status}")
+            status = "✓ PASSED" if test.passed else "✗ FAILED"
+            print(f"{test.test}: {status}")
+        
+        if scheduler.skipped:
+            print(f"Skipped after {scheduler.failed.name} failed: "
+                  f"{', '.join(check.name for check in scheduler.skipped)}")
         
         print(f"\nTotal: {passed} passed, {failed} failed")
         
@@ -375,9 +652,56 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description='Test SAS Viya deployment using kubectl')
     parser.add_argument('--namespace', default='sas-viya', help='Kubernetes namespace')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL,
+                        help='Seconds a fetched resource list is reused across checks')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of checks to run concurrently (1 runs them sequentially)')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='auto',
+                        help='Read cluster state via the API server directly, kubectl, '
+                             'or the API with kubectl fallback')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help='Items per paginated list request for pods and events')
+    parser.add_argument('--context', default=None,
+                        help='kubeconfig context to test (default: current context)')
+    parser.add_argument('--metrics-json', default=None,
+                        help='Write per-check and per-call timings to this JSON file')
+    parser.add_argument('--metrics-prom', default=None,
+                        help='Write timings as a Prometheus textfile (node_exporter textfile collector)')
+    replay_group = parser.add_mutually_exclusive_group()
+    replay_group.add_argument('--record', metavar='ARCHIVE', default=None,
+                              help='Save every cluster response of this run to a zip archive')
+    replay_group.add_argument('--replay', metavar='ARCHIVE', default=None,
+                              help='Run against a recorded archive instead of the cluster')
+    parser.add_argument('--state-dir', default=os.environ.get('KUBECTL_STATE_DIR'),
+                        help='Keep state between runs (event cursor) in this directory')
+    parser.add_argument('--report-json', default=None, help='Write results as JSON to this file')
+    parser.add_argument('--junit-xml', default=None, help='Write results as JUnit XML to this file')
+    parser.add_argument('--report-html', default=None, help='Write results as HTML to this file')
     args = parser.parse_args()
     
-    tester = SASViyaKubectlTester(namespace=args.namespace)
-    success = tester.run_all_tests()
+    if args.replay:
+        transport = ReplayTransport(args.replay)
+    else:
+        transport = make_transport(args.transport, context=args.context)
+        if args.record:
+            transport = RecordingTransport(transport, args.record, metadata={
+                'namespace': args.namespace, 'context': args.context})
+    
+    instrumentation = Instrumentation() if args.metrics_json or args.metrics_prom else None
+    tester = SASViyaKubectlTester(namespace=args.namespace, cache_ttl=args.cache_ttl,
+                                  transport=transport,
+                                  page_size=args.page_size, context=args.context,
+                                  instrumentation=instrumentation,
+                                  state_dir=args.state_dir)
+    success = tester.run_all_tests(workers=args.workers)
+    transport.close()
+    
+    outputs = {'json': args.report_json, 'junit': args.junit_xml, 'html': args.report_html}
+    write_reports([tester.report], {fmt: path for fmt, path in outputs.items() if path})
+    
+    if args.metrics_json:
+        instrumentation.write_json(args.metrics_json)
+    if args.metrics_prom:
+        instrumentation.write_prometheus(args.metrics_prom)
     
     sys.exit(0 if success else 1)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Pod Log Scanning
+Streams the logs of many pods concurrently and matches each line against
+a compiled set of error signatures as it arrives. Only counts and a few
+sample lines are kept, so memory stays bounded however long the logs are.
+"""
+
+import json
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from kubectl_results import CheckResult
+from kubectl_snapshot import ClusterSnapshot
+from kubectl_transport import TRANSPORTS, TransportError, make_transport
+
+# Signature name -> pattern, most specific first: a line counts once, for
+# the first signature it matches
+DEFAULT_SIGNATURES = {
+    'out_of_memory': r'OutOfMemoryError|[Oo]ut of memory|OOMKilled',
+    'connection_refused': r'[Cc]onnection refused|ECONNREFUSED',
+    'timeout': r'[Tt]imed out|[Tt]imeout(?:Exception)?\b',
+    'database': r'PSQLException|could not connect to server|FATAL:\s',
+    'auth_failure': r'\b401 Unauthorized|invalid_token|[Aa]ccess denied',
+    'exception': r'\b(?:[a-z]\w*\.)+[A-Z]\w*(?:Exception|Error)\b',
+    'error': r'"level"\s*:\s*"(?:error|fatal)"|\b(?:ERROR|FATAL|SEVERE)\b',
+}
+
+LOG_POD_FIELDS = ('metadata.name', 'spec.containers[].name', 'status.phase')
+DEFAULT_WORKERS = 8
+# Example lines kept per signature and pod, and their maximum length
+SAMPLES = 3
+SAMPLE_LENGTH = 300
+
+
+class SignatureSet:
+    """Error signatures compiled into one alternation with a named group each
+
+    Most lines match nothing and are rejected by a single search of the
+    alternation. A hit names the signature matching leftmost in the line;
+    only then are the signatures listed before it tried on their own, so
+    the first signature in order wins wherever it occurs in the line.
+    """
+
+    def __init__(self, signatures: Dict[str, str] = DEFAULT_SIGNATURES):
+        self.names = list(signatures)
+        # Group names must be identifiers; signature names need not be
+        self._groups = {f"s{i}": i for i in range(len(self.names))}
+        self.pattern = re.compile('|'.join(
+            f"(?P<s{i}>{pattern})" for i, pattern in enumerate(signatures.values())))
+        self._each = [re.compile(pattern) for pattern in signatures.values()]
+
+    def match(self, line: str) -> Optional[str]:
+        """Name of the first signature the line matches, or None"""
+        found = self.pattern.search(line)
+        if found is None:
+            return None
+        index = self._groups[found.lastgroup]
+        for earlier in range(index):
+            if self._each[earlier].search(line):
+                return self.names[earlier]
+        return self.names[index]
+
+
+class LogScan:
+    """Signature counts for one container's log"""
+
+    __slots__ = ('pod', 'container', 'lines', 'counts', 'samples', 'error')
+
+    def __init__(self, pod: str, container: Optional[str] = None):
+        self.pod = pod
+        self.container = container
+        self.lines = 0
+        self.counts: Counter = Counter()
+        # signature -> first few matching lines
+        self.samples: Dict[str, List[str]] = {}
+        self.error = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.pod}/{self.container}" if self.container else self.pod
+
+    def to_dict(self) -> Dict:
+        return {'pod': self.pod, 'container': self.container, 'lines': self.lines,
+                'counts': dict(self.counts), 'samples': self.samples, 'error': self.error}
+
+
+class LogScanner:
+    """Scans container logs through a transport on a bounded pool of workers"""
+
+    def __init__(self, transport, namespace: str, signatures: Optional[SignatureSet] = None,
+                 workers: int = DEFAULT_WORKERS, tail_lines: Optional[int] = None,
+                 since_seconds: Optional[int] = None, samples: int = SAMPLES):
+        self.transport = transport
+        self.namespace = namespace
+        self.signatures = signatures or SignatureSet()
+        self.workers = workers
+        self.tail_lines = tail_lines
+        self.since_seconds = since_seconds
+        self.samples = samples
+
+    def scan_one(self, pod: str, container: Optional[str] = None) -> LogScan:
+        scan = LogScan(pod, container)
+        match = self.signatures.match
+        try:
+            for line in self.transport.logs(pod, self.namespace, container,
+                                            tail_lines=self.tail_lines,
+                                            since_seconds=self.since_seconds):
+                scan.lines += 1
+                name = match(line)
+                if name is None:
+                    continue
+                scan.counts[name] += 1
+                kept = scan.samples.setdefault(name, [])
+                if len(kept) < self.samples:
+                    kept.append(line[:SAMPLE_LENGTH])
+        except TransportError as e:
+            scan.error = str(e)
+        return scan
+
+    def scan(self, targets: Iterable[Tuple[str, Optional[str]]]) -> List[LogScan]:
+        """Scan (pod, container) logs concurrently; results keep the targets' order"""
+        targets = list(targets)
+        if not targets:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(targets))) as pool:
+            return list(pool.map(lambda target: self.scan_one(*target), targets))
+
+
+def log_targets(snapshot: ClusterSnapshot,
+                selector: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+    """(pod, container) for every container of the running pods a selector picks"""
+    targets = []
+    for pod in snapshot.items('pods', selector, fields=LOG_POD_FIELDS):
+        if (pod.get('status') or {}).get('phase') != 'Running':
+            continue
+        containers = (pod.get('spec') or {}).get('containers') or [{}]
+        for container in containers:
+            targets.append((pod['metadata']['name'], container.get('name')))
+    return targets
+
+
+def summarize(scans: List[LogScan]) -> Dict:
+    """Totals per signature and per pod, plus the containers whose logs could not be read"""
+    totals = Counter()
+    per_pod = {}
+    for scan in scans:
+        totals.update(scan.counts)
+        if scan.counts:
+            per_pod[scan.label] = dict(scan.counts.most_common())
+    return {
+        'containers': len(scans),
+        'lines': sum(scan.lines for scan in scans),
+        'signatures': dict(totals.most_common()),
+        'pods': per_pod,
+        'unreadable': [scan.label for scan in scans if scan.error],
+    }
+
+
+def scan_namespace(snapshot: ClusterSnapshot, selector: Optional[str] = None,
+                   **scanner_options) -> Tuple[CheckResult, List[LogScan]]:
+    """
+    Scan every selected container's log.
+
+    Passes only if every log was read and no signature matched; a log that
+    cannot be read (e.g. no RBAC for pods/log) could hide any error.
+    """
+    try:
+        targets = log_targets(snapshot, selector)
+    except TransportError:
+        return CheckResult('Log Scan', False, {'error': 'Cannot list pods'}), []
+    scans = LogScanner(snapshot.transport, snapshot.namespace, **scanner_options).scan(targets)
+    summary = summarize(scans)
+    passed = not summary['signatures'] and not summary['unreadable']
+    return CheckResult('Log Scan', passed, summary), scans
+
+
+def parse_signature(text: str) -> Tuple[str, str]:
+    name, sep, pattern = text.partition('=')
+    if not sep or not name:
+        raise ValueError(f"Expected NAME=REGEX, got {text!r}")
+    re.compile(pattern)
+    return name, pattern
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Scan SAS Viya pod logs for error signatures')
+    parser.add_argument('--namespace', default='sas-viya', help='Kubernetes namespace')
+    parser.add_argument('--selector', '-l', default=None, help='Label selector for the pods')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Logs streamed at the same time')
+    parser.add_argument('--tail', type=int, default=None, help='Lines to scan from each log end')
+    parser.add_argument('--since', type=int, default=None, help='Only scan the last N seconds')
+    parser.add_argument('--signature', action='append', default=[], metavar='NAME=REGEX',
+                        help='Extra error signature (checked before the defaults)')
+    parser.add_argument('--samples', type=int, default=SAMPLES,
+                        help='Example lines kept per signature and pod')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='auto',
+                        help='Read cluster state via the API server directly, kubectl, '
+                             'or the API with kubectl fallback')
+    parser.add_argument('--context', default=None,
+                        help='kubeconfig context to use (default: current context)')
+    parser.add_argument('--json', dest='json_path', help='Write per-container results to this file')
+    args = parser.parse_args()
+
+    try:
+        extra = dict(parse_signature(s) for s in args.signature)
+    except (ValueError, re.error) as e:
+        parser.error(str(e))
+
+    signatures = dict(extra)
+    signatures.update((name, pattern) for name, pattern in DEFAULT_SIGNATURES.items()
+                      if name not in extra)
+
+    transport = make_transport(args.transport, context=args.context)
+    result, scans = scan_namespace(
+        ClusterSnapshot(args.namespace, transport=transport), args.selector,
+        signatures=SignatureSet(signatures), workers=args.workers,
+        tail_lines=args.tail, since_seconds=args.since, samples=args.samples)
+    transport.close()
+
+    summary = result.details
+    if 'error' in summary:
+        print(summary['error'])
+        sys.exit(1)
+    print(f"Scanned {summary['lines']} lines from {summary['containers']} containers")
+    for name, count in summary['signatures'].items():
+        print(f"  {name:<20} {count:>8}")
+    for pod, counts in summary['pods'].items():
+        print(f"  {pod}: " + ', '.join(f"{name}={count}" for name, count in counts.items()))
+    if summary['unreadable']:
+        print(f"Could not read logs of: {', '.join(summary['unreadable'])}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'summary': summary, 'containers': [s.to_dict() for s in scans]}, f,
+                      indent=2)
+    sys.exit(0 if result.passed else 1)
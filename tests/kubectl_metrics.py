@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Check and API Call Instrumentation
+Records wall time, transport time, response bytes, parse time, retries and
+timeouts for every check and every cluster read, and writes them as JSON
+or as a Prometheus node_exporter textfile
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+
+class CallRecord:
+    """Measurements for one transport call (one kubectl run or API request sequence)"""
+
+    __slots__ = ('check', 'context', 'namespace', 'transport', 'operation', 'kind',
+                 'wall_time', 'transport_time', 'parse_time', 'bytes',
+                 'retries', 'timeout', 'success')
+
+    def __init__(self, transport: str, operation: str, kind: str,
+                 check: Optional[str] = None, context: Optional[str] = None,
+                 namespace: Optional[str] = None):
+        self.check = check
+        self.context = context
+        self.namespace = namespace
+        self.transport = transport
+        self.operation = operation
+        self.kind = kind
+        self.wall_time = None
+        self.transport_time = 0.0
+        self.parse_time = 0.0
+        self.bytes = 0
+        self.retries = 0
+        self.timeout = False
+        self.success = True
+
+    def to_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class Instrumentation:
+    """Collects check and call records from any number of threads"""
+
+    def __init__(self):
+        self.checks = []
+        self.calls = []
+        self._lock = threading.Lock()
+        # The check running on the current thread, used to attribute calls
+        self._local = threading.local()
+
+    @contextmanager
+    def check(self, name: str, namespace: Optional[str] = None,
+              context: Optional[str] = None):
+        """Time a check; calls made on this thread meanwhile are attributed to it"""
+        start = time.perf_counter()
+        try:
+            with self.attributed(name, namespace, context):
+                yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.checks.append({'check': name, 'context': context,
+                                    'namespace': namespace, 'wall_time': elapsed})
+
+    @contextmanager
+    def attributed(self, name: str, namespace: Optional[str] = None,
+                   context: Optional[str] = None):
+        """Attribute calls made on this thread meanwhile to a check, without timing it"""
+        previous = getattr(self._local, 'check', None)
+        self._local.check = (name, context, namespace)
+        try:
+            yield
+        finally:
+            self._local.check = previous
+
+    def new_call(self, transport: str, operation: str, kind: str) -> CallRecord:
+        check, context, namespace = getattr(self._local, 'check', None) or (None, None, None)
+        return CallRecord(transport, operation, kind, check, context, namespace)
+
+    def add_call(self, record: CallRecord):
+        with self._lock:
+            self.calls.append(record)
+
+    def summary(self) -> List[Dict]:
+        """Call measurements totalled per (context, namespace, check, transport, operation, kind)"""
+        totals = {}
+        with self._lock:
+            calls = list(self.calls)
+        for call in calls:
+            key = (call.context, call.namespace, call.check,
+                   call.transport, call.operation, call.kind)
+            total = totals.setdefault(key, {
+                'context': call.context, 'namespace': call.namespace, 'check': call.check,
+                'transport': call.transport, 'operation': call.operation, 'kind': call.kind,
+                'calls': 0, 'wall_time': 0.0, 'transport_time': 0.0, 'parse_time': 0.0,
+                'bytes': 0, 'retries': 0, 'timeouts': 0, 'failures': 0,
+            })
+            total['calls'] += 1
+            total['wall_time'] += call.wall_time or 0.0
+            total['transport_time'] += call.transport_time
+            total['parse_time'] += call.parse_time
+            total['bytes'] += call.bytes
+            total['retries'] += call.retries
+            total['timeouts'] += int(call.timeout)
+            total['failures'] += int(not call.success)
+        return list(totals.values())
+
+    def to_json(self) -> Dict:
+        with self._lock:
+            checks = list(self.checks)
+            calls = [call.to_dict() for call in self.calls]
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'checks': checks,
+            'calls': calls,
+            'summary': self.summary(),
+        }
+
+    def write_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render the run in the Prometheus text exposition format"""
+        lines = [
+            '# HELP sas_viya_check_duration_seconds Wall time of each health check.',
+            '# TYPE sas_viya_check_duration_seconds gauge',
+        ]
+        with self._lock:
+            checks = list(self.checks)
+        for check in checks:
+            labels = _labels(context=check['context'], namespace=check['namespace'],
+                             check=check['check'])
+            lines.append(f"sas_viya_check_duration_seconds{labels} {check['wall_time']:.6f}")
+
+        metrics = [
+            ('calls', 'sas_viya_api_calls', 'Cluster reads issued.'),
+            ('wall_time', 'sas_viya_api_wall_seconds', 'Wall time spent in cluster reads.'),
+            ('transport_time', 'sas_viya_api_transport_seconds',
+             'Time waiting on kubectl or the API server.'),
+            ('parse_time', 'sas_viya_api_parse_seconds', 'Time spent parsing JSON responses.'),
+            ('bytes', 'sas_viya_api_response_bytes', 'Response bytes received.'),
+            ('retries', 'sas_viya_api_retries', 'Requests retried on a fresh connection.'),
+            ('timeouts', 'sas_viya_api_timeouts', 'Cluster reads that timed out.'),
+            ('failures', 'sas_viya_api_failures', 'Cluster reads that failed.'),
+        ]
+        summary = self.summary()
+        for field, name, help_text in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for total in summary:
+                labels = _labels(context=total['context'], namespace=total['namespace'],
+                                 check=total['check'],
+                                 transport=total['transport'], operation=total['operation'],
+                                 kind=total['kind'])
+                value = total[field]
+                lines.append(f"{name}{labels} {value:.6f}" if isinstance(value, float)
+                             else f"{name}{labels} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Write a textfile atomically so node_exporter never reads a partial file"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.prom.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+def _labels(**labels) -> str:
+    parts = []
+    for key, value in labels.items():
+        if value is None:
+            continue
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+@contextmanager
+def measure_call(instrumentation: Optional[Instrumentation], transport: str,
+                 operation: str, kind: str) -> Iterator[CallRecord]:
+    """
+    Record one transport call.
+
+    The caller fills in transport time, bytes, parse time, retries and the
+    timeout flag; wall time is measured here unless the caller set it (as
+    streamed lists do, to exclude time the consumer spends between items).
+    """
+    if instrumentation is not None:
+        record = instrumentation.new_call(transport, operation, kind)
+    else:
+        record = CallRecord(transport, operation, kind)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            record.success = False
+        raise
+    finally:
+        if record.wall_time is None:
+            record.wall_time = time.perf_counter() - start
+        if instrumentation is not None:
+            instrumentation.add_call(record)
+
+
+def timed_read(read: Callable[[int], bytes], record: CallRecord) -> Callable[[int], bytes]:
+    """Wrap a read function so its time and byte count go to the record"""
+    def read_chunk(size: int) -> bytes:
+        start = time.perf_counter()
+        chunk = read(size)
+        record.transport_time += time.perf_counter() - start
+        record.bytes += len(chunk)
+        return chunk
+    return read_chunk
+
+
+def timed_items(items: Iterator, record: CallRecord) -> Iterator:
+    """
+    Yield from an incremental parser, splitting the time spent inside it into
+    transport time (reads, via timed_read) and parse time (everything else)
+    """
+    record.wall_time = record.wall_time or 0.0
+    while True:
+        transport_before = record.transport_time
+        start = time.perf_counter()
+        try:
+            item = next(items)
+        except StopIteration:
+            item = StopIteration
+        elapsed = time.perf_counter() - start
+        record.wall_time += elapsed
+        record.parse_time += elapsed - (record.transport_time - transport_before)
+        if item is StopIteration:
+            return
+        yield item
+
+
+def timed_run(runner: Callable[[str], Tuple[bool, str]], command: str,
+              record: CallRecord) -> Tuple[bool, str]:
+    """Run a kubectl command through runner, recording its time, output size and timeout"""
+    start = time.perf_counter()
+    success, output = runner(command)
+    record.transport_time += time.perf_counter() - start
+    record.bytes += len(output or '')
+    if not success:
+        record.success = False
+        record.timeout = output == "Command timed out"
+    return success, output
+
+
+def timed_json(body: Union[bytes, str], record: CallRecord):
+    """json.loads, with the time spent going to the record's parse time"""
+    start = time.perf_counter()
+    try:
+        return json.loads(body)
+    finally:
+        record.parse_time += time.perf_counter() - start
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Session Prefetch for the pytest Suites
+Fetches every resource list the integration tests read concurrently at
+session start, so the tests themselves only do in-memory lookups. Under
+pytest-xdist the first worker writes the lists to a file the others load,
+so the cluster is read once per run however many workers there are.
+"""
+
+import fcntl
+import json
+import os
+from typing import Iterable, Optional
+
+import pytest
+
+from kubectl_restarts import RESTART_FIELDS
+from kubectl_snapshot import ClusterSnapshot, Query
+
+# Object fields the integration tests read; every query below is fetched
+# once and narrower projections are served from it
+NAMESPACE_FIELDS = ('metadata.name',)
+POD_FIELDS = ('metadata.labels', 'status.phase') + RESTART_FIELDS
+DEPLOYMENT_FIELDS = ('metadata.name', 'spec.replicas', 'status.readyReplicas')
+ENDPOINT_FIELDS = ('metadata.name', 'subsets[].addresses')
+PVC_FIELDS = ('metadata.name', 'status.phase')
+
+
+def integration_queries(namespace: str) -> list:
+    """Every list the integration tests read"""
+    return [
+        ('namespace', None, f"metadata.name={namespace}", NAMESPACE_FIELDS),
+        ('pods', None, None, POD_FIELDS),
+        ('deployment', None, None, DEPLOYMENT_FIELDS),
+        ('endpoints', None, None, ENDPOINT_FIELDS),
+        ('pvc', None, None, PVC_FIELDS),
+    ]
+
+
+def shared_snapshot(namespace: str, transport, queries: Iterable[Query],
+                    cache_path: Optional[str] = None, workers: int = 8) -> ClusterSnapshot:
+    """
+    A snapshot holding every query's list.
+
+    With cache_path, the first process to take the file lock fetches and
+    writes the lists; every later one loads them without touching the
+    cluster. The caller picks a path unique to the test run.
+    """
+    snapshot = ClusterSnapshot(namespace, transport=transport)
+    if cache_path is None:
+        snapshot.prefetch(queries, workers)
+        return snapshot
+
+    with open(cache_path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                snapshot.load(json.load(f))
+        else:
+            snapshot.prefetch(queries, workers)
+            with open(cache_path, 'w') as f:
+                json.dump(snapshot.dump(), f)
+    return snapshot
+
+
+@pytest.fixture(scope="session")
+def kube_namespace(request):
+    return request.config.getoption('--namespace')
+
+
+@pytest.fixture(scope="session")
+def cluster_snapshot(kube_namespace, kube_transport, tmp_path_factory):
+    """Snapshot of the namespace, fetched once per test run"""
+    cache_path = None
+    if os.environ.get('PYTEST_XDIST_WORKER'):
+        # Every xdist worker's basetemp is a directory of the run's shared one
+        shared = tmp_path_factory.getbasetemp().parent
+        cache_path = str(shared / f"kubectl-snapshot-{kube_namespace}.json")
+    return shared_snapshot(kube_namespace, kube_transport,
+                           integration_queries(kube_namespace), cache_path)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Field Projection
+Checks declare the object fields they read as dotted paths; transports use
+the declaration to ask the API server for less and to keep only those
+fields once an object has been parsed
+
+Paths follow the object structure, with "[]" marking a list whose elements
+are projected individually:
+
+    metadata.name
+    status.containerStatuses[].ready
+    spec.rules[].http.paths[].backend.service.name
+
+A path that stops at a mapping or list keeps that whole subtree.
+"""
+
+from typing import Dict, Optional, Sequence
+
+# Asks the API server for metadata-only objects instead of full specs
+PARTIAL_METADATA_ACCEPT = (
+    'application/json;as=PartialObjectMetadataList;v=v1;g=meta.k8s.io,application/json'
+)
+
+Fields = Optional[Sequence[str]]
+
+
+def metadata_only(fields: Fields) -> bool:
+    """True if every field can be served by PartialObjectMetadata"""
+    return bool(fields) and all(f == 'metadata' or f.startswith('metadata.') for f in fields)
+
+
+def covers(wider: Fields, fields: Fields) -> bool:
+    """True if projecting to `wider` keeps everything `fields` reads"""
+    if not wider:
+        return True
+    if not fields:
+        return False
+    return all(any(f == w or f.startswith(w + '.') or f.startswith(w + '[]') for w in wider)
+               for f in fields)
+
+
+def merge_fields(first: Fields, second: Fields) -> Fields:
+    """Fields covering both projections; None (whole objects) wins"""
+    if not first or not second:
+        return None
+    return tuple(sorted(set(first) | set(second)))
+
+
+def _copy(source, target: Dict, parts: Sequence[str]):
+    key = parts[0]
+    is_list = key.endswith('[]')
+    if is_list:
+        key = key[:-2]
+    if not isinstance(source, dict) or key not in source:
+        return
+
+    value = source[key]
+    if len(parts) == 1:
+        target[key] = value
+    elif is_list:
+        if not isinstance(value, list):
+            return
+        projected = target.setdefault(key, [{} for _ in value])
+        for element, projected_element in zip(value, projected):
+            _copy(element, projected_element, parts[1:])
+    elif isinstance(value, dict):
+        _copy(value, target.setdefault(key, {}), parts[1:])
+
+
+def project(item: Dict, fields: Fields) -> Dict:
+    """Return a copy of item holding only the declared fields"""
+    if not fields:
+        return item
+    result = {}
+    for field in fields:
+        _copy(item, result, field.split('.'))
+    return result
+
+
+def project_list(data: Optional[Dict], fields: Fields) -> Optional[Dict]:
+    """Project every item of a parsed list response in place"""
+    if data is not None and fields:
+        data['items'] = [project(item, fields) for item in data.get('items') or []]
+    return data
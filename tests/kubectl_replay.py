@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Record and Replay
+Captures every response a run reads from the cluster into one compressed
+archive, and serves that archive back as a transport so checks and the
+integration suite can run offline and deterministically
+
+The archive is a zip file:
+
+    index.json              what was recorded, keyed by entry name
+    calls/<key>.json        a list or get response (null if it failed)
+    calls/<key>.ndjson      a streamed list, one item per line
+    commands/<key>.json     output of a raw kubectl command (e.g. kubectl top)
+
+Replay reads only the index up front; each entry is decompressed when a
+check first asks for it, and streamed lists are read line by line.
+"""
+
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+import threading
+import zipfile
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from kubectl_query import Fields, project, project_list
+from kubectl_transport import DEFAULT_PAGE_SIZE, TransportError
+
+ARCHIVE_VERSION = 1
+
+# Streamed lists larger than this are spooled to disk while recording
+SPOOL_SIZE = 8 * 1024 * 1024
+
+
+def call_key(operation: str, kind: str, namespace: Optional[str] = None,
+             name: Optional[str] = None, selector: Optional[str] = None,
+             field_selector: Optional[str] = None, fields: Fields = None) -> Tuple[str, Dict]:
+    """Return a stable entry name for a call, and the call's parameters"""
+    params = {
+        'operation': operation,
+        'kind': kind,
+        'namespace': namespace,
+        'name': name,
+        'selector': selector,
+        'field_selector': field_selector,
+        'fields': list(fields) if fields else None,
+    }
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:20]
+    return digest, params
+
+
+def command_key(command: str) -> str:
+    return hashlib.sha1(command.encode()).hexdigest()[:20]
+
+
+class RecordingTransport:
+    """Wraps a live transport and writes every response it returns to an archive"""
+
+    def __init__(self, inner, path: str, metadata: Optional[Dict] = None):
+        self.inner = inner
+        self.name = inner.name
+        self.path = path
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._lock = threading.Lock()
+        self._index = {
+            'version': ARCHIVE_VERSION,
+            'recorded_at': datetime.now().isoformat(),
+            'metadata': metadata or {},
+            'calls': {},
+            'commands': {},
+        }
+
+    @property
+    def instrumentation(self):
+        return getattr(self.inner, 'instrumentation', None)
+
+    @instrumentation.setter
+    def instrumentation(self, value):
+        self.inner.instrumentation = value
+
+    def _write(self, section: str, key: str, entry: str, params: Dict, data: bytes):
+        with self._lock:
+            # Repeated calls (e.g. after a cache expiry) keep the first response
+            if key in self._index[section]:
+                return
+            self._index[section][key] = dict(params, entry=entry)
+            self._zip.writestr(entry, data)
+
+    def list(self, kind: str, namespace: Optional[str] = None,
+             selector: Optional[str] = None,
+             field_selector: Optional[str] = None,
+             fields: Fields = None) -> Optional[Dict]:
+        """Return the parsed list for a resource kind, or None on failure"""
+        data = self.inner.list(kind, namespace, selector, field_selector, fields=fields)
+        key, params = call_key('list', kind, namespace, selector=selector,
+                               field_selector=field_selector, fields=fields)
+        self._write('calls', key, f"calls/{key}.json", params, json.dumps(data).encode())
+        return data
+
+    def get(self, kind: str, name: str,
+            namespace: Optional[str] = None) -> Optional[Dict]:
+        """Return a single object, or None if it does not exist"""
+        data = self.inner.get(kind, name, namespace)
+        key, params = call_key('get', kind, namespace, name=name)
+        self._write('calls', key, f"calls/{key}.json", params, json.dumps(data).encode())
+        return data
+
+    def iter_items(self, kind: str, namespace: Optional[str] = None,
+                   selector: Optional[str] = None,
+                   field_selector: Optional[str] = None,
+                   limit: int = DEFAULT_PAGE_SIZE,
+                   fields: Fields = None,
+                   metadata: Optional[Dict] = None) -> Iterator[Dict]:
+        """Yield items from the live transport, spooling each one to the archive"""
+        key, params = call_key('iter_items', kind, namespace, selector=selector,
+                               field_selector=field_selector, fields=fields)
+        list_metadata = {}
+        items = self.inner.iter_items(kind, namespace, selector, field_selector,
+                                      limit=limit, fields=fields, metadata=list_metadata)
+        error = None
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as spool:
+            try:
+                for item in items:
+                    spool.write(json.dumps(item).encode() + b'\n')
+                    yield item
+            except Exception as e:
+                error = str(e)
+                raise
+            except GeneratorExit:
+                # The consumer stopped early; read the rest so replay has the whole list
+                for item in items:
+                    spool.write(json.dumps(item).encode() + b'\n')
+                raise
+            finally:
+                if error is not None:
+                    params['error'] = error
+                if list_metadata:
+                    params['metadata'] = list_metadata
+                    if metadata is not None:
+                        metadata.update(list_metadata)
+                spool.seek(0)
+                self._write_stream(key, params, spool)
+
+    def _write_stream(self, key: str, params: Dict, spool):
+        entry = f"calls/{key}.ndjson"
+        with self._lock:
+            if key in self._index['calls']:
+                return
+            self._index['calls'][key] = dict(params, entry=entry)
+            with self._zip.open(entry, 'w') as f:
+                shutil.copyfileobj(spool, f)
+
+    def watch(self, *args, **kwargs) -> Iterator[Dict]:
+        """Watch streams pass through unrecorded"""
+        return self.inner.watch(*args, **kwargs)
+
+    def logs(self, *args, **kwargs) -> Iterator[str]:
+        """Log streams pass through unrecorded"""
+        return self.inner.logs(*args, **kwargs)
+
+    def record_runner(self, runner: Callable[[str], Tuple]) -> Callable[[str], Tuple]:
+        """Wrap a kubectl command runner so its results are recorded too"""
+        def run(command: str) -> Tuple:
+            result = runner(command)
+            key = command_key(command)
+            self._write('commands', key, f"commands/{key}.json", {'command': command},
+                        json.dumps(list(result)).encode())
+            return result
+        return run
+
+    def close(self):
+        """Write the index and finish the archive"""
+        with self._lock:
+            if self._zip.fp is not None:
+                self._zip.writestr('index.json', json.dumps(self._index, indent=2))
+                self._zip.close()
+        self.inner.close()
+
+
+class ReplayTransport:
+    """Serves a recorded archive with the same interface as the live transports"""
+
+    name = 'replay'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.instrumentation = None
+        self._zip = zipfile.ZipFile(path)
+        self.index = json.loads(self._zip.read('index.json'))
+        if self.index.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported replay archive version in {path}")
+        # Calls a run made that the archive has no response for
+        self.misses = []
+
+    @property
+    def metadata(self) -> Dict:
+        return self.index.get('metadata', {})
+
+    def _entry(self, operation: str, kind: str, fields: Fields = None, **params) -> Optional[Dict]:
+        key, _ = call_key(operation, kind, fields=fields, **params)
+        entry = self.index['calls'].get(key)
+        if entry is None and fields:
+            # The recording run may have fetched the full objects instead
+            key, _ = call_key(operation, kind, **params)
+            entry = self.index['calls'].get(key)
+        if entry is None:
+            self.misses.append(call_key(operation, kind, fields=fields, **params)[1])
+        return entry
+
+    def list(self, kind: str, namespace: Optional[str] = None,
+             selector: Optional[str] = None,
+             field_selector: Optional[str] = None,
+             fields: Fields = None) -> Optional[Dict]:
+        """Return the recorded list for a resource kind, or None if none was recorded"""
+        entry = self._entry('list', kind, fields, namespace=namespace, selector=selector,
+                            field_selector=field_selector)
+        if entry is None:
+            return None
+        return project_list(json.loads(self._zip.read(entry['entry'])), fields)
+
+    def get(self, kind: str, name: str,
+            namespace: Optional[str] = None) -> Optional[Dict]:
+        """Return a recorded object, or None if none was recorded"""
+        entry = self._entry('get', kind, namespace=namespace, name=name)
+        if entry is None:
+            return None
+        return json.loads(self._zip.read(entry['entry']))
+
+    def iter_items(self, kind: str, namespace: Optional[str] = None,
+                   selector: Optional[str] = None,
+                   field_selector: Optional[str] = None,
+                   limit: int = DEFAULT_PAGE_SIZE,
+                   fields: Fields = None,
+                   metadata: Optional[Dict] = None) -> Iterator[Dict]:
+        """Yield recorded items one line at a time"""
+        entry = self._entry('iter_items', kind, fields, namespace=namespace,
+                            selector=selector, field_selector=field_selector)
+        if entry is None:
+            raise TransportError(f"Cannot list {kind}: not in replay archive")
+        with self._zip.open(entry['entry']) as f:
+            for line in io.TextIOWrapper(f, encoding='utf-8'):
+                yield project(json.loads(line), fields)
+        if metadata is not None:
+            metadata.update(entry.get('metadata') or {})
+        if entry.get('error'):
+            raise TransportError(entry['error'])
+
+    def watch(self, kind: str, *args, **kwargs) -> Iterator[Dict]:
+        raise TransportError(f"Cannot watch {kind}: watch streams are not recorded")
+
+    def logs(self, pod: str, *args, **kwargs) -> Iterator[str]:
+        raise TransportError(f"Cannot read logs of {pod}: logs are not recorded")
+
+    def run_command(self, command: str) -> Tuple:
+        """Return a recorded kubectl command result"""
+        entry = self.index['commands'].get(command_key(command))
+        if entry is None:
+            self.misses.append({'command': command})
+            return False, "Command not in replay archive"
+        return tuple(json.loads(self._zip.read(entry['entry'])))
+
+    def close(self):
+        self._zip.close()
+
+
+def wrap_runner(transport, runner: Callable[[str], Tuple]) -> Callable[[str], Tuple]:
+    """Route a kubectl command runner through a recording or replaying transport"""
+    if isinstance(transport, ReplayTransport):
+        return transport.run_command
+    if isinstance(transport, RecordingTransport):
+        return transport.record_runner(runner)
+    return runner
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Show what a replay archive contains')
+    parser.add_argument('archive', help='Archive written with --record')
+    args = parser.parse_args()
+
+    replay = ReplayTransport(args.archive)
+    print(f"Recorded: {replay.index['recorded_at']}")
+    for key, value in replay.metadata.items():
+        print(f"{key}: {value}")
+    for entry in replay.index['calls'].values():
+        print(f"  {entry['operation']:<11} {entry['kind']:<12} "
+              f"{entry.get('name') or entry.get('selector') or entry.get('field_selector') or ''}")
+    for entry in replay.index['commands'].values():
+        print(f"  command     {entry['command']}")
+    replay.close()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Resource Usage Engine
+Loads pod and node metrics from the metrics API into column arrays with
+Kubernetes quantities normalized (CPU to millicores, memory to bytes), and
+evaluates usage against container limits and node allocatable
+"""
+
+import heapq
+import re
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Usage at or above this fraction of a pod's limit is reported
+POD_LIMIT_THRESHOLD = 0.9
+# Usage at or above this fraction of a node's allocatable is reported
+NODE_ALLOCATABLE_THRESHOLD = 0.85
+TOP_N = 10
+
+_QUANTITY = re.compile(r'^([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)([a-zA-Z]*)$')
+
+# Suffix -> multiplier, per the Kubernetes quantity format
+_SUFFIXES = {
+    'n': 1e-9, 'u': 1e-6, 'm': 1e-3, '': 1.0,
+    'k': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12, 'P': 1e15, 'E': 1e18,
+    'Ki': 2.0 ** 10, 'Mi': 2.0 ** 20, 'Gi': 2.0 ** 30,
+    'Ti': 2.0 ** 40, 'Pi': 2.0 ** 50, 'Ei': 2.0 ** 60,
+}
+
+
+def parse_quantity(value: Union[str, int, float, None]) -> float:
+    """Parse a Kubernetes quantity ("250m", "1.5Gi", "2") into its base unit"""
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    return _parse_quantity_text(value)
+
+
+# Limits and requests repeat across pods ("2", "2Gi"), so parsed text is cached
+@lru_cache(maxsize=4096)
+def _parse_quantity_text(value: str) -> float:
+    match = _QUANTITY.match(value.strip())
+    if not match or match.group(2) not in _SUFFIXES:
+        raise ValueError(f"Invalid quantity: {value!r}")
+    return float(match.group(1)) * _SUFFIXES[match.group(2)]
+
+
+def parse_cpu(value: Union[str, int, float, None]) -> float:
+    """CPU quantity in millicores"""
+    return parse_quantity(value) * 1000
+
+
+def parse_memory(value: Union[str, int, float, None]) -> float:
+    """Memory quantity in bytes"""
+    return parse_quantity(value)
+
+
+def format_cpu(millicores: float) -> str:
+    return f"{millicores:.0f}m"
+
+
+def format_memory(size: float) -> str:
+    for unit, scale in (('Gi', 2 ** 30), ('Mi', 2 ** 20), ('Ki', 2 ** 10)):
+        if size >= scale:
+            return f"{size / scale:.0f}{unit}"
+    return f"{size:.0f}"
+
+
+def _ratio(usage: array, capacity: array) -> List[float]:
+    """Element-wise usage/capacity; 0 where there is no capacity to compare with"""
+    return [u / c if c > 0 else 0.0 for u, c in zip(usage, capacity)]
+
+
+class PodUsage:
+    """Pod metrics as parallel columns, one row per pod"""
+
+    __slots__ = ('names', 'nodes', 'cpu', 'memory', 'cpu_limit', 'memory_limit')
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.nodes: List[Optional[str]] = []
+        self.cpu = array('d')
+        self.memory = array('d')
+        # 0 when any container of the pod is unlimited
+        self.cpu_limit = array('d')
+        self.memory_limit = array('d')
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def limits_of(pod: Dict) -> Tuple[Optional[str], float, float]:
+        """(node, cpu limit, memory limit) of a pod; a limit is 0 if any container has none"""
+        spec = pod.get('spec') or {}
+        container_limits = [(c.get('resources') or {}).get('limits') or {}
+                            for c in spec.get('containers') or []]
+        return (
+            spec.get('nodeName'),
+            sum(parse_cpu(l['cpu']) for l in container_limits)
+            if container_limits and all('cpu' in l for l in container_limits) else 0.0,
+            sum(parse_memory(l['memory']) for l in container_limits)
+            if container_limits and all('memory' in l for l in container_limits) else 0.0,
+        )
+
+    @classmethod
+    def from_metrics(cls, metrics: Iterable[Dict], pods: Iterable[Dict] = (),
+                     limits: Optional[Dict[str, Tuple]] = None) -> 'PodUsage':
+        """
+        Build from PodMetrics items, joined by name with pods for limits and nodes.
+
+        Both inputs may be streams; pods are reduced to (node, cpu limit,
+        memory limit) as they pass, so only numbers are held per pod. Limits
+        already reduced by limits_of() can be given instead of pods.
+        """
+        if limits is None:
+            limits = {pod['metadata']['name']: cls.limits_of(pod) for pod in pods}
+
+        table = cls()
+        for item in metrics:
+            name = item['metadata']['name']
+            containers = item.get('containers') or []
+            node, cpu_limit, memory_limit = limits.get(name, (None, 0.0, 0.0))
+            table.names.append(name)
+            table.nodes.append(node)
+            table.cpu.append(sum(parse_cpu(c.get('usage', {}).get('cpu')) for c in containers))
+            table.memory.append(sum(parse_memory(c.get('usage', {}).get('memory'))
+                                    for c in containers))
+            table.cpu_limit.append(cpu_limit)
+            table.memory_limit.append(memory_limit)
+        return table
+
+    def top(self, n: int = TOP_N, column: str = 'cpu') -> List[int]:
+        """Row indices of the n largest values of a column, largest first"""
+        values = getattr(self, column)
+        return heapq.nlargest(n, range(len(values)), key=values.__getitem__)
+
+    def near_limit(self, column: str, threshold: float = POD_LIMIT_THRESHOLD) -> List[int]:
+        """Rows using at least threshold of their limit for cpu or memory"""
+        ratios = _ratio(getattr(self, column), getattr(self, f"{column}_limit"))
+        return [i for i, ratio in enumerate(ratios) if ratio >= threshold]
+
+
+class NodeUsage:
+    """Node metrics as parallel columns, one row per node"""
+
+    __slots__ = ('names', 'cpu', 'memory', 'cpu_allocatable', 'memory_allocatable')
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.cpu = array('d')
+        self.memory = array('d')
+        self.cpu_allocatable = array('d')
+        self.memory_allocatable = array('d')
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_metrics(cls, metrics: Iterable[Dict], nodes: Iterable[Dict] = ()) -> 'NodeUsage':
+        """Build from NodeMetrics items, joined by name with nodes for allocatable"""
+        allocatable = {node['metadata']['name']: (node.get('status') or {}).get('allocatable') or {}
+                       for node in nodes}
+        table = cls()
+        for item in metrics:
+            name = item['metadata']['name']
+            usage = item.get('usage') or {}
+            table.names.append(name)
+            table.cpu.append(parse_cpu(usage.get('cpu')))
+            table.memory.append(parse_memory(usage.get('memory')))
+            capacity = allocatable.get(name, {})
+            table.cpu_allocatable.append(parse_cpu(capacity.get('cpu')))
+            table.memory_allocatable.append(parse_memory(capacity.get('memory')))
+        return table
+
+    def over_allocatable(self, column: str,
+                         threshold: float = NODE_ALLOCATABLE_THRESHOLD) -> List[int]:
+        """Rows using at least threshold of their allocatable cpu or memory"""
+        ratios = _ratio(getattr(self, column), getattr(self, f"{column}_allocatable"))
+        return [i for i, ratio in enumerate(ratios) if ratio >= threshold]
+
+
+def evaluate(pods: PodUsage, nodes: NodeUsage,
+             pod_threshold: float = POD_LIMIT_THRESHOLD,
+             node_threshold: float = NODE_ALLOCATABLE_THRESHOLD,
+             top_n: int = TOP_N) -> Dict:
+    """Threshold findings and top consumers; the check passes if no findings"""
+    def pod_rows(rows, column):
+        usage, limit = getattr(pods, column), getattr(pods, f"{column}_limit")
+        fmt = format_cpu if column == 'cpu' else format_memory
+        return [{'pod': pods.names[i], 'node': pods.nodes[i], 'usage': fmt(usage[i]),
+                 'limit': fmt(limit[i]), 'percent': round(100 * usage[i] / limit[i], 1)}
+                for i in rows]
+
+    def node_rows(rows, column):
+        usage, capacity = getattr(nodes, column), getattr(nodes, f"{column}_allocatable")
+        fmt = format_cpu if column == 'cpu' else format_memory
+        return [{'node': nodes.names[i], 'usage': fmt(usage[i]), 'allocatable': fmt(capacity[i]),
+                 'percent': round(100 * usage[i] / capacity[i], 1)}
+                for i in rows]
+
+    return {
+        'pods': len(pods),
+        'nodes': len(nodes),
+        'pods_near_cpu_limit': pod_rows(pods.near_limit('cpu', pod_threshold), 'cpu'),
+        'pods_near_memory_limit': pod_rows(pods.near_limit('memory', pod_threshold), 'memory'),
+        'nodes_cpu_pressure': node_rows(nodes.over_allocatable('cpu', node_threshold), 'cpu'),
+        'nodes_memory_pressure': node_rows(nodes.over_allocatable('memory', node_threshold),
+                                           'memory'),
+        'top_cpu': [{'pod': pods.names[i], 'cpu': format_cpu(pods.cpu[i]),
+                     'memory': format_memory(pods.memory[i])} for i in pods.top(top_n, 'cpu')],
+        'top_memory': [{'pod': pods.names[i], 'cpu': format_cpu(pods.cpu[i]),
+                        'memory': format_memory(pods.memory[i])}
+                       for i in pods.top(top_n, 'memory')],
+    }
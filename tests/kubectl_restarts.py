@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Container Restart History
+Keeps a compact time series of restart counts per (pod, container) across
+runs and reports containers restarting too often within a time window,
+rather than those whose lifetime restart count has grown large
+"""
+
+import time
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+
+from kubectl_events import parse_timestamp
+from kubectl_state import read_state, write_state
+
+# Object fields the restart history reads
+RESTART_FIELDS = ('metadata.name', 'status.startTime', 'status.containerStatuses[].name',
+                  'status.containerStatuses[].restartCount')
+
+# Alert on this many restarts within RESTART_WINDOW seconds
+RESTART_THRESHOLD = 3
+RESTART_WINDOW = 3600
+# Samples kept per container beyond the window's baseline
+MAX_SAMPLES = 64
+STATE_VERSION = 1
+
+
+class RestartSeries:
+    """
+    Restart counts of one container as (time, count) samples.
+
+    A sample is added only when the count changes, preceded by the last
+    observation of the old count, so the restart is known to lie between
+    the two. Counts in a series never decrease: a lower count means the
+    container was recreated, and the series starts over.
+    """
+
+    __slots__ = ('times', 'counts', 'observed')
+
+    def __init__(self, times: List[float], counts: List[int], observed: float):
+        self.times = times
+        self.counts = counts
+        self.observed = observed
+
+    @classmethod
+    def start(cls, count: int, now: float, started: Optional[float] = None) -> 'RestartSeries':
+        """First sighting; the pod's start time makes its restarts since then count"""
+        if started is not None and started < now:
+            return cls([started, now], [0, count], now)
+        return cls([now], [count], now)
+
+    def observe(self, count: int, now: float):
+        if count == self.counts[-1]:
+            self.observed = now
+            return
+        if self.observed > self.times[-1]:
+            self.times.append(self.observed)
+            self.counts.append(self.counts[-1])
+        self.times.append(now)
+        self.counts.append(count)
+        self.observed = now
+
+    def count_at(self, when: float) -> float:
+        """Count at a past time, interpolated between the samples around it"""
+        i = bisect_right(self.times, when)
+        if i == 0:
+            return self.counts[0]
+        if i == len(self.times):
+            return self.counts[-1]
+        t0, t1 = self.times[i - 1], self.times[i]
+        c0, c1 = self.counts[i - 1], self.counts[i]
+        return c0 + (c1 - c0) * (when - t0) / (t1 - t0)
+
+    def restarts_since(self, when: float) -> float:
+        return self.counts[-1] - self.count_at(when)
+
+    def prune(self, before: float, max_samples: int = MAX_SAMPLES):
+        """Drop samples older than the one at or before `before`"""
+        keep = max(bisect_right(self.times, before) - 1, 0, len(self.times) - max_samples)
+        if keep:
+            del self.times[:keep]
+            del self.counts[:keep]
+
+
+class RestartHistory:
+    """
+    Restart series keyed by pod name, then container name.
+
+    observe() takes the namespace's full pod list: series of pods missing
+    from it are dropped, so the history only ever covers live pods. With a
+    path the history is loaded from and saved to disk.
+    """
+
+    def __init__(self, path: Optional[str] = None, window: float = RESTART_WINDOW,
+                 threshold: int = RESTART_THRESHOLD):
+        self.path = path
+        self.window = window
+        self.threshold = threshold
+        self.series: Dict[str, Dict[str, RestartSeries]] = {}
+        self.load()
+
+    def load(self):
+        state = read_state(self.path, STATE_VERSION)
+        if state is None:
+            return
+        # Each container is [observed, t0, c0, t1, c1, ...]
+        self.series = {
+            pod: {name: RestartSeries(flat[1::2], flat[2::2], flat[0])
+                  for name, flat in containers.items()}
+            for pod, containers in state['pods'].items()
+        }
+
+    def save(self):
+        if not self.path:
+            return
+        write_state(self.path, {'version': STATE_VERSION, 'pods': {
+            pod: {name: [round(s.observed)] + [v for t, count in zip(s.times, s.counts)
+                                               for v in (round(t), count)]
+                  for name, s in containers.items()}
+            for pod, containers in self.series.items()
+        }})
+
+    def observe(self, pods: Iterable[Dict], now: Optional[float] = None):
+        """Record the current restart counts of every pod in the namespace"""
+        now = now if now is not None else time.time()
+        current = {}
+        for pod in pods:
+            name = pod['metadata']['name']
+            status = pod.get('status') or {}
+            known = self.series.get(name, {})
+            containers = current[name] = {}
+            for container in status.get('containerStatuses') or []:
+                count = container.get('restartCount', 0)
+                series = known.get(container['name'])
+                if series is None or count < series.counts[-1]:
+                    series = RestartSeries.start(count, now,
+                                                 parse_timestamp(status.get('startTime')))
+                else:
+                    series.observe(count, now)
+                series.prune(now - self.window)
+                containers[container['name']] = series
+        # Pods missing from the list no longer exist
+        self.series = current
+
+    def restart_rate(self, pod: str, container: str, now: Optional[float] = None) -> float:
+        """Restarts of one container within the window ending now"""
+        series = self.series[pod][container]
+        return series.restarts_since((now if now is not None else time.time()) - self.window)
+
+    def alerts(self, now: Optional[float] = None) -> List[Dict]:
+        """Containers with at least threshold restarts within the window"""
+        now = now if now is not None else time.time()
+        found = []
+        for pod, containers in self.series.items():
+            for name, series in containers.items():
+                restarts = series.restarts_since(now - self.window)
+                if restarts >= self.threshold:
+                    found.append({'pod': pod, 'container': name,
+                                  'restarts_in_window': round(restarts, 1),
+                                  'restarts': series.counts[-1]})
+        return found
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Check Results and Report Writers
+A compact result model the checks fill in directly, and writers that
+stream it to JSON, JUnit XML and HTML in a single pass
+"""
+
+import html
+import json
+import time
+from datetime import datetime
+from typing import Dict, IO, Iterable, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+
+class CheckResult:
+    """Outcome of one health check"""
+
+    __slots__ = ('test', 'passed', 'details', 'duration')
+
+    def __init__(self, test: str, passed: bool, details: Optional[Dict] = None,
+                 duration: Optional[float] = None):
+        self.test = test
+        self.passed = passed
+        self.details = details if details is not None else {}
+        self.duration = duration
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CheckResult):
+            return NotImplemented
+        # Durations differ between otherwise identical runs
+        return (self.test, self.passed, self.details) == (other.test, other.passed, other.details)
+
+    def __repr__(self) -> str:
+        return f"CheckResult({self.test!r}, passed={self.passed})"
+
+    def to_dict(self) -> Dict:
+        return {'test': self.test, 'passed': self.passed,
+                'duration': self.duration, 'details': self.details}
+
+
+class RunReport:
+    """All check results of one run against one namespace"""
+
+    __slots__ = ('namespace', 'context', 'started', 'finished', 'results', 'error')
+
+    def __init__(self, namespace: str, context: Optional[str] = None):
+        self.namespace = namespace
+        self.context = context
+        self.started = None
+        self.finished = None
+        self.results: List[CheckResult] = []
+        # Set when the run could not complete at all (e.g. unreachable cluster)
+        self.error = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.context}/{self.namespace}" if self.context else self.namespace
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for r in self.results if not r.passed)
+
+    @property
+    def passed(self) -> bool:
+        return self.error is None and self.failed == 0
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def start(self):
+        self.started = time.time()
+
+    def finish(self):
+        self.finished = time.time()
+
+
+def _timestamp(epoch: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(epoch).isoformat() if epoch is not None else None
+
+
+def _summary(details: Dict) -> str:
+    """One line naming whatever a failed check found wrong"""
+    for key, value in details.items():
+        if isinstance(value, list) and value:
+            shown = ', '.join(str(v) for v in value[:5])
+            more = f" (+{len(value) - 5} more)" if len(value) > 5 else ''
+            return f"{key}: {shown}{more}"
+    return json.dumps(details, default=str)[:200]
+
+
+class ReportWriter:
+    """
+    Base class for streaming writers.
+
+    write_reports() calls begin() once, then begin_run(), write_result()
+    per result and end_run() for each run, then end(). Output goes straight
+    to the stream, so nothing but the current result is formatted at once.
+    """
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def begin(self, runs: List[RunReport]):
+        pass
+
+    def begin_run(self, run: RunReport):
+        pass
+
+    def write_result(self, run: RunReport, result: CheckResult):
+        pass
+
+    def end_run(self, run: RunReport):
+        pass
+
+    def end(self):
+        pass
+
+
+class JsonReportWriter(ReportWriter):
+    """{"timestamp": ..., "runs": [{..., "results": [...]}]}"""
+
+    def begin(self, runs: List[RunReport]):
+        self.stream.write('{"timestamp": %s, "runs": [' % json.dumps(datetime.now().isoformat()))
+        self._first_run = True
+
+    def begin_run(self, run: RunReport):
+        header = {
+            'namespace': run.namespace,
+            'context': run.context,
+            'started': _timestamp(run.started),
+            'finished': _timestamp(run.finished),
+            'passed': run.passed,
+            'error': run.error,
+        }
+        self.stream.write(('' if self._first_run else ',') + '\n  ')
+        self.stream.write(json.dumps(header)[:-1] + ', "results": [')
+        self._first_run = False
+        self._first_result = True
+
+    def write_result(self, run: RunReport, result: CheckResult):
+        self.stream.write(('' if self._first_result else ',') + '\n    ')
+        self.stream.write(json.dumps(result.to_dict(), default=str))
+        self._first_result = False
+
+    def end_run(self, run: RunReport):
+        self.stream.write(']}')
+
+    def end(self):
+        self.stream.write('\n]}\n')
+
+
+class JUnitReportWriter(ReportWriter):
+    """One <testsuite> per run and one <testcase> per check"""
+
+    def begin(self, runs: List[RunReport]):
+        tests = sum(len(run.results) for run in runs)
+        failures = sum(run.failed for run in runs)
+        errors = sum(1 for run in runs if run.error)
+        self.stream.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.stream.write(f'<testsuites name="sas-viya-kubectl" tests="{tests}" '
+                          f'failures="{failures}" errors="{errors}">\n')
+
+    def begin_run(self, run: RunReport):
+        self.stream.write(
+            f'  <testsuite name={quoteattr(run.label)} tests="{len(run.results)}" '
+            f'failures="{run.failed}" errors="{int(run.error is not None)}" '
+            f'time="{run.duration or 0:.3f}" timestamp={quoteattr(_timestamp(run.started) or "")}>\n')
+        if run.error:
+            self.stream.write(f'    <testcase classname={quoteattr(run.label)} name="run">'
+                              f'<error message={quoteattr(run.error)}/></testcase>\n')
+
+    def write_result(self, run: RunReport, result: CheckResult):
+        self.stream.write(f'    <testcase classname={quoteattr(run.label)} '
+                          f'name={quoteattr(result.test)} time="{result.duration or 0:.3f}">')
+        if not result.passed:
+            self.stream.write(f'\n      <failure message={quoteattr(_summary(result.details))}/>')
+        details = json.dumps(result.details, indent=2, default=str)
+        self.stream.write(f'\n      <system-out>{escape(details)}</system-out>\n    </testcase>\n')
+
+    def end_run(self, run: RunReport):
+        self.stream.write('  </testsuite>\n')
+
+    def end(self):
+        self.stream.write('</testsuites>\n')
+
+
+class HtmlReportWriter(ReportWriter):
+    """Self-contained HTML page with one table per run"""
+
+    def begin(self, runs: List[RunReport]):
+        self.stream.write(f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>SAS Viya kubectl Test Report</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; }}
+        .pass {{ color: green; }}
+        .fail {{ color: red; }}
+        table {{ border-collapse: collapse; width: 100%; margin-bottom: 20px; }}
+        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; vertical-align: top; }}
+        th {{ background-color: #f2f2f2; }}
+        pre {{ margin: 0; white-space: pre-wrap; }}
+    </style>
+</head>
+<body>
+    <h1>SAS Viya kubectl Test Report</h1>
+    <p>Generated: {html.escape(datetime.now().isoformat())}</p>
+""")
+
+    def begin_run(self, run: RunReport):
+        status = 'pass' if run.passed else 'fail'
+        self.stream.write(f"""    <h2>Namespace: {html.escape(run.label)} <span class="{status}">{status.upper()}</span></h2>
+""")
+        if run.error:
+            self.stream.write(f'    <p class="fail">{html.escape(run.error)}</p>\n')
+        self.stream.write("""    <table>
+        <tr><th>Test</th><th>Status</th><th>Time (s)</th><th>Details</th></tr>
+""")
+
+    def write_result(self, run: RunReport, result: CheckResult):
+        status = 'pass' if result.passed else 'fail'
+        details = html.escape(json.dumps(result.details, indent=1, default=str))
+        self.stream.write(
+            f'        <tr><td>{html.escape(result.test)}</td>'
+            f'<td class="{status}">{status.upper()}</td>'
+            f'<td>{result.duration or 0:.3f}</td>'
+            f'<td><details><summary>{html.escape(_summary(result.details)[:120])}</summary>'
+            f'<pre>{details}</pre></details></td></tr>\n')
+
+    def end_run(self, run: RunReport):
+        self.stream.write('    </table>\n')
+
+    def end(self):
+        self.stream.write('</body>\n</html>\n')
+
+
+WRITERS = {
+    'json': JsonReportWriter,
+    'junit': JUnitReportWriter,
+    'html': HtmlReportWriter,
+}
+
+
+def write_reports(runs: Iterable[RunReport], outputs: Dict[str, str]):
+    """Write every run to each {format: path} output in one pass over the results"""
+    runs = list(runs)
+    streams = {fmt: open(path, 'w', encoding='utf-8') for fmt, path in outputs.items()}
+    try:
+        writers = [WRITERS[fmt](stream) for fmt, stream in streams.items()]
+        for writer in writers:
+            writer.begin(runs)
+        for run in runs:
+            for writer in writers:
+                writer.begin_run(run)
+            for result in run.results:
+                for writer in writers:
+                    writer.write_result(run, result)
+            for writer in writers:
+                writer.end_run(run)
+        for writer in writers:
+            writer.end()
+    finally:
+        for stream in streams.values():
+            stream.close()
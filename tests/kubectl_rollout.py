@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Deployment Readiness Waiting
+Waits for a set of deployments to become ready during a rollout: one list
+request covers every deployment, then a watch on the namespace's
+deployments reports changes as they happen. Failed or ended watches fall
+back to relisting with exponential backoff, all under one global deadline.
+"""
+
+import http.client
+import math
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+from kubectl_transport import TRANSPORTS, TransportError, make_transport
+
+DEFAULT_TIMEOUT = 600
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+
+
+def deployment_ready(deployment: Dict) -> bool:
+    """True once the current generation is rolled out and every replica is ready"""
+    metadata = deployment.get('metadata') or {}
+    spec = deployment.get('spec') or {}
+    status = deployment.get('status') or {}
+    desired = spec.get('replicas', 1)
+    return (status.get('observedGeneration', 0) >= metadata.get('generation', 0)
+            and status.get('updatedReplicas', desired) == desired
+            and status.get('readyReplicas', 0) == desired)
+
+
+def replica_status(deployment: Optional[Dict]) -> str:
+    if deployment is None:
+        return 'missing'
+    desired = (deployment.get('spec') or {}).get('replicas', 1)
+    return f"{(deployment.get('status') or {}).get('readyReplicas', 0)}/{desired} ready"
+
+
+class RolloutWaiter:
+    """Tracks the named deployments of a namespace until all are ready"""
+
+    def __init__(self, transport, namespace: str, names: Iterable[str],
+                 initial_backoff: float = INITIAL_BACKOFF, max_backoff: float = MAX_BACKOFF):
+        self.transport = transport
+        self.namespace = namespace
+        self.names = list(names)
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        # name -> latest object, for the requested names only
+        self.deployments: Dict[str, Dict] = {}
+        self.requests = 0
+
+    @property
+    def pending(self) -> List[str]:
+        return [name for name in self.names
+                if name not in self.deployments or not deployment_ready(self.deployments[name])]
+
+    def status(self) -> Dict[str, str]:
+        pending = set(self.pending)
+        return {name: replica_status(self.deployments.get(name)) if name in pending else 'ready'
+                for name in self.names}
+
+    def _list(self) -> Optional[str]:
+        """Refresh every tracked deployment in one request; returns its resourceVersion"""
+        self.requests += 1
+        data = self.transport.list('deployment', self.namespace)
+        if data is None:
+            return None
+        wanted = set(self.names)
+        self.deployments = {item['metadata']['name']: item for item in data.get('items', [])
+                            if item['metadata']['name'] in wanted}
+        return data.get('metadata', {}).get('resourceVersion')
+
+    def _watch(self, resource_version: str, deadline: float) -> bool:
+        """Apply changes until all are ready (True) or the watch ends (False)"""
+        self.requests += 1
+        timeout = max(1, math.ceil(deadline - time.monotonic()))
+        for event in self.transport.watch('deployment', self.namespace, resource_version,
+                                          timeout_seconds=timeout):
+            if event['type'] == 'ERROR':
+                return False
+            item = event['object']
+            name = item.get('metadata', {}).get('name')
+            if name not in self.names:
+                continue
+            if event['type'] == 'DELETED':
+                self.deployments.pop(name, None)
+            elif event['type'] != 'BOOKMARK':
+                self.deployments[name] = item
+            if not self.pending:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+        return False
+
+    def wait(self, timeout: float = DEFAULT_TIMEOUT) -> bool:
+        """Block until every deployment is ready or the timeout passes"""
+        deadline = time.monotonic() + timeout
+        backoff = self.initial_backoff
+        while True:
+            resource_version = self._list()
+            if resource_version is not None and not self.pending:
+                return True
+            if resource_version is not None:
+                try:
+                    if self._watch(resource_version, deadline):
+                        return True
+                except (OSError, http.client.HTTPException, ValueError, TransportError):
+                    # Transports that cannot watch are polled instead
+                    pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(backoff, remaining))
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+def wait_for_deployments(transport, namespace: str, names: Iterable[str],
+                         timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """Wait for deployments to be ready; returns {'ready': bool, 'deployments': {name: status}}"""
+    waiter = RolloutWaiter(transport, namespace, names)
+    started = time.monotonic()
+    ready = waiter.wait(timeout)
+    return {
+        'ready': ready,
+        'waited': round(time.monotonic() - started, 1),
+        'deployments': waiter.status(),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Wait for SAS Viya deployments to become ready')
+    parser.add_argument('deployments', nargs='+', help='Deployment names to wait for')
+    parser.add_argument('--namespace', default='sas-viya', help='Kubernetes namespace')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='Seconds to wait for all deployments before giving up')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='auto',
+                        help='Read cluster state via the API server directly, kubectl, '
+                             'or the API with kubectl fallback')
+    parser.add_argument('--context', default=None,
+                        help='kubeconfig context to use (default: current context)')
+    args = parser.parse_args()
+
+    transport = make_transport(args.transport, context=args.context)
+    result = wait_for_deployments(transport, args.namespace, args.deployments, args.timeout)
+    transport.close()
+
+    for name, status in result['deployments'].items():
+        print(f"{name}: {status}")
+    print(f"{'All ready' if result['ready'] else 'Timed out'} after {result['waited']}s")
+    sys.exit(0 if result['ready'] else 1)
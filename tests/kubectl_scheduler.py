@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Check Registry and Scheduler
+Checks declare the resource lists they read and how urgent they are. The
+scheduler fetches every declared list once, concurrently and most urgent
+first, and starts each check as soon as its inputs are cached. Critical
+checks run before all others; if one fails, the checks that have not
+started yet are skipped.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from kubectl_metrics import Instrumentation
+from kubectl_query import merge_fields
+from kubectl_snapshot import ClusterSnapshot, Query
+
+# Priorities; lower runs first. Critical checks always use CRITICAL
+CRITICAL = 0
+HIGH = 10
+NORMAL = 50
+LOW = 90
+
+# A check's inputs: a list of queries, or a function of the namespace
+# returning them when a query depends on it
+Needs = Any
+
+
+class Check:
+    """A registered check: the method to call and the lists it reads"""
+
+    __slots__ = ('name', 'function', 'needs', 'priority', 'critical')
+
+    def __init__(self, name: str, function: Callable, needs: Needs = (),
+                 priority: int = NORMAL, critical: bool = False):
+        self.name = name
+        self.function = function
+        self.needs = needs
+        self.priority = CRITICAL if critical else priority
+        self.critical = critical
+
+    def __repr__(self) -> str:
+        return f"Check({self.name!r}, priority={self.priority})"
+
+    def queries(self, namespace: str) -> List[Query]:
+        needs = self.needs(namespace) if callable(self.needs) else self.needs
+        return [tuple(query) for query in needs]
+
+
+class CheckRegistry:
+    """Checks in the order they are reported: by priority, then declaration"""
+
+    def __init__(self):
+        self._checks: List[Check] = []
+
+    def register(self, name: str, needs: Needs = (), priority: int = NORMAL,
+                 critical: bool = False):
+        """Decorator adding a check method; the method itself is unchanged"""
+        def decorator(function):
+            self._checks.append(Check(name, function, needs, priority, critical))
+            return function
+        return decorator
+
+    def __iter__(self) -> Iterator[Check]:
+        return iter(sorted(self._checks, key=lambda check: check.priority))
+
+    def __len__(self) -> int:
+        return len(self._checks)
+
+
+def fetch_plan(checks: Iterable[Check], namespace: str,
+               stream_kinds: Tuple[str, ...] = ()) -> List[Tuple[Query, List[Check]]]:
+    """
+    One query per (kind, selector, field selector), most urgent first.
+
+    Checks reading the same list with different fields share one fetch of
+    the merged fields; the snapshot serves each narrower projection from
+    it. Unselected lists of streamed kinds are left to the checks, which
+    page through them rather than hold them in memory; checks reading the
+    same streamed list share one pass (see ClusterSnapshot.scan).
+    """
+    merged: Dict[Tuple, List] = {}
+    for check in checks:
+        for kind, selector, field_selector, fields in check.queries(namespace):
+            if kind in stream_kinds and not (selector or field_selector):
+                continue
+            key = (kind, selector, field_selector)
+            fields = tuple(fields) if fields else None
+            if key not in merged:
+                merged[key] = [fields, []]
+            else:
+                merged[key][0] = merge_fields(merged[key][0], fields)
+            merged[key][1].append(check)
+    plan = [(key + (fields,), users) for key, (fields, users) in merged.items()]
+    plan.sort(key=lambda entry: min(check.priority for check in entry[1]))
+    return plan
+
+
+class CheckScheduler:
+    """
+    Runs registered checks against one snapshot.
+
+    execute(check) runs a check and returns (passed, payload); payloads
+    come back from run() in report order. With one worker the checks run
+    one after another on the calling thread and read their own inputs.
+    Given instrumentation, the calls of concurrent fetches are attributed
+    to the checks that declared them, joined by commas when shared.
+    """
+
+    def __init__(self, snapshot: ClusterSnapshot, checks: Iterable[Check], workers: int = 1,
+                 instrumentation: Optional[Instrumentation] = None,
+                 context: Optional[str] = None):
+        self.snapshot = snapshot
+        self.checks = list(checks)
+        self.workers = workers
+        # Planned fetches are attributed to the checks that declared them
+        self.instrumentation = instrumentation
+        self.context = context
+        # The critical check that failed, and the checks skipped because of it
+        self.failed: Optional[Check] = None
+        self.skipped: List[Check] = []
+
+    def run(self, execute: Callable[[Check], Tuple[bool, Any]]) -> List[Tuple[Check, Any]]:
+        self.failed, self.skipped = None, []
+        if self.workers <= 1:
+            return self._run_sequential(execute)
+        return self._run_concurrent(execute)
+
+    def _finished(self, check: Check, passed: bool):
+        if check.critical and not passed and self.failed is None:
+            self.failed = check
+
+    def _fetch(self, query: Query, users: List[Check]):
+        if self.instrumentation is None:
+            return self.snapshot.get(*query)
+        name = ','.join(check.function.__name__ for check in users)
+        with self.instrumentation.attributed(name, self.snapshot.namespace, self.context):
+            return self.snapshot.get(*query)
+
+    def _run_sequential(self, execute) -> List[Tuple[Check, Any]]:
+        outcomes = []
+        for check in self.checks:
+            if self.failed is not None:
+                self.skipped.append(check)
+                continue
+            passed, payload = execute(check)
+            outcomes.append((check, payload))
+            self._finished(check, passed)
+        return outcomes
+
+    def _run_concurrent(self, execute) -> List[Tuple[Check, Any]]:
+        plan = fetch_plan(self.checks, self.snapshot.namespace, self.snapshot.stream_kinds)
+        # check -> fetches it still waits for
+        waiting = {check: set() for check in self.checks}
+        for query, users in plan:
+            for check in users:
+                waiting[check].add(query)
+        critical_left = {check for check in self.checks if check.critical}
+        started = set()
+        outcomes = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Submitted most urgent first; the pool starts them in that order
+            fetches = {pool.submit(self._fetch, query, users): query for query, users in plan}
+            running = {}
+
+            def start_ready():
+                for check in self.checks:
+                    if check in started or waiting[check]:
+                        continue
+                    if critical_left and not check.critical:
+                        continue
+                    started.add(check)
+                    running[pool.submit(execute, check)] = check
+
+            start_ready()
+            while fetches or running:
+                done, _ = wait(list(fetches) + list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in fetches:
+                        # A failed fetch (None) is not retried here; the
+                        # check reads the list itself and reports the error
+                        query = fetches.pop(future)
+                        for pending in waiting.values():
+                            pending.discard(query)
+                    else:
+                        check = running.pop(future)
+                        passed, outcomes[check] = future.result()
+                        critical_left.discard(check)
+                        self._finished(check, passed)
+                if self.failed is not None:
+                    # Fetches already under way finish; the rest never start
+                    for future in fetches:
+                        future.cancel()
+                    fetches.clear()
+                else:
+                    start_ready()
+
+        self.skipped = [check for check in self.checks if check not in started]
+        return [(check, outcomes[check]) for check in self.checks if check in outcomes]
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Cluster Snapshot Cache
+Fetches each Kubernetes resource list once per run and shares the parsed
+result between the health checks and the pytest integration suite. Large
+kinds are paged through rather than cached; scan() reads one once for
+several readers
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from kubectl_query import Fields, covers, merge_fields, project
+from kubectl_transport import DEFAULT_PAGE_SIZE, KubectlTransport, TransportError
+
+# Seconds a fetched resource list stays valid; override per run with the
+# KUBECTL_SNAPSHOT_TTL environment variable or the ttl argument
+DEFAULT_TTL = float(os.environ.get('KUBECTL_SNAPSHOT_TTL', '300'))
+
+# Kinds that can reach tens of thousands of objects; items() pages through
+# them on demand instead of keeping the whole list in memory
+STREAM_KINDS = ('pods', 'events', 'podmetrics')
+
+# (kind, selector, field_selector, fields), the arguments of get()
+Query = Tuple[str, Optional[str], Optional[str], Fields]
+
+
+class ClusterSnapshot:
+    """Per-run cache of resource lists read through a transport"""
+
+    def __init__(self, namespace: str = "sas-viya", transport=None,
+                 runner: Optional[Callable[[str], Tuple[bool, str]]] = None,
+                 ttl: float = DEFAULT_TTL,
+                 stream_kinds: Tuple[str, ...] = STREAM_KINDS,
+                 page_size: int = DEFAULT_PAGE_SIZE):
+        self.namespace = namespace
+        # Any object with the list() interface of kubectl_transport works;
+        # a bare runner is wrapped in the kubectl subprocess transport
+        self.transport = transport or KubectlTransport(runner=runner)
+        self.ttl = ttl
+        self.stream_kinds = stream_kinds
+        self.page_size = page_size
+
+        # key -> (fetched_at, parsed list)
+        self._cache = {}
+        # One lock per key so concurrent callers share a single fetch
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _key_lock(self, key: Tuple) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _fresh(self, kind: str, selector: Optional[str],
+               field_selector: Optional[str], fields: Fields) -> Optional[Dict]:
+        """Cached list for a query; a wider projection can also serve a narrower one"""
+        now = time.monotonic()
+        cached = self._cache.get((kind, selector, field_selector, fields))
+        if cached and now - cached[0] < self.ttl:
+            return cached[1]
+        for key, (fetched_at, data) in list(self._cache.items()):
+            if (key[:3] == (kind, selector, field_selector) and covers(key[3], fields)
+                    and now - fetched_at < self.ttl):
+                return {'metadata': data.get('metadata') or {},
+                        'items': [project(item, fields) for item in data.get('items', [])]}
+        return None
+
+    def get(self, kind: str, selector: Optional[str] = None,
+            field_selector: Optional[str] = None,
+            fields: Fields = None) -> Optional[Dict]:
+        """Return the parsed list for a resource kind, or None if it cannot be fetched"""
+        fields = tuple(fields) if fields else None
+        key = (kind, selector, field_selector, fields)
+
+        with self._key_lock(key):
+            cached = self._fresh(kind, selector, field_selector, fields)
+            if cached is not None:
+                return cached
+
+            data = self.transport.list(kind, self.namespace, selector, field_selector,
+                                       fields=fields)
+            if data is None:
+                # Failures are not cached so the next caller retries
+                return None
+
+            self._cache[key] = (time.monotonic(), data)
+            return data
+
+    def items(self, kind: str, selector: Optional[str] = None,
+              field_selector: Optional[str] = None,
+              fields: Fields = None,
+              metadata: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Yield the items of a resource kind.
+
+        Streamed kinds are read page by page and not retained unless a full
+        list is already cached; other kinds come from the cached list.
+        metadata, if given, receives the list's metadata (resourceVersion)
+        once the items are read. Raises TransportError if the list cannot
+        be read.
+        """
+        fields = tuple(fields) if fields else None
+
+        if kind in self.stream_kinds:
+            cached = self._fresh(kind, selector, field_selector, fields)
+            if cached is None:
+                # Only passed when asked for, so transports without it still work
+                extra = {} if metadata is None else {'metadata': metadata}
+                yield from self.transport.iter_items(
+                    kind, self.namespace, selector, field_selector,
+                    limit=self.page_size, fields=fields, **extra)
+                return
+            data = cached
+        else:
+            data = self.get(kind, selector, field_selector, fields)
+            if data is None:
+                raise TransportError(f"Cannot list {kind}")
+        yield from data.get('items', [])
+        if metadata is not None:
+            metadata.update(data.get('metadata') or {})
+
+    def scan(self, kind: str, readers: Iterable[Tuple[Fields, Callable[[Dict], None]]],
+             selector: Optional[str] = None, field_selector: Optional[str] = None):
+        """
+        Read a resource kind once for several readers.
+
+        Each reader is (fields, consume): the items are read with the merged
+        fields of all readers and each is passed to every consume() projected
+        to that reader's fields. Streamed kinds are still never held whole.
+        Raises TransportError if the list cannot be read.
+        """
+        readers = [(tuple(fields) if fields else None, consume) for fields, consume in readers]
+        if not readers:
+            return
+        merged = readers[0][0]
+        for fields, _ in readers[1:]:
+            merged = merge_fields(merged, fields)
+        for item in self.items(kind, selector, field_selector, merged):
+            for fields, consume in readers:
+                consume(item if fields == merged else project(item, fields))
+
+    def index(self, kind: str, selector: Optional[str] = None,
+              field_selector: Optional[str] = None,
+              fields: Fields = None) -> Optional[Dict[str, Dict]]:
+        """Return the items of a resource kind keyed by metadata.name"""
+        data = self.get(kind, selector, field_selector, fields)
+        if data is None:
+            return None
+        return {
+            item['metadata']['name']: item
+            for item in data.get('items', [])
+        }
+
+    def invalidate(self, kind: Optional[str] = None):
+        """Drop cached lists for one kind, or everything"""
+        for key in list(self._cache):
+            if kind is None or key[0] == kind:
+                self._cache.pop(key, None)
+
+    def prefetch(self, queries: Iterable[Query], workers: int = 8) -> List[Query]:
+        """
+        Fetch several lists concurrently so later reads are cache hits.
+
+        Each query is (kind, selector, field_selector, fields), as taken by
+        get(). Returns the queries that could not be fetched.
+        """
+        queries = [tuple(q) for q in queries]
+        if not queries:
+            return []
+        with ThreadPoolExecutor(max_workers=min(workers, len(queries))) as pool:
+            results = list(pool.map(lambda query: self.get(*query), queries))
+        return [query for query, data in zip(queries, results) if data is None]
+
+    def dump(self) -> List[Dict]:
+        """Fresh cached lists as JSON-serializable entries for load()"""
+        now = time.monotonic()
+        return [{'kind': kind, 'selector': selector, 'field_selector': field_selector,
+                 'fields': list(fields) if fields else None, 'data': data}
+                for (kind, selector, field_selector, fields), (fetched_at, data)
+                in list(self._cache.items()) if now - fetched_at < self.ttl]
+
+    def load(self, entries: Iterable[Dict]):
+        """Seed the cache with entries from dump(), possibly of another process"""
+        now = time.monotonic()
+        for entry in entries:
+            fields = tuple(entry['fields']) if entry.get('fields') else None
+            key = (entry['kind'], entry.get('selector'), entry.get('field_selector'), fields)
+            self._cache[key] = (now, entry['data'])
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Run-to-Run State Files
+Small JSON files the checks keep between runs (event cursors, restart
+history), one per context and namespace under a state directory
+"""
+
+import json
+import os
+import re
+import tempfile
+from typing import Dict, Optional
+
+
+def state_file(state_dir: str, name: str, namespace: str,
+               context: Optional[str] = None) -> str:
+    """Path of a per-context, per-namespace state file under state_dir"""
+    label = f"{context}-{namespace}" if context else namespace
+    return os.path.join(state_dir, f"{name}-{re.sub(r'[^A-Za-z0-9_.-]', '_', label)}.json")
+
+
+def read_state(path: Optional[str], version: int) -> Optional[Dict]:
+    """Saved state, or None if missing, unreadable or from another format version"""
+    if not path:
+        return None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        # A lost state only costs the next run its history
+        return None
+    return state if state.get('version') == version else None
+
+
+def write_state(path: str, state: Dict):
+    """Write a state file atomically so an interrupted run keeps the old one"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.state-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -0,0 +1,823 @@
+#!/usr/bin/env python3
+"""
+Kubernetes API Transports
+Pluggable ways of reading cluster state: a native API client that reuses
+pooled keep-alive HTTPS connections, and the kubectl subprocess fallback
+"""
+
+import base64
+import codecs
+import gzip
+import http.client
+import io
+import json
+import os
+import queue
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+from urllib.parse import urlencode, urlsplit
+
+import yaml
+
+from kubectl_metrics import CallRecord, measure_call, timed_items, timed_json, timed_read, timed_run
+from kubectl_query import PARTIAL_METADATA_ACCEPT, Fields, metadata_only, project, project_list
+
+# kubectl resource name -> (API path prefix, plural, namespaced)
+RESOURCES = {
+    'pods': ('/api/v1', 'pods', True),
+    'pvc': ('/api/v1', 'persistentvolumeclaims', True),
+    'services': ('/api/v1', 'services', True),
+    'endpoints': ('/api/v1', 'endpoints', True),
+    'events': ('/api/v1', 'events', True),
+    'configmap': ('/api/v1', 'configmaps', True),
+    'nodes': ('/api/v1', 'nodes', False),
+    'namespace': ('/api/v1', 'namespaces', False),
+    'deployment': ('/apis/apps/v1', 'deployments', True),
+    'statefulsets': ('/apis/apps/v1', 'statefulsets', True),
+    'ingress': ('/apis/networking.k8s.io/v1', 'ingresses', True),
+    'networkpolicy': ('/apis/networking.k8s.io/v1', 'networkpolicies', True),
+    'hpa': ('/apis/autoscaling/v2', 'horizontalpodautoscalers', True),
+    'podmetrics': ('/apis/metrics.k8s.io/v1beta1', 'pods', True),
+    'nodemetrics': ('/apis/metrics.k8s.io/v1beta1', 'nodes', False),
+}
+
+# Errors after which a pooled connection is discarded and the request retried
+RETRYABLE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+# Items per list request; matches kubectl's default --chunk-size
+DEFAULT_PAGE_SIZE = 500
+
+# Longest log line read in one piece
+MAX_LOG_LINE = 64 * 1024
+
+# Bytes read from a list response per parser step
+READ_SIZE = 64 * 1024
+
+
+class KubeconfigError(Exception):
+    """Raised when a kubeconfig cannot be used by the native transport"""
+
+
+class TransportError(Exception):
+    """Raised when a streamed list cannot be read to the end"""
+
+
+def iter_list_items(read: Callable[[int], Union[bytes, str]], header: Dict) -> Iterator[Dict]:
+    """
+    Incrementally parse a Kubernetes list response.
+
+    Items of the top-level "items" array are yielded one at a time while the
+    response is still being read, so at most one item plus one read buffer is
+    held in memory. Every other top-level key (kind, metadata, ...) is stored
+    in header.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        # Append the next chunk, dropping what has already been consumed
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = read(READ_SIZE)
+        if not chunk:
+            eof = True
+            chunk = b''
+        text = chunk if isinstance(chunk, str) else utf8.decode(chunk, final=eof)
+        buffer = buffer[pos:] + text
+        pos = 0
+        return True
+
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not fill():
+                return ''
+
+    def expect(chars: str) -> str:
+        nonlocal pos
+        char = peek()
+        if not char or char not in chars:
+            raise ValueError(f"Malformed list response: expected one of {chars!r}")
+        pos += 1
+        return char
+
+    def value():
+        nonlocal pos
+        while True:
+            peek()
+            try:
+                result, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Incomplete value: read more and retry from the same offset
+                if not fill():
+                    raise
+                continue
+            # A bare number or literal may continue in the next chunk
+            if end == len(buffer) and not isinstance(result, (dict, list, str)) and fill():
+                continue
+            pos = end
+            return result
+
+    expect('{')
+    if peek() == '}':
+        return
+    while True:
+        key = value()
+        expect(':')
+        if key == 'items' and peek() == '[':
+            pos += 1
+            if peek() == ']':
+                pos += 1
+            else:
+                while True:
+                    yield value()
+                    if expect(',]') == ']':
+                        break
+        else:
+            header[key] = value()
+        if expect(',}') == '}':
+            return
+
+
+def resource_path(kind: str, namespace: Optional[str] = None,
+                  name: Optional[str] = None) -> str:
+    """Build the REST path for a resource kind"""
+    if kind not in RESOURCES:
+        raise ValueError(f"Unknown resource kind: {kind}")
+
+    prefix, plural, namespaced = RESOURCES[kind]
+    path = prefix
+    if namespaced and namespace:
+        path += f"/namespaces/{namespace}"
+    path += f"/{plural}"
+    if name:
+        path += f"/{name}"
+    return path
+
+
+def run_kubectl(command: str) -> Tuple[bool, str]:
+    """Execute kubectl command and return success status and output"""
+    try:
+        result = subprocess.run(
+            command,
+            shell=True,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        return result.returncode == 0, result.stdout
+    except subprocess.TimeoutExpired:
+        return False, "Command timed out"
+    except Exception as e:
+        return False, str(e)
+
+
+class KubectlTransport:
+    """Reads cluster state by running kubectl in a subprocess"""
+
+    name = 'kubectl'
+
+    def __init__(self, runner: Optional[Callable[[str], Tuple[bool, str]]] = None,
+                 context: Optional[str] = None):
+        self.runner = runner or run_kubectl
+        self.context = context
+        # Optional kubectl_metrics.Instrumentation recording every call
+        self.instrumentation = None
+
+    def _kubectl(self) -> str:
+        return f"kubectl --context {self.context}" if self.context else "kubectl"
+
+    def list(self, kind: str, namespace: Optional[str] = None,
+             selector: Optional[str] = None,
+             field_selector: Optional[str] = None,
+             fields: Fields = None) -> Optional[Dict]:
+        """Return the parsed list for a resource kind, or None on failure"""
+        cmd = f"{self._kubectl()} get {kind}"
+        if namespace:
+            cmd += f" -n {namespace}"
+        cmd += " -o json"
+        if selector:
+            cmd += f" -l '{selector}'"
+        if field_selector:
+            cmd += f" --field-selector {field_selector}"
+
+        with measure_call(self.instrumentation, self.name, 'list', kind) as record:
+            success, output = timed_run(self.runner, cmd, record)
+            return project_list(timed_json(output, record), fields) if success else None
+
+    def get(self, kind: str, name: str,
+            namespace: Optional[str] = None) -> Optional[Dict]:
+        """Return a single object, or None if it does not exist"""
+        cmd = f"{self._kubectl()} get {kind} {name}"
+        if namespace:
+            cmd += f" -n {namespace}"
+        cmd += " -o json"
+
+        with measure_call(self.instrumentation, self.name, 'get', kind) as record:
+            success, output = timed_run(self.runner, cmd, record)
+            return timed_json(output, record) if success else None
+
+    def iter_items(self, kind: str, namespace: Optional[str] = None,
+                   selector: Optional[str] = None,
+                   field_selector: Optional[str] = None,
+                   limit: int = DEFAULT_PAGE_SIZE,
+                   fields: Fields = None,
+                   metadata: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Yield items page by page using `get --raw` with limit/continue.
+
+        metadata, if given, receives the list's metadata such as its
+        resourceVersion once the pages are read.
+        """
+        with measure_call(self.instrumentation, self.name, 'iter_items', kind) as record:
+            yield from timed_items(self._iter_pages(
+                kind, namespace, selector, field_selector, limit, fields, record, metadata), record)
+
+    def _iter_pages(self, kind: str, namespace: Optional[str], selector: Optional[str],
+                    field_selector: Optional[str], limit: int, fields: Fields,
+                    record: CallRecord, metadata: Optional[Dict] = None) -> Iterator[Dict]:
+        path = resource_path(kind, namespace)
+        token = None
+        while True:
+            params = {
+                'labelSelector': selector,
+                'fieldSelector': field_selector,
+                'limit': limit,
+                'continue': token,
+            }
+            query = urlencode({k: v for k, v in params.items() if v is not None})
+            success, output = timed_run(
+                self.runner, f"{self._kubectl()} get --raw '{path}?{query}'", record)
+            if not success:
+                raise TransportError(f"Cannot list {kind}")
+
+            header = {}
+            for item in iter_list_items(io.StringIO(output).read, header):
+                yield project(item, fields)
+            # Let the page text be collected before fetching the next one
+            del output
+
+            token = list_metadata(header, metadata)
+            if not token:
+                return
+
+    def watch(self, kind: str, namespace: Optional[str] = None,
+              resource_version: Optional[str] = None,
+              selector: Optional[str] = None,
+              field_selector: Optional[str] = None,
+              timeout_seconds: int = 300) -> Iterator[Dict]:
+        """Yield watch events for a resource kind after resource_version"""
+        # `get --raw` streams the API's newline-delimited watch events as-is
+        url = resource_path(kind, namespace) + '?' + urlencode(
+            watch_params(resource_version, selector, field_selector, timeout_seconds))
+        process = subprocess.Popen(
+            f"{self._kubectl()} get --raw '{url}'",
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True
+        )
+        try:
+            for line in process.stdout:
+                if line.strip():
+                    yield json.loads(line)
+        except GeneratorExit:
+            # The consumer stopped reading; the watch would run to its timeout
+            process.kill()
+            raise
+        finally:
+            process.wait()
+        if process.returncode != 0:
+            raise TransportError(f"Cannot watch {kind}")
+
+    def logs(self, pod: str, namespace: Optional[str] = None,
+             container: Optional[str] = None,
+             tail_lines: Optional[int] = None,
+             since_seconds: Optional[int] = None) -> Iterator[str]:
+        """Yield a container's log lines as kubectl prints them"""
+        cmd = f"{self._kubectl()} logs {pod}"
+        if namespace:
+            cmd += f" -n {namespace}"
+        if container:
+            cmd += f" -c {container}"
+        if tail_lines is not None:
+            cmd += f" --tail={tail_lines}"
+        if since_seconds is not None:
+            cmd += f" --since={since_seconds}s"
+        process = subprocess.Popen(
+            cmd,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors='replace'
+        )
+        try:
+            for line in process.stdout:
+                yield line.rstrip('\n')
+        except GeneratorExit:
+            # The consumer stopped reading; a followed log would never end
+            process.kill()
+            raise
+        finally:
+            process.wait()
+        if process.returncode != 0:
+            raise TransportError(f"Cannot read logs of {pod}")
+
+    def close(self):
+        pass
+
+
+class ApiTransport:
+    """Talks to the API server directly over a pool of keep-alive connections"""
+
+    name = 'api'
+
+    def __init__(self, server: str, token: Optional[str] = None,
+                 token_provider: Optional[Callable[[], Tuple[str, Optional[float]]]] = None,
+                 ca_file: Optional[str] = None, ca_data: Optional[str] = None,
+                 cert_file: Optional[str] = None, key_file: Optional[str] = None,
+                 insecure: bool = False, pool_size: int = 4, timeout: float = 30):
+        parts = urlsplit(server)
+        self.scheme = parts.scheme or 'https'
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.scheme == 'https' else 80)
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+
+        self._token = token
+        self._token_provider = token_provider
+        self._token_expiry = None
+        # Concurrent requests finding the token expired run the provider once
+        self._token_lock = threading.Lock()
+        self._temp_files = []
+
+        self.ssl_context = None
+        if self.scheme == 'https':
+            self.ssl_context = ssl.create_default_context(cafile=ca_file, cadata=ca_data)
+            if insecure:
+                # Matches insecure-skip-tls-verify, as set up by setup_kubectl_tunnel.sh
+                self.ssl_context.check_hostname = False
+                self.ssl_context.verify_mode = ssl.CERT_NONE
+            if cert_file:
+                self.ssl_context.load_cert_chain(cert_file, key_file)
+
+        # Idle connections; LIFO keeps the most recently used (warm) one on top
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self.connections_opened = 0
+        # Optional kubectl_metrics.Instrumentation recording every call
+        self.instrumentation = None
+
+    @classmethod
+    def from_kubeconfig(cls, path: Optional[str] = None,
+                        context: Optional[str] = None, **kwargs) -> 'ApiTransport':
+        """Build a transport from the cluster and user of a kubeconfig context"""
+        if path is None:
+            path = os.environ.get('KUBECONFIG', '').split(os.pathsep)[0] or \
+                os.path.expanduser('~/.kube/config')
+        try:
+            with open(path) as f:
+                config = yaml.safe_load(f) or {}
+        except OSError as e:
+            raise KubeconfigError(f"Cannot read kubeconfig {path}: {e}")
+
+        def named(section, name):
+            for entry in config.get(section) or []:
+                if entry.get('name') == name:
+                    return entry.get(section[:-1]) or {}
+            raise KubeconfigError(f"{section[:-1]} '{name}' not found in {path}")
+
+        context_name = context or config.get('current-context')
+        if not context_name:
+            raise KubeconfigError(f"No current-context in {path}")
+        ctx = named('contexts', context_name)
+        cluster = named('clusters', ctx.get('cluster'))
+        user = named('users', ctx.get('user')) if ctx.get('user') else {}
+
+        transport_args = {
+            'server': cluster.get('server'),
+            'insecure': cluster.get('insecure-skip-tls-verify', False),
+            'ca_file': cluster.get('certificate-authority'),
+        }
+        if not transport_args['server']:
+            raise KubeconfigError(f"Cluster for context '{context_name}' has no server")
+        if cluster.get('certificate-authority-data'):
+            transport_args['ca_data'] = base64.b64decode(
+                cluster['certificate-authority-data']).decode()
+
+        if user.get('token'):
+            transport_args['token'] = user['token']
+        elif user.get('tokenFile'):
+            with open(user['tokenFile']) as f:
+                transport_args['token'] = f.read().strip()
+        elif user.get('exec'):
+            transport_args['token_provider'] = _exec_token_provider(user['exec'])
+        elif user.get('auth-provider'):
+            raise KubeconfigError("auth-provider users are only supported through kubectl")
+
+        transport = cls(**transport_args, **kwargs)
+        transport._load_client_cert(user)
+        return transport
+
+    def _load_client_cert(self, user: Dict):
+        """Attach a client certificate from file paths or inline data"""
+        cert_file = user.get('client-certificate')
+        key_file = user.get('client-key')
+        if user.get('client-certificate-data'):
+            cert_file = self._write_temp(user['client-certificate-data'])
+        if user.get('client-key-data'):
+            key_file = self._write_temp(user['client-key-data'])
+        if cert_file and self.ssl_context is not None:
+            self.ssl_context.load_cert_chain(cert_file, key_file)
+
+    def _write_temp(self, data: str) -> str:
+        # ssl only loads client certificates from files
+        fd, path = tempfile.mkstemp(suffix='.pem')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(base64.b64decode(data))
+        self._temp_files.append(path)
+        return path
+
+    def _token_stale(self) -> bool:
+        return self._token is None or (
+            self._token_expiry is not None and time.time() >= self._token_expiry)
+
+    def _auth_header(self) -> Optional[str]:
+        """Authorization header, refreshing an expired exec token first"""
+        if self._token_provider and self._token_stale():
+            with self._token_lock:
+                # Another thread may have refreshed it while this one waited
+                if self._token_stale():
+                    try:
+                        self._token, self._token_expiry = self._token_provider()
+                    except KubeconfigError as e:
+                        raise TransportError(f"Cannot get credentials: {e}")
+        return f"Bearer {self._token}" if self._token else None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        self.connections_opened += 1
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, conn: http.client.HTTPConnection):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _url(self, path: str, params: Optional[Dict] = None) -> str:
+        url = self.base_path + path
+        if params:
+            url += '?' + urlencode({k: v for k, v in params.items() if v is not None})
+        return url
+
+    def _headers(self, accept: str = 'application/json',
+                 compress: bool = True) -> Dict[str, str]:
+        headers = {'Accept': accept}
+        if compress:
+            # The API server gzips large list responses; typically ~10x fewer bytes
+            headers['Accept-Encoding'] = 'gzip'
+        auth = self._auth_header()
+        if auth:
+            headers['Authorization'] = auth
+        return headers
+
+    def _open(self, path: str, params: Optional[Dict] = None,
+              accept: str = 'application/json', record: Optional[CallRecord] = None):
+        """Send a GET on a pooled connection and return (connection, response)"""
+        url = self._url(path, params)
+        headers = self._headers(accept)
+
+        # A pooled connection may have been closed by the server while idle;
+        # retry once on a fresh connection in that case
+        for attempt in range(2):
+            conn = self._acquire()
+            try:
+                conn.request('GET', url, headers=headers)
+                return conn, conn.getresponse()
+            except RETRYABLE_ERRORS:
+                conn.close()
+                if attempt:
+                    raise
+                if record is not None:
+                    record.retries += 1
+            except Exception:
+                conn.close()
+                raise
+
+    def _finish(self, conn: http.client.HTTPConnection,
+                response: http.client.HTTPResponse):
+        """Return a fully read connection to the pool"""
+        if response.will_close or not response.isclosed():
+            conn.close()
+        else:
+            self._release(conn)
+
+    @staticmethod
+    def _reader(response: http.client.HTTPResponse,
+                record: Optional[CallRecord] = None) -> Callable[[int], bytes]:
+        """Return a read(size) function that undoes any gzip content encoding"""
+        # Bytes are counted as they arrive on the wire, before inflating
+        wire_read = response.read if record is None else timed_read(response.read, record)
+        if response.getheader('Content-Encoding') != 'gzip':
+            return wire_read
+
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        def read(size: int) -> bytes:
+            while True:
+                chunk = wire_read(size)
+                if not chunk:
+                    return inflater.flush()
+                data = inflater.decompress(chunk)
+                if data:
+                    return data
+
+        return read
+
+    def request(self, path: str, params: Optional[Dict] = None,
+                accept: str = 'application/json',
+                record: Optional[CallRecord] = None) -> Tuple[int, bytes]:
+        """GET a path on a pooled connection, returning status and decoded body"""
+        start = time.perf_counter()
+        conn, response = self._open(path, params, accept, record)
+        try:
+            body = response.read()
+        except Exception:
+            conn.close()
+            raise
+        self._finish(conn, response)
+        if record is not None:
+            record.bytes += len(body)
+        if response.getheader('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        if record is not None:
+            record.transport_time += time.perf_counter() - start
+        return response.status, body
+
+    def _get_json(self, operation: str, kind: str, path: str,
+                  params: Optional[Dict] = None,
+                  accept: str = 'application/json') -> Optional[Dict]:
+        with measure_call(self.instrumentation, self.name, operation, kind) as record:
+            try:
+                status, body = self.request(path, params, accept, record)
+            except (OSError, http.client.HTTPException, TransportError) as e:
+                record.success = False
+                record.timeout = isinstance(e, TimeoutError)
+                return None
+            if status != 200:
+                record.success = False
+                return None
+            return timed_json(body, record)
+
+    def list(self, kind: str, namespace: Optional[str] = None,
+             selector: Optional[str] = None,
+             field_selector: Optional[str] = None,
+             fields: Fields = None) -> Optional[Dict]:
+        """Return the parsed list for a resource kind, or None on failure"""
+        data = self._get_json('list', kind, resource_path(kind, namespace), {
+            'labelSelector': selector,
+            'fieldSelector': field_selector,
+        }, PARTIAL_METADATA_ACCEPT if metadata_only(fields) else 'application/json')
+        return project_list(data, fields)
+
+    def get(self, kind: str, name: str,
+            namespace: Optional[str] = None) -> Optional[Dict]:
+        """Return a single object, or None if it does not exist"""
+        return self._get_json('get', kind, resource_path(kind, namespace, name))
+
+    def iter_items(self, kind: str, namespace: Optional[str] = None,
+                   selector: Optional[str] = None,
+                   field_selector: Optional[str] = None,
+                   limit: int = DEFAULT_PAGE_SIZE,
+                   fields: Fields = None,
+                   metadata: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Yield items page by page, parsing each response as it arrives.
+
+        metadata, if given, receives the list's metadata such as its
+        resourceVersion once the pages are read.
+        """
+        with measure_call(self.instrumentation, self.name, 'iter_items', kind) as record:
+            yield from timed_items(self._iter_pages(
+                kind, namespace, selector, field_selector, limit, fields, record, metadata), record)
+
+    def _iter_pages(self, kind: str, namespace: Optional[str], selector: Optional[str],
+                    field_selector: Optional[str], limit: int, fields: Fields,
+                    record: CallRecord, metadata: Optional[Dict] = None) -> Iterator[Dict]:
+        path = resource_path(kind, namespace)
+        accept = PARTIAL_METADATA_ACCEPT if metadata_only(fields) else 'application/json'
+        token = None
+        while True:
+            start = time.perf_counter()
+            try:
+                conn, response = self._open(path, {
+                    'labelSelector': selector,
+                    'fieldSelector': field_selector,
+                    'limit': limit,
+                    'continue': token,
+                }, accept, record)
+            except (OSError, http.client.HTTPException) as e:
+                record.timeout = isinstance(e, TimeoutError)
+                raise TransportError(f"Cannot list {kind}: {e}")
+            finally:
+                record.transport_time += time.perf_counter() - start
+
+            if response.status != 200:
+                conn.close()
+                raise TransportError(f"Cannot list {kind}: HTTP {response.status}")
+
+            header = {}
+            try:
+                for item in iter_list_items(self._reader(response, record), header):
+                    yield project(item, fields)
+            except (OSError, http.client.HTTPException, zlib.error) as e:
+                conn.close()
+                record.timeout = isinstance(e, TimeoutError)
+                raise TransportError(f"Cannot list {kind}: {e}")
+            except GeneratorExit:
+                # Consumer stopped early; the unread body makes the connection unusable
+                conn.close()
+                raise
+            # Drain the trailing newline so the connection can be reused
+            response.read()
+            self._finish(conn, response)
+
+            token = list_metadata(header, metadata)
+            if not token:
+                return
+
+    def watch(self, kind: str, namespace: Optional[str] = None,
+              resource_version: Optional[str] = None,
+              selector: Optional[str] = None,
+              field_selector: Optional[str] = None,
+              timeout_seconds: int = 300) -> Iterator[Dict]:
+        """Yield watch events for a resource kind after resource_version"""
+        url = self._url(resource_path(kind, namespace),
+                        watch_params(resource_version, selector, field_selector, timeout_seconds))
+
+        # Watches hold their connection open, so they never borrow from the pool
+        conn = self._connect()
+        conn.timeout = timeout_seconds + self.timeout
+        try:
+            # Watch streams are newline-delimited and never compressed
+            conn.request('GET', url, headers=self._headers(compress=False))
+            response = conn.getresponse()
+            if response.status != 200:
+                body = response.read()
+                yield {'type': 'ERROR', 'object': json.loads(body) if body else
+                       {'kind': 'Status', 'code': response.status}}
+                return
+            for line in iter(response.readline, b''):
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+    def logs(self, pod: str, namespace: Optional[str] = None,
+             container: Optional[str] = None,
+             tail_lines: Optional[int] = None,
+             since_seconds: Optional[int] = None) -> Iterator[str]:
+        """Yield a container's log lines as they arrive, one line in memory at a time"""
+        url = self._url(resource_path('pods', namespace, pod) + '/log', {
+            'container': container,
+            'tailLines': tail_lines,
+            'sinceSeconds': since_seconds,
+        })
+        # Like watches, log streams hold their connection until fully read
+        conn = self._connect()
+        try:
+            conn.request('GET', url, headers=self._headers(accept='text/plain', compress=False))
+            response = conn.getresponse()
+            if response.status != 200:
+                response.read()
+                raise TransportError(f"Cannot read logs of {pod}: HTTP {response.status}")
+            # Overlong lines arrive in MAX_LOG_LINE pieces rather than all at once
+            for line in iter(lambda: response.readline(MAX_LOG_LINE), b''):
+                yield line.decode('utf-8', 'replace').rstrip('\n')
+        except (OSError, http.client.HTTPException) as e:
+            raise TransportError(f"Cannot read logs of {pod}: {e}")
+        finally:
+            conn.close()
+
+    def close(self):
+        """Close pooled connections and remove temporary credential files"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        for path in self._temp_files:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self._temp_files = []
+
+
+def list_metadata(header: Dict, metadata: Optional[Dict]) -> Optional[str]:
+    """
+    Copy a list page's metadata (e.g. its resourceVersion, the cursor to
+    watch from) into metadata, if given, and return the continue token.
+    """
+    page = header.get('metadata') or {}
+    if metadata is not None:
+        metadata.update((key, value) for key, value in page.items()
+                        if key not in ('continue', 'remainingItemCount'))
+    return page.get('continue')
+
+
+def watch_params(resource_version: Optional[str], selector: Optional[str],
+                 field_selector: Optional[str], timeout_seconds: int) -> Dict:
+    """Query parameters for a watch request"""
+    params = {
+        'watch': '1',
+        'allowWatchBookmarks': 'true',
+        'timeoutSeconds': str(timeout_seconds),
+        'resourceVersion': resource_version,
+        'labelSelector': selector,
+        'fieldSelector': field_selector,
+    }
+    return {k: v for k, v in params.items() if v is not None}
+
+
+def _exec_token_provider(exec_config: Dict) -> Callable[[], Tuple[str, Optional[float]]]:
+    """Wrap a kubeconfig exec plugin (e.g. aws eks get-token) as a token source"""
+    command = [exec_config['command']] + list(exec_config.get('args') or [])
+    env = dict(os.environ)
+    for entry in exec_config.get('env') or []:
+        env[entry['name']] = entry['value']
+
+    def provider() -> Tuple[str, Optional[float]]:
+        try:
+            result = subprocess.run(command, capture_output=True, text=True,
+                                    env=env, timeout=30, check=True)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise KubeconfigError(f"exec credential plugin failed: {e}")
+
+        try:
+            status = json.loads(result.stdout).get('status', {})
+            expiry = None
+            if status.get('expirationTimestamp'):
+                # RFC 3339: fractional seconds and +00:00 offsets are valid too
+                expires_at = datetime.fromisoformat(
+                    status['expirationTimestamp'].replace('Z', '+00:00'))
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
+                # Refresh a minute early so in-flight requests never carry a stale token
+                expiry = expires_at.timestamp() - 60
+        except (ValueError, AttributeError, TypeError) as e:
+            raise KubeconfigError(f"exec credential plugin returned an invalid credential: {e}")
+        return status.get('token'), expiry
+
+    return provider
+
+
+TRANSPORTS = ('auto', 'api', 'kubectl')
+
+
+def make_transport(kind: str = 'auto', context: Optional[str] = None,
+                   runner: Optional[Callable[[str], Tuple[bool, str]]] = None):
+    """Create a transport; 'auto' prefers the native API and falls back to kubectl"""
+    if kind not in TRANSPORTS:
+        raise ValueError(f"Unknown transport: {kind}")
+
+    if kind in ('auto', 'api'):
+        try:
+            return ApiTransport.from_kubeconfig(context=context)
+        except (KubeconfigError, OSError, ssl.SSLError, ValueError, yaml.YAMLError) as e:
+            if kind == 'api':
+                raise
+            print(f"Native API transport unavailable ({e}); using kubectl", file=sys.stderr)
+
+    return KubectlTransport(runner=runner, context=context)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+SAS Viya Watch Monitor
+Lists the namespace once, then follows watch streams from the returned
+resourceVersion and redraws the dashboard only when what it shows changes
+"""
+
+import http.client
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from kubectl_resources import PodUsage, format_memory
+from kubectl_transport import TRANSPORTS, TransportError, make_transport
+
+# (kind, field selector) followed with watch streams
+WATCHED = [
+    ('pods', None),
+    ('deployment', None),
+    ('statefulsets', None),
+    ('endpoints', None),
+    ('events', 'type=Warning'),
+]
+
+# Services whose endpoints are shown on the dashboard
+SERVICE_ENDPOINTS = ['sas-logon-app', 'sas-cas-server', 'sas-postgres']
+
+CLEAR_SCREEN = "\033[H\033[2J"
+
+
+def pod_status(pod: Dict) -> str:
+    """Status as kubectl prints it: a waiting/terminated reason, else the phase"""
+    status = pod.get('status', {})
+    for container in status.get('containerStatuses') or []:
+        state = container.get('state', {})
+        for key in ('waiting', 'terminated'):
+            reason = (state.get(key) or {}).get('reason')
+            if reason:
+                return reason
+    if pod.get('metadata', {}).get('deletionTimestamp'):
+        return 'Terminating'
+    return status.get('phase', 'Unknown')
+
+
+def summarize(kind: str, item: Dict) -> Tuple:
+    """Reduce an object to the fields the dashboard displays"""
+    status = item.get('status') or {}
+    if kind == 'pods':
+        containers = status.get('containerStatuses') or []
+        return (pod_status(item), sum(1 for c in containers if c.get('ready')), len(containers))
+    if kind in ('deployment', 'statefulsets'):
+        return (status.get('readyReplicas', 0), item.get('spec', {}).get('replicas', 0))
+    if kind == 'endpoints':
+        return tuple(
+            f"{address.get('ip')}:{port.get('port')}"
+            for subset in item.get('subsets') or []
+            for address in subset.get('addresses') or []
+            for port in subset.get('ports') or [{}]
+        )
+    if kind == 'events':
+        return (item.get('lastTimestamp') or '', item.get('reason', ''),
+                item.get('involvedObject', {}).get('name', ''))
+    return ()
+
+
+class ClusterModel:
+    """In-memory view of the watched kinds, kept as display summaries"""
+
+    def __init__(self):
+        self.state = {kind: {} for kind, _ in WATCHED}
+        self.top_pods = []
+
+    def replace(self, kind: str, items: List[Dict]) -> bool:
+        """Load a full list; returns True if the displayed state changed"""
+        summaries = {item['metadata']['name']: summarize(kind, item) for item in items}
+        changed = summaries != self.state[kind]
+        self.state[kind] = summaries
+        return changed
+
+    def apply(self, kind: str, event: Dict) -> bool:
+        """Apply one watch event; returns True if the displayed state changed"""
+        item = event.get('object') or {}
+        name = item.get('metadata', {}).get('name')
+        current = self.state[kind]
+
+        if event['type'] == 'DELETED':
+            return current.pop(name, None) is not None
+        if event['type'] in ('ADDED', 'MODIFIED'):
+            summary = summarize(kind, item)
+            if current.get(name) == summary:
+                return False
+            current[name] = summary
+            return True
+        return False
+
+    def set_top_pods(self, metrics: List[Dict]) -> bool:
+        """Replace the pod metrics ranking; returns True if it changed"""
+        usage = PodUsage.from_metrics(metrics)
+        top = [(usage.cpu[i], usage.names[i], format_memory(usage.memory[i]))
+               for i in usage.top(5, 'cpu')]
+        changed = top != self.top_pods
+        self.top_pods = top
+        return changed
+
+    def render(self, namespace: str) -> str:
+        lines = [
+            "=======================================",
+            "SAS Viya Monitoring Dashboard",
+            f"Time: {datetime.now().strftime('%c')}",
+            "=======================================",
+            "\n📊 POD STATUS:",
+        ]
+        counts = {}
+        for status, _, _ in self.state['pods'].values():
+            counts[status] = counts.get(status, 0) + 1
+        for status in sorted(counts):
+            lines.append(f"  {status}: {counts[status]}")
+
+        lines.append("\n🚀 DEPLOYMENTS:")
+        for name, (ready, desired) in sorted(self.state['deployment'].items())[:10]:
+            lines.append(f"  {name:<40} {ready}/{desired}")
+
+        lines.append("\n💾 STATEFULSETS:")
+        for name, (ready, desired) in sorted(self.state['statefulsets'].items()):
+            lines.append(f"  {name:<40} {ready}/{desired}")
+
+        lines.append("\n🌐 SERVICE ENDPOINTS:")
+        for service in SERVICE_ENDPOINTS:
+            addresses = self.state['endpoints'].get(service)
+            lines.append(f"  {service}: {','.join(addresses) if addresses else 'No endpoints'}")
+
+        lines.append("\n📈 TOP RESOURCE CONSUMERS:")
+        for cpu, name, memory in self.top_pods:
+            lines.append(f"  {name:<40} CPU: {cpu:.0f}m, Memory: {memory}")
+
+        lines.append("\n⚠️  RECENT WARNINGS:")
+        for timestamp, reason, obj in sorted(self.state['events'].values())[-3:]:
+            lines.append(f"  {obj}: {reason}")
+
+        return '\n'.join(lines) + '\n'
+
+
+class WatchMonitor:
+    """Drives the model from one initial list plus per-kind watch streams"""
+
+    def __init__(self, transport, namespace: str = "sas-viya",
+                 metrics_interval: float = 60, watch_timeout: int = 300,
+                 output=None):
+        self.transport = transport
+        self.namespace = namespace
+        self.metrics_interval = metrics_interval
+        self.watch_timeout = watch_timeout
+        self.output = output or sys.stdout
+
+        self.model = ClusterModel()
+        self.resource_versions = {}
+        self.redraws = 0
+        # Watch threads only enqueue; the model is touched by the caller's thread
+        self._updates = queue.Queue()
+        self._stop = threading.Event()
+        self._threads = []
+        self._next_metrics = 0.0
+
+    def _list(self, kind: str, field_selector: Optional[str]) -> Optional[str]:
+        data = self.transport.list(kind, self.namespace, field_selector=field_selector)
+        if data is None:
+            return None
+        self._updates.put(('RELIST', kind, data.get('items', [])))
+        return data.get('metadata', {}).get('resourceVersion')
+
+    def _follow(self, kind: str, field_selector: Optional[str]):
+        """Watch one kind forever, resuming from the last seen resourceVersion"""
+        resource_version = self.resource_versions[kind]
+        backoff = 1
+        while not self._stop.is_set():
+            # Only a watch that delivered events resets the backoff; errors,
+            # failed relists and watches that end empty wait and double it so
+            # the API server is not hammered
+            delivered = failed = relisted = False
+            try:
+                for event in self.transport.watch(
+                        kind, self.namespace, resource_version,
+                        field_selector=field_selector,
+                        timeout_seconds=self.watch_timeout):
+                    if self._stop.is_set():
+                        return
+                    if event['type'] == 'ERROR':
+                        # 410 Gone: our resourceVersion was compacted away; resync
+                        listed = None
+                        if event['object'].get('code') == 410:
+                            listed = self._list(kind, field_selector)
+                        if listed is None:
+                            failed = True
+                        else:
+                            resource_version, relisted = listed, True
+                        break
+                    resource_version = event['object']['metadata'].get(
+                        'resourceVersion', resource_version)
+                    delivered = True
+                    if event['type'] != 'BOOKMARK':
+                        self._updates.put(('EVENT', kind, event))
+            except (OSError, http.client.HTTPException, ValueError, TransportError):
+                failed = True
+            if failed or not (delivered or relisted):
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            elif delivered:
+                backoff = 1
+
+    def _poll_metrics(self) -> bool:
+        if time.monotonic() < self._next_metrics:
+            return False
+        self._next_metrics = time.monotonic() + self.metrics_interval
+        data = self.transport.list('podmetrics', self.namespace)
+        return data is not None and self.model.set_top_pods(data.get('items', []))
+
+    def start(self):
+        """List every watched kind once and start following their watch streams"""
+        for kind, field_selector in WATCHED:
+            resource_version = self._list(kind, field_selector)
+            if resource_version is None:
+                raise RuntimeError(f"Cannot list {kind} in {self.namespace}")
+            self.resource_versions[kind] = resource_version
+
+        for kind, field_selector in WATCHED:
+            thread = threading.Thread(target=self._follow, args=(kind, field_selector),
+                                      name=f"watch-{kind}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+
+    def step(self, timeout: float = 1.0) -> bool:
+        """Apply pending updates; redraw and return True if anything visible changed"""
+        changed = self._poll_metrics()
+        try:
+            update = self._updates.get(timeout=timeout)
+        except queue.Empty:
+            update = None
+
+        # Drain everything queued so a burst of events costs one redraw
+        while update is not None:
+            action, kind, payload = update
+            if action == 'RELIST':
+                changed |= self.model.replace(kind, payload)
+            else:
+                changed |= self.model.apply(kind, payload)
+            try:
+                update = self._updates.get_nowait()
+            except queue.Empty:
+                update = None
+
+        if changed or self.redraws == 0:
+            self.output.write(CLEAR_SCREEN + self.model.render(self.namespace))
+            self.output.flush()
+            self.redraws += 1
+            return True
+        return False
+
+    def run(self):
+        self.start()
+        try:
+            while True:
+                self.step(timeout=min(self.metrics_interval, 5))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Watch-driven SAS Viya monitoring dashboard')
+    parser.add_argument('--namespace', default='sas-viya', help='Kubernetes namespace')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='auto',
+                        help='Read cluster state via the API server directly, kubectl, '
+                             'or the API with kubectl fallback')
+    parser.add_argument('--metrics-interval', type=float, default=60,
+                        help='Seconds between metrics polls (metrics cannot be watched)')
+    args = parser.parse_args()
+
+    monitor = WatchMonitor(make_transport(args.transport), args.namespace,
+                           metrics_interval=args.metrics_interval)
+    monitor.run()
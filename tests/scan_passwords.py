@@ -4,16 +4,374 @@ SAS Viya Repository Password Scanner
 Scans files for hardcoded passwords and sensitive credentials
 """
 
+import hashlib
+import json
+import mmap
 import os
 import re
+import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
+
+# Files handed to a worker process at a time when scanning in parallel
+BATCH_SIZE = 64
+
+# Literals every credential pattern contains one of, longest first. Lines
+# without any of them cannot match and are never given to the patterns
+KEYWORDS = ('password', 'passwd', 'secret', 'token', 'pwd', 'key', '://')
+
+# Bytes of a mapped file lowercased at a time for the keyword prefilter
+CHUNK_SIZE = 1 << 20
+
+# Bump when a change to the scanning code alters what a file's findings are,
+# so cached findings from older runs are dropped
+CACHE_VERSION = 1
+
+# Blobs in history larger than this are read past without being scanned
+MAX_BLOB_SIZE = 32 << 20
+
+# Tree entry modes of regular files; symlinks and submodules are not scanned
+BLOB_MODES = (b'100644', b'100755')
+
+# The scanner of the current worker process, set by _init_worker
+_worker_scanner = None
+
+def required_keyword(pattern: str):
+    """
+    A keyword every match of the pattern contains, or None.
+    
+    Only a keyword outside any group, character class or alternation and
+    not followed by a quantifier is certain to be part of each match.
+    """
+    if '|' in pattern:
+        return None
+    lowered = pattern.lower()
+    for keyword in KEYWORDS:
+        start = lowered.find(keyword)
+        while start != -1:
+            before = lowered[:start]
+            end = start + len(keyword)
+            if before.count('(') == before.count(')') and \
+                    before.count('[') == before.count(']') and \
+                    lowered[end:end + 1] not in ('?', '*', '{'):
+                return keyword
+            start = lowered.find(keyword, start + 1)
+    return None
+
+class LineIndex:
+    """Line numbers of offsets into a buffer, counting newlines only as far as asked"""
+    
+    def __init__(self, buffer, chunk_size: int = CHUNK_SIZE):
+        self.buffer = buffer
+        self.chunk_size = chunk_size
+        # Newlines before self.offset have been counted
+        self.offset = 0
+        self.line = 1
+    
+    def line_at(self, offset: int) -> int:
+        if offset < self.offset:
+            self.offset, self.line = 0, 1
+        while self.offset < offset:
+            end = min(offset, self.offset + self.chunk_size)
+            self.line += self.buffer[self.offset:end].count(b'\n')
+            self.offset = end
+        return self.line
+
+class CredentialMatcher:
+    """
+    Matches credential patterns with one prefilter pass over the text.
+    
+    The prefilter is a single alternation of the patterns' keywords, run
+    over the lowercased text. Only lines it hits are given to the patterns,
+    and only to those whose keyword is on the line. A pattern with no
+    certain keyword makes every line a candidate.
+    """
+    
+    def __init__(self, patterns: List[Tuple[str, str]]):
+        self.patterns = [(re.compile(pattern, re.IGNORECASE), description)
+                         for pattern, description in patterns]
+        # The same patterns for scanning mapped files as bytes
+        self.byte_patterns = [(re.compile(pattern.encode(), re.IGNORECASE), description)
+                              for pattern, description in patterns]
+        # keyword -> indices of the patterns it gates, in pattern order
+        by_keyword: Dict[str, List[int]] = {}
+        self.unfiltered = False
+        for index, (pattern, _) in enumerate(patterns):
+            keyword = required_keyword(pattern)
+            if keyword is None:
+                self.unfiltered = True
+            else:
+                by_keyword.setdefault(keyword, []).append(index)
+        # Plain literals without groups or flags keep the regex engine's
+        # literal fast path, which a case-insensitive search loses
+        self._gated = by_keyword
+        alternation = '|'.join(re.escape(keyword) for keyword in
+                               sorted(by_keyword, key=len, reverse=True)) or '(?!)'
+        self.prefilter = re.compile(alternation)
+        self._prefilter_any_case = re.compile(alternation, re.IGNORECASE)
+        self.byte_prefilter = re.compile(alternation.encode())
+        # Chunks overlap so a keyword across a chunk boundary is still found
+        self._overlap = max(map(len, by_keyword), default=1) - 1
+        self._all = list(range(len(self.patterns)))
+    
+    def _gated_by(self, line) -> List[int]:
+        """Indices of the patterns whose keyword the lowercased line contains"""
+        if isinstance(line, bytes):
+            line = line.decode('latin-1')
+        return sorted(index for keyword, indices in self._gated.items() if keyword in line
+                      for index in indices)
+    
+    def _candidates(self, text: str) -> Iterator[Tuple[int, int, List[int]]]:
+        """(start, end, pattern indices) of each line that may hold a match"""
+        if self.unfiltered:
+            start = 0
+            while start < len(text):
+                end = text.find('\n', start) + 1 or len(text)
+                yield start, end, self._all
+                start = end
+            return
+        lowered = text.lower()
+        prefilter = self.prefilter
+        if len(lowered) != len(text):
+            # A few characters lowercase to two; offsets must stay aligned
+            lowered, prefilter = text, self._prefilter_any_case
+        hit = prefilter.search(lowered)
+        while hit is not None:
+            start = text.rfind('\n', 0, hit.start()) + 1
+            end = text.find('\n', hit.end()) + 1 or len(text)
+            # Keywords can overlap ("secretoken"), so the whole line is checked
+            yield start, end, self._gated_by(text[start:end].lower())
+            hit = prefilter.search(lowered, end)
+    
+    def _buffer_candidates(self, buffer, chunk_size: int) -> Iterator[Tuple[int, int, List[int]]]:
+        """(start, end, pattern indices) of each candidate line of a bytes buffer"""
+        size = len(buffer)
+        if self.unfiltered:
+            start = 0
+            while start < size:
+                end = buffer.find(b'\n', start) + 1 or size
+                yield start, end, self._all
+                start = end
+            return
+        # End of the last candidate line; later hits before it are on that line
+        done = 0
+        for chunk_start in range(0, size, chunk_size):
+            chunk_end = min(size, chunk_start + chunk_size)
+            if done >= chunk_end:
+                continue
+            window = buffer[chunk_start:chunk_end + self._overlap].lower()
+            hit = self.byte_prefilter.search(window, max(done - chunk_start, 0))
+            while hit is not None and chunk_start + hit.start() < chunk_end:
+                offset = chunk_start + hit.start()
+                start = buffer.rfind(b'\n', 0, offset) + 1
+                done = buffer.find(b'\n', offset) + 1 or size
+                yield start, done, self._gated_by(buffer[start:done].lower())
+                if done >= chunk_end:
+                    break
+                hit = self.byte_prefilter.search(window, done - chunk_start)
+    
+    def scan_buffer(self, buffer, chunk_size: int = CHUNK_SIZE
+                    ) -> Iterator[Tuple[int, int, int, str, re.Match]]:
+        """
+        Yield (line number, line start, line end, description, match) from a
+        bytes-like buffer such as a mapped file. Patterns run on the buffer
+        in place; line numbers are counted only once something matches.
+        """
+        lines = None
+        for start, end, indices in self._buffer_candidates(buffer, chunk_size):
+            for index in indices:
+                pattern, description = self.byte_patterns[index]
+                for match in pattern.finditer(buffer, start, end):
+                    if lines is None:
+                        lines = LineIndex(buffer, chunk_size)
+                    yield lines.line_at(start), start, end, description, match
+    
+    def scan(self, text: str) -> Iterator[Tuple[int, str, str, re.Match]]:
+        """Yield (line number, line, description, match) in line then pattern order"""
+        line_num, counted = 1, 0
+        for start, end, indices in self._candidates(text):
+            line_num += text.count('\n', counted, start)
+            counted = start
+            line = text[start:end]
+            for index in indices:
+                pattern, description = self.patterns[index]
+                for match in pattern.finditer(line):
+                    yield line_num, line, description, match
+
+def _init_worker(scanner):
+    global _worker_scanner
+    _worker_scanner = scanner
+
+def _scan_batch(items: List[Tuple[Path, Optional[str]]]) -> List[Tuple]:
+    """Scan a batch of (path, known content hash) in a worker process"""
+    return [_worker_scanner.rescan(path, digest) for path, digest in items]
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ScanCache:
+    """
+    Findings of earlier runs, stored as one JSON file.
+    
+    Entries are keyed on a file's relative path and hold its size, mtime
+    and content hash. The whole cache is only valid for the scanner
+    fingerprint it was written with. Only the files seen by the current
+    run are saved, so entries of deleted or newly skipped files are dropped.
+    """
+    
+    def __init__(self, path: str, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        # relative path -> [size, mtime_ns, sha256, findings]
+        self.entries: Dict[str, List] = {}
+        self.current: Dict[str, List] = {}
+        self.reused = 0
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION and data.get('fingerprint') == fingerprint:
+                self.entries = data['files']
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+    
+    def lookup(self, name: str, stat: os.stat_result) -> Optional[List[Dict]]:
+        """Cached findings if the file's size and mtime are unchanged"""
+        entry = self.entries.get(name)
+        if entry is None or entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+            return None
+        self.current[name] = entry
+        self.reused += 1
+        return entry[3]
+    
+    def digest(self, name: str) -> Optional[str]:
+        entry = self.entries.get(name)
+        return entry[2] if entry else None
+    
+    def store(self, name: str, stat: os.stat_result, digest: str,
+              findings: Optional[List[Dict]]) -> List[Dict]:
+        """Record a rescanned file; findings None means its content hash was unchanged"""
+        if findings is None:
+            findings = self.entries[name][3]
+            self.reused += 1
+        self.current[name] = [stat.st_size, stat.st_mtime_ns, digest, findings]
+        return findings
+    
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'fingerprint': self.fingerprint,
+                       'files': self.current}, f)
+        os.replace(temp_path, self.path)
+
+def _nul_fields(stream, block_size: int = 1 << 16) -> Iterator[bytes]:
+    """The NUL-terminated fields of a stream, read a block at a time"""
+    rest = b''
+    for block in iter(lambda: stream.read(block_size), b''):
+        fields = (rest + block).split(b'\0')
+        rest = fields.pop()
+        yield from fields
+    if rest:
+        yield rest
+
+def history_blobs(repo_path: Path,
+                  refs: Optional[List[str]] = None) -> Iterator[Tuple[str, str, str]]:
+    """
+    Yield (commit, path, blob id) for each regular file a commit adds or
+    changes, oldest commit first, streamed from `git log --raw`.
+
+    Merges are diffed against their first parent, so content that only
+    appears in a conflict resolution is still seen. refs defaults to every
+    ref in the repository.
+    """
+    command = ['git', '-C', str(repo_path), 'log', '--reverse', '--format=%x01%H', '--raw', '-z',
+               '--no-renames', '--no-abbrev', '--diff-filter=AM', '--diff-merges=first-parent']
+    command += ['--end-of-options', *refs] if refs else ['--all']
+    command.append('--')
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        commit = mode = blob = None
+        for field in _nul_fields(process.stdout):
+            field = field.lstrip(b'\n')
+            if field.startswith(b'\x01'):
+                commit, blob = field[1:].decode(), None
+            elif field.startswith(b':'):
+                # ":<old mode> <new mode> <old blob> <new blob> <status>", then the path
+                _, mode, _, blob, _ = field[1:].split(b' ')
+            elif blob is not None:
+                if mode in BLOB_MODES:
+                    yield commit, os.fsdecode(field), blob.decode()
+                blob = None
+        error = process.stderr.read()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, command, stderr=error)
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.stderr.close()
+        process.wait()
+
+class GitBlobReader:
+    """Reads blobs by id through one long-lived `git cat-file --batch` process"""
+    
+    def __init__(self, repo_path: Path, max_size: int = MAX_BLOB_SIZE):
+        self.max_size = max_size
+        self.process = subprocess.Popen(['git', '-C', str(repo_path), 'cat-file', '--batch'],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    
+    def read(self, blob: str) -> Optional[bytes]:
+        """A blob's content, or None if it is missing or larger than max_size"""
+        self.process.stdin.write(blob.encode() + b'\n')
+        self.process.stdin.flush()
+        header = self.process.stdout.readline()
+        if not header:
+            raise OSError('git cat-file exited unexpectedly')
+        # "<id> blob <size>", or "<id> missing"
+        fields = header.split()
+        if len(fields) != 3:
+            return None
+        size = int(fields[2])
+        if size > self.max_size:
+            # Consumed in blocks so a huge blob is never held in memory
+            remaining = size + 1
+            while remaining:
+                block = self.process.stdout.read(min(remaining, CHUNK_SIZE))
+                if not block:
+                    raise OSError('git cat-file exited unexpectedly')
+                remaining -= len(block)
+            return None
+        content = self.process.stdout.read(size)
+        # Each blob is followed by a newline
+        self.process.stdout.read(1)
+        return content
+    
+    def close(self):
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
 
 class PasswordScanner:
-    def __init__(self, repo_path: str):
+    def __init__(self, repo_path: str, use_mmap: bool = False,
+                 cache_path: Optional[str] = None):
         self.repo_path = Path(repo_path)
         self.findings = []
+        # Map each file and match its bytes in place instead of decoding it
+        self.use_mmap = use_mmap
+        # Reuse findings of unchanged files from this cache file; it holds
+        # matched lines itself, so it is never scanned
+        self.cache_path = os.path.abspath(cache_path) if cache_path else None
         
         # File extensions to scan
         self.scan_extensions = {
@@ -62,11 +420,9 @@ class PasswordScanner:
             (r'://[^:]+:([^@]+)@', 'Credentials in Connection String'),
         ]
         
-        # Compile patterns for efficiency
-        self.compiled_patterns = [
-            (re.compile(pattern, re.IGNORECASE), desc) 
-            for pattern, desc in self.patterns
-        ]
+        # Compile patterns for efficiency; the matcher prefilters lines by keyword
+        self.matcher = CredentialMatcher(self.patterns)
+        self.compiled_patterns = self.matcher.patterns
         
         # Common false positives to filter out
         self.false_positives = {
@@ -76,6 +432,17 @@ class PasswordScanner:
             '${password}', '$PASSWORD', '{password}'
         }
     
+    def __getstate__(self):
+        # Worker processes get the configuration, not the findings so far
+        state = self.__dict__.copy()
+        state['findings'] = []
+        return state
+    
+    def fingerprint(self) -> str:
+        """Hash of the settings that decide a file's findings"""
+        settings = json.dumps([CACHE_VERSION, self.patterns, sorted(self.false_positives)])
+        return hashlib.sha256(settings.encode()).hexdigest()
+    
     def is_likely_false_positive(self, value: str) -> bool:
         """Check if the value is likely a placeholder or example"""
         if not value or len(value) < 3:
@@ -102,36 +469,70 @@ class PasswordScanner:
         findings = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
+            for line_num, line, description, credential in self._matches(file_path):
+                # Skip false positives
+                if self.is_likely_false_positive(credential):
+                    continue
                 
-            for line_num, line in enumerate(lines, 1):
-                for pattern, description in self.compiled_patterns:
-                    matches = pattern.finditer(line)
-                    for match in matches:
-                        # Extract the actual credential value if captured
-                        if match.groups():
-                            credential = match.group(1)
-                        else:
-                            credential = match.group(0)
-                        
-                        # Skip false positives
-                        if self.is_likely_false_positive(credential):
-                            continue
-                        
-                        findings.append({
-                            'file': str(file_path.relative_to(self.repo_path)),
-                            'line': line_num,
-                            'type': description,
-                            'content': line.strip(),
-                            'severity': self.get_severity(description)
-                        })
+                findings.append(self._finding(str(file_path.relative_to(self.repo_path)),
+                                              line_num, line, description))
         
         except Exception as e:
             print(f"Error scanning {file_path}: {e}", file=sys.stderr)
         
         return findings
     
+    def _finding(self, name: str, line_num: int, line: str, description: str) -> Dict:
+        return {
+            'file': name,
+            'line': line_num,
+            'type': description,
+            'content': line.strip(),
+            'severity': self.get_severity(description)
+        }
+    
+    def rescan(self, file_path: Path,
+               known_digest: Optional[str] = None) -> Tuple[Optional[str], Optional[List[Dict]]]:
+        """
+        Scan a file, returning its content hash and findings.
+        
+        With a cache the file is hashed first, and findings are None if the
+        hash is known_digest. Without one the hash is None.
+        """
+        if self.cache_path is None:
+            return None, self.scan_file(file_path)
+        try:
+            digest = file_digest(file_path)
+        except OSError:
+            return None, self.scan_file(file_path)
+        if digest == known_digest:
+            return digest, None
+        return digest, self.scan_file(file_path)
+    
+    def _matches(self, file_path: Path) -> Iterator[Tuple[int, str, str, str]]:
+        """(line number, line, description, credential) for each pattern match in a file"""
+        if not self.use_mmap:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+            for line_num, line, description, match in self.matcher.scan(text):
+                # Extract the actual credential value if captured
+                credential = match.group(1) if match.groups() else match.group(0)
+                yield line_num, line, description, credential
+            return
+        
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield from self._buffer_matches(buffer)
+    
+    def _buffer_matches(self, buffer) -> Iterator[Tuple[int, str, str, str]]:
+        """(line number, line, description, credential) for each match in a bytes buffer"""
+        for line_num, start, end, description, match in self.matcher.scan_buffer(buffer):
+            credential = match.group(1) if match.groups() else match.group(0)
+            yield (line_num, buffer[start:end].decode('utf-8', 'ignore'), description,
+                   credential.decode('utf-8', 'ignore'))
+    
     def get_severity(self, finding_type: str) -> str:
         """Determine severity based on finding type"""
         high_severity = ['password', 'secret key', 'aws secret']
@@ -146,17 +547,13 @@ class PasswordScanner:
         else:
             return 'LOW'
     
-    def scan_repository(self):
-        """Recursively scan the repository"""
-        if not self.repo_path.exists():
-            print(f"Error: Repository path '{self.repo_path}' does not exist")
-            sys.exit(1)
-        
-        print(f"Scanning repository: {self.repo_path}")
-        print("-" * 60)
-        
-        files_scanned = 0
-        
+    def wants(self, name: str) -> bool:
+        """Whether a file name has an extension that should be scanned"""
+        return os.path.splitext(name)[1].lower() in self.scan_extensions or \
+            name.startswith('.env')
+    
+    def iter_files(self) -> Iterator[Path]:
+        """Yield the files to scan, in directory walk order"""
         for root, dirs, files in os.walk(self.repo_path):
             # Skip excluded directories
             dirs[:] = [d for d in dirs if d not in self.skip_dirs]
@@ -165,12 +562,120 @@ class PasswordScanner:
                 file_path = Path(root) / file
                 
                 # Check if file extension should be scanned
-                if file_path.suffix.lower() in self.scan_extensions or file.startswith('.env'):
-                    files_scanned += 1
-                    file_findings = self.scan_file(file_path)
-                    self.findings.extend(file_findings)
+                if self.wants(file):
+                    if self.cache_path and os.path.abspath(file_path) == self.cache_path:
+                        continue
+                    yield file_path
+    
+    def scan_repository(self, jobs: int = 1, batch_size: int = BATCH_SIZE):
+        """
+        Recursively scan the repository.
         
-        print(f"\nScanned {files_scanned} files")
+        With jobs > 1 the files are scanned in batches on a pool of worker
+        processes (0 uses every CPU). Findings are merged back in walk
+        order, so the result is the same as a serial scan. With a cache,
+        files whose size and mtime, or else content hash, are unchanged
+        keep their cached findings.
+        """
+        if not self.repo_path.exists():
+            print(f"Error: Repository path '{self.repo_path}' does not exist")
+            sys.exit(1)
+        
+        print(f"Scanning repository: {self.repo_path}")
+        print("-" * 60)
+        
+        files = list(self.iter_files())
+        jobs = jobs or os.cpu_count() or 1
+        cache = ScanCache(self.cache_path, self.fingerprint()) if self.cache_path else None
+        
+        # Findings per file in walk order; None until the file is scanned
+        results: List[Optional[List[Dict]]] = [None] * len(files)
+        # (index, path, stat, relative name) of each file to scan
+        pending = []
+        for index, file_path in enumerate(files):
+            stat = name = None
+            if cache is not None:
+                name = str(file_path.relative_to(self.repo_path))
+                try:
+                    stat = file_path.stat()
+                except OSError:
+                    pass
+                else:
+                    results[index] = cache.lookup(name, stat)
+            if results[index] is None:
+                pending.append((index, file_path, stat, name))
+        
+        items = [(file_path, cache.digest(name) if stat is not None else None)
+                 for _, file_path, stat, name in pending]
+        if jobs > 1 and len(items) > batch_size:
+            batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                     initargs=(self,)) as pool:
+                scanned = [result for batch in pool.map(_scan_batch, batches)
+                           for result in batch]
+        else:
+            scanned = [self.rescan(file_path, digest) for file_path, digest in items]
+        
+        for (index, _, stat, name), (digest, findings) in zip(pending, scanned):
+            if cache is not None and stat is not None and digest is not None:
+                findings = cache.store(name, stat, digest, findings)
+            results[index] = findings
+        for findings in results:
+            self.findings.extend(findings)
+        
+        if cache is not None:
+            cache.save()
+            print(f"Reused cached results for {cache.reused} of {len(files)} files")
+        print(f"\nScanned {len(files)} files")
+        print(f"Found {len(self.findings)} potential issues\n")
+    
+    def scan_history(self, refs: Optional[List[str]] = None):
+        """
+        Scan the blobs of every commit reachable from refs (default: all refs).
+        
+        Commits are streamed oldest first from `git log`, and each blob a
+        commit adds at a path that would be scanned is read through one
+        `git cat-file --batch` process. A blob is scanned only the first
+        time it appears, however many commits or paths hold it, and its
+        findings name that commit and path. Memory grows with the number
+        of distinct blobs, about 100 bytes each for a 20-byte id in a set,
+        not with the number of commits.
+        """
+        print(f"Scanning history of: {self.repo_path}")
+        print("-" * 60)
+        
+        # Binary ids of the blobs already scanned
+        seen = set()
+        # Commits come in order, so counting changes of commit counts them
+        commits, last_commit = 0, None
+        try:
+            with GitBlobReader(self.repo_path) as reader:
+                for commit, path, blob in history_blobs(self.repo_path, refs):
+                    if commit != last_commit:
+                        commits, last_commit = commits + 1, commit
+                    parts = path.split('/')
+                    if not self.wants(parts[-1]) or self.skip_dirs.intersection(parts[:-1]):
+                        continue
+                    key = bytes.fromhex(blob)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    content = reader.read(blob)
+                    if not content:
+                        continue
+                    for line_num, line, description, credential in self._buffer_matches(content):
+                        if self.is_likely_false_positive(credential):
+                            continue
+                        finding = self._finding(path, line_num, line, description)
+                        finding['commit'] = commit
+                        self.findings.append(finding)
+        except (OSError, subprocess.CalledProcessError) as e:
+            detail = getattr(e, 'stderr', None)
+            print(f"Error: Cannot read git history of '{self.repo_path}': "
+                  f"{detail.decode().strip() if detail else e}")
+            sys.exit(1)
+        
+        print(f"\nScanned {len(seen)} unique blobs from {commits} commits")
         print(f"Found {len(self.findings)} potential issues\n")
     
     def generate_report(self):
@@ -190,6 +695,8 @@ class PasswordScanner:
         for finding in self.findings:
             print(f"\n[{finding['severity']}] {finding['type']}")
             print(f"File: {finding['file']}:{finding['line']}")
+            if 'commit' in finding:
+                print(f"Commit: {finding['commit']}")
             print(f"Content: {finding['content'][:100]}")
             print("-" * 60)
         
@@ -208,13 +715,28 @@ class PasswordScanner:
             print(f"\n⚠ WARNING: {high} high severity findings require immediate attention!")
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python scan_passwords.py <repository_path>")
-        sys.exit(1)
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Scan a repository for hardcoded credentials')
+    parser.add_argument('repo_path', help='Repository to scan')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Worker processes scanning files in parallel (0 uses every CPU)')
+    parser.add_argument('--mmap', action='store_true',
+                        help='Memory-map each file and match its bytes without decoding it')
+    parser.add_argument('--cache', default=None, metavar='FILE',
+                        help='Reuse findings of files unchanged since the run that wrote this file')
+    parser.add_argument('--history', action='store_true',
+                        help='Scan every blob in the git history instead of the working tree')
+    parser.add_argument('--ref', action='append', default=[], metavar='REF',
+                        help='With --history, scan commits reachable from REF (repeatable; '
+                             'default: all refs)')
+    args = parser.parse_args()
     
-    repo_path = sys.argv[1]
-    scanner = PasswordScanner(repo_path)
-    scanner.scan_repository()
+    scanner = PasswordScanner(args.repo_path, use_mmap=args.mmap, cache_path=args.cache)
+    if args.history:
+        scanner.scan_history(args.ref or None)
+    else:
+        scanner.scan_repository(jobs=args.jobs)
     scanner.generate_report()
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+"""
+Tests for the synthetic-namespace benchmark harness
+"""
+
+from kubectl_benchmark import (
+    CHECKS, SyntheticTransport, benchmark, find_regressions, load_baselines,
+    save_baselines, synthetic_namespace
+)
+from kubectl_health_checks import POD_HEALTH_FIELDS
+
+
+class TestSyntheticNamespace:
+    """Test the generated cluster state"""
+
+    def test_shape_and_determinism(self):
+        """Sizes scale with the pod count and a seed always gives the same namespace"""
+        namespace = synthetic_namespace(1000)
+
+        assert len(namespace['pods']) == 1000
+        assert len(namespace['services']) == len(namespace['endpoints']) == 50
+        assert len(namespace['events']) == 2000
+        assert synthetic_namespace(1000) == namespace
+
+    def test_paged_matches_list(self):
+        """Paged reads return the same items as a single list"""
+        transport = SyntheticTransport(synthetic_namespace(250))
+
+        paged = list(transport.iter_items('pods', limit=100, fields=POD_HEALTH_FIELDS))
+        listed = transport.list('pods', fields=POD_HEALTH_FIELDS)['items']
+        warnings = list(transport.iter_items('events', field_selector='type=Warning'))
+
+        assert paged == listed
+        assert len(paged) == 250
+        assert warnings and all(e['type'] == 'Warning' for e in warnings)
+
+
+class TestBenchmark:
+    """Test measurement and baseline comparison"""
+
+    def test_every_check_measured(self):
+        """Each check gets a timing and a peak memory figure per size"""
+        results = benchmark(sizes=(100,), repeat=1)
+
+        assert [r['check'] for r in results] == list(CHECKS)
+        assert all(r['seconds'] > 0 and r['peak_bytes'] > 0 for r in results)
+
+    def test_regressions_detected(self, tmp_path):
+        """Slowdowns and memory growth beyond tolerance are reported"""
+        path = str(tmp_path / 'baselines.json')
+        save_baselines([{'check': 'test_pod_health', 'pods': 10000, 'seconds': 0.3,
+                         'relative': 3.0, 'reference_seconds': 0.1,
+                         'peak_bytes': 4 * 2**20}], path)
+        baselines = load_baselines(path)
+
+        within = {'check': 'test_pod_health', 'pods': 10000, 'seconds': 0.5,
+                  'relative': 5.0, 'reference_seconds': 0.1, 'peak_bytes': 4 * 2**20}
+        slower = dict(within, seconds=0.9, relative=9.0)
+        larger = dict(within, peak_bytes=8 * 2**20)
+
+        assert find_regressions([within], baselines) == []
+        assert len(find_regressions([slower], baselines)) == 1
+        assert 'peak' in find_regressions([larger], baselines)[0]
+        assert find_regressions([dict(within, pods=50000)], baselines) == []
+
+    def test_slower_machine_not_a_regression(self):
+        """Timings are judged relative to the reference workload, not in seconds"""
+        baselines = {'test_pod_health/10000': {'relative': 3.0, 'peak_bytes': 4 * 2**20}}
+        # Four times slower across the board, the reference workload included
+        slow_runner = {'check': 'test_pod_health', 'pods': 10000, 'seconds': 1.2,
+                       'relative': 3.0, 'reference_seconds': 0.4, 'peak_bytes': 4 * 2**20}
+
+        assert find_regressions([slow_runner], baselines) == []
+        # Baselines that only hold seconds are from one machine and not compared
+        legacy = {'test_pod_health/10000': {'seconds': 0.01, 'peak_bytes': 4 * 2**20}}
+        assert find_regressions([slow_runner], legacy) == []
@@ -0,0 +1,90 @@
+"""
+Tests for the CAS topology checks
+"""
+
+import json
+import time
+
+from fake_kube_api import FakeKubeApiServer
+from kubectl_cas import CAS_QUERIES, CasChecker
+from kubectl_snapshot import ClusterSnapshot
+from kubectl_transport import ApiTransport, KubectlTransport
+
+
+def cas_pod(name, role, node, ip, ready=True):
+    return {
+        'metadata': {'name': name,
+                     'labels': {'app.kubernetes.io/name': f"sas-cas-server-default-{role}"}},
+        'spec': {'nodeName': node},
+        'status': {'phase': 'Running' if ready else 'Pending', 'podIP': ip,
+                   'containerStatuses': [{'ready': ready}]},
+    }
+
+
+def cas_cluster(workers, crowded_node=None):
+    """A controller plus one worker per node, two on crowded_node"""
+    server = FakeKubeApiServer()
+    pods = [cas_pod('sas-cas-server-default-controller', 'controller', 'node-0', '10.0.0.1')]
+    for i in range(workers):
+        node = crowded_node if crowded_node and i < 2 else f"node-{i + 1}"
+        pods.append(cas_pod(f"sas-cas-server-default-worker-{i}", 'worker', node,
+                            f"10.1.{i // 256}.{i % 256}"))
+    pods.append({'metadata': {'name': 'sas-logon-app-0', 'labels': {}}, 'spec': {},
+                 'status': {'phase': 'Running'}})
+    server.add('pods', pods, namespace='sas-viya')
+    server.add('endpoints', [{
+        'metadata': {'name': 'sas-cas-server-default-client'},
+        'subsets': [{'addresses': [{'ip': p['status']['podIP']} for p in pods[:-1]]}],
+    }], namespace='sas-viya')
+    server.add('pvc', [{'metadata': {'name': 'cas-default-data'}, 'status': {'phase': 'Bound'}}],
+               namespace='sas-viya')
+    server.add('podmetrics', [{
+        'metadata': {'name': 'sas-cas-server-default-controller'},
+        'containers': [{'usage': {'cpu': '500m', 'memory': '4Gi'}}],
+    }], namespace='sas-viya')
+    return server
+
+
+def check(server, **kwargs):
+    snapshot = ClusterSnapshot('sas-viya', transport=ApiTransport(server.url))
+    return CasChecker(snapshot, **kwargs).run()
+
+
+class TestCasChecker:
+    """Test topology checks on a large worker set"""
+
+    def test_healthy_topology(self):
+        """150 workers on their own nodes pass, read in one request per kind"""
+        with cas_cluster(150) as server:
+            result = check(server)
+
+            assert result.passed, result.details
+            assert len(server.requests) == len(CAS_QUERIES)
+        assert result.details['workers_ready'] == 150
+        assert len(result.details['worker_nodes']) == 150
+        assert result.details['usage'][0]['cpu'] == '500m'
+
+    def test_skew_and_missing_endpoints_fail(self):
+        """Workers stacked on a node and pods outside the endpoints are reported"""
+        with cas_cluster(4, crowded_node='node-9') as server:
+            server.emit('pods', 'ADDED', cas_pod('sas-cas-server-default-worker-9', 'worker',
+                                                 'node-9', '10.9.9.9'), namespace='sas-viya')
+            result = check(server)
+
+        assert not result.passed
+        assert result.details['worker_skew'] == 2
+        assert result.details['crowded_nodes']['node-9'][-1] == 'sas-cas-server-default-worker-9'
+        assert result.details['pods_missing_from_endpoints'] == ['sas-cas-server-default-worker-9']
+
+    def test_batch_is_concurrent(self):
+        """All CAS inputs are read in about one call's time"""
+        def slow_kubectl(command):
+            time.sleep(0.2)
+            return True, json.dumps({'items': []})
+
+        started = time.perf_counter()
+        result = CasChecker(ClusterSnapshot(
+            'sas-viya', transport=KubectlTransport(runner=slow_kubectl))).run()
+
+        assert time.perf_counter() - started < 0.2 * len(CAS_QUERIES) / 2
+        assert not result.passed and result.details['controllers'] == {}
@@ -0,0 +1,173 @@
+"""
+Tests for incremental warning event ingestion
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from fake_kube_api import FakeKubeApiServer
+from kubectl_events import WarningEvents
+from kubectl_health_checks import SASViyaKubectlTester
+from kubectl_transport import ApiTransport, KubectlTransport
+
+
+def event(name, obj, reason, count, last, message='back-off restarting failed container'):
+    return {
+        'metadata': {'name': name, 'uid': f"uid-{name}"},
+        'involvedObject': {'kind': 'Pod', 'name': obj},
+        'type': 'Warning',
+        'reason': reason,
+        'message': message,
+        'count': count,
+        'firstTimestamp': '2024-05-01T10:00:00Z',
+        'lastTimestamp': last,
+    }
+
+
+@pytest.fixture
+def api_server():
+    server = FakeKubeApiServer()
+    # API order is not time order: the newest event is listed first
+    server.add('events', [
+        event('a', 'sas-files-0', 'BackOff', 7, '2024-05-01T12:00:00Z'),
+        event('b', 'sas-logon-app-0', 'Unhealthy', 2, '2024-05-01T10:30:00Z'),
+        event('c', 'sas-files-0', 'FailedMount', 1, '2024-05-01T11:00:00Z'),
+    ], namespace='sas-viya')
+    with server:
+        yield server
+
+
+class SilentWatchTransport:
+    """Delegates to a transport, except that every watch ends without an event"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def watch(self, *args, **kwargs):
+        return iter(())
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+def check_events(server, state_dir, transport=None):
+    """Run the events check as a fresh process would, with the same state directory"""
+    transport = transport or ApiTransport(server.url)
+    tester = SASViyaKubectlTester("sas-viya", transport=transport, state_dir=str(state_dir))
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = tester.test_recent_events()
+    transport.close()
+    return result
+
+
+def event_requests(server):
+    return [path for path in server.requests if '/events' in path]
+
+
+class TestIncrementalEvents:
+    """Test that later runs only read what changed since the saved cursor"""
+
+    def test_newest_and_most_frequent(self, api_server, tmp_path):
+        """Warnings are ordered by time and by count, not API order"""
+        result = check_events(api_server, tmp_path)
+
+        assert [w['reason'] for w in result['warnings']] == ['BackOff', 'FailedMount', 'Unhealthy']
+        assert result['most_frequent'][0]['count'] == 7
+
+    def test_second_run_resumes_watch(self, api_server, tmp_path):
+        """Only changes since the cursor are read, and repeats add their increase"""
+        check_events(api_server, tmp_path)
+        listed = event_requests(api_server)
+
+        api_server.emit('events', 'MODIFIED', event(
+            'b', 'sas-logon-app-0', 'Unhealthy', 12, '2024-05-01T13:00:00Z',
+            message='Readiness probe failed'), namespace='sas-viya')
+        api_server.emit('events', 'ADDED', event(
+            'd', 'sas-logon-app-0', 'Unhealthy', 3, '2024-05-01T13:05:00Z'), namespace='sas-viya')
+        result = check_events(api_server, tmp_path)
+
+        new_requests = event_requests(api_server)[len(listed):]
+        assert len(new_requests) == 1 and 'watch=1' in new_requests[0]
+        newest = result['warnings'][0]
+        assert (newest['object'], newest['reason'], newest['count']) == \
+            ('sas-logon-app-0', 'Unhealthy', 15)
+        assert result['most_frequent'][0]['reason'] == 'Unhealthy'
+
+    def test_compacted_cursor_relists_without_double_counting(self, api_server, tmp_path):
+        """A 410 falls back to a full list that only adds increases"""
+        check_events(api_server, tmp_path)
+        api_server.emit('events', 'MODIFIED', event(
+            'a', 'sas-files-0', 'BackOff', 9, '2024-05-01T12:30:00Z'), namespace='sas-viya')
+        api_server.compact()
+
+        result = check_events(api_server, tmp_path)
+
+        counts = {(w['object'], w['reason']): w['count'] for w in result['warnings']}
+        assert counts[('sas-files-0', 'BackOff')] == 9
+        assert counts[('sas-logon-app-0', 'Unhealthy')] == 2
+
+    def test_quiet_namespace_resumes_from_list_version(self, api_server, tmp_path):
+        """The cursor is the list's resourceVersion, not the newest event's"""
+        # Other objects change after the last warning; compaction then
+        # passes every event's own resourceVersion
+        for i in range(3):
+            api_server.emit('pods', 'ADDED', {'metadata': {'name': f"sas-files-{i}"}},
+                            namespace='sas-viya')
+        api_server.compact()
+        check_events(api_server, tmp_path)
+        listed = event_requests(api_server)
+
+        result = check_events(api_server, tmp_path)
+
+        new_requests = event_requests(api_server)[len(listed):]
+        assert len(new_requests) == 1 and 'watch=1' in new_requests[0]
+        assert len(result['warnings']) == 3
+
+    def test_silent_watch_relists(self, api_server, tmp_path):
+        """A watch without events or a bookmark is not taken as caught up"""
+        check_events(api_server, tmp_path)
+        api_server.emit('events', 'MODIFIED', event(
+            'a', 'sas-files-0', 'BackOff', 9, '2024-05-01T12:30:00Z'), namespace='sas-viya')
+        listed = event_requests(api_server)
+
+        result = check_events(api_server, tmp_path,
+                              SilentWatchTransport(ApiTransport(api_server.url)))
+
+        new_requests = event_requests(api_server)[len(listed):]
+        assert new_requests and 'watch=1' not in new_requests[0]
+        assert result['warnings'][0]['count'] == 9
+
+    def test_unreachable_cluster_fails(self, api_server, tmp_path):
+        """With a saved cursor, an unreachable cluster is reported, not stale aggregates"""
+        check_events(api_server, tmp_path)
+        unreachable = KubectlTransport(runner=lambda command: (False, ''))
+
+        result = check_events(api_server, tmp_path, SilentWatchTransport(unreachable))
+
+        assert result == {"status": "FAILED", "error": "Cannot get events"}
+
+    def test_failed_kubectl_watch_fails(self, api_server, tmp_path, failing_kubectl):
+        """A kubectl watch that exits non-zero leads to a list, which fails too"""
+        check_events(api_server, tmp_path)
+
+        result = check_events(api_server, tmp_path,
+                              KubectlTransport(runner=lambda command: (False, '')))
+
+        assert result == {"status": "FAILED", "error": "Cannot get events"}
+
+
+class TestWarningEvents:
+    """Test aggregation and retention"""
+
+    def test_retention_prunes_old_groups(self):
+        """Groups older than the window before the newest warning are dropped"""
+        events = WarningEvents(retention=3600)
+        events.apply(event('a', 'sas-files-0', 'BackOff', 1, '2024-05-01T08:00:00Z'))
+        events.apply(event('b', 'sas-files-0', 'FailedMount', 1, '2024-05-01T12:00:00Z'))
+
+        events.prune()
+
+        assert list(events.aggregates) == [('sas-files-0', 'FailedMount')]
+        assert list(events.seen) == ['uid-b']
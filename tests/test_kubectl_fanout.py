@@ -0,0 +1,91 @@
+"""
+Tests for the multi-target runner using one fake API server per cluster
+"""
+
+import sys
+
+import pytest
+
+from fake_kube_api import FakeKubeApiServer
+from kubectl_fanout import FanOutRunner, Target, parse_target
+from kubectl_transport import ApiTransport
+
+
+def pod(name, phase='Running', labels=None):
+    return {'metadata': {'name': name, 'labels': labels or {}},
+            'status': {'phase': phase, 'containerStatuses': [{'ready': True}]}}
+
+
+def controller():
+    return pod('sas-cas-server-default-controller',
+               labels={'app.kubernetes.io/name': 'sas-cas-server-default-controller'})
+
+
+@pytest.fixture
+def clusters():
+    east, west = FakeKubeApiServer(), FakeKubeApiServer()
+    east.add('pods', [pod('sas-logon-app-0'), controller()], namespace='sas-viya')
+    east.add('pods', [pod('sas-logon-app-0', phase='Pending'), controller()],
+             namespace='sas-dev')
+    east.add('namespace', [{'metadata': {'name': 'sas-viya'}}, {'metadata': {'name': 'sas-dev'}}])
+    west.add('pods', [pod('sas-logon-app-0'), controller()], namespace='sas-viya')
+    west.add('namespace', [{'metadata': {'name': 'sas-viya'}}])
+    with east, west:
+        yield {'east': east, 'west': west}
+
+
+class TestFanOutRunner:
+    """Test concurrent multi-target runs"""
+
+    def test_parse_target(self):
+        """Targets are context/namespace, or a bare namespace"""
+        assert parse_target('eks-prod/sas-viya') == Target('eks-prod', 'sas-viya')
+        assert parse_target('sas-viya') == Target(None, 'sas-viya')
+
+    def test_merged_results_per_target(self, clusters):
+        """Each target reports its own pass/fail, in the order given"""
+        created = []
+
+        def factory(context):
+            created.append(context)
+            return ApiTransport(clusters[context].url)
+
+        targets = [Target('east', 'sas-viya'), Target('east', 'sas-dev'), Target('west', 'sas-viya')]
+        results = FanOutRunner(targets, per_cluster=2, transport_factory=factory).run()
+
+        assert [(r['context'], r['namespace']) for r in results] == \
+            [('east', 'sas-viya'), ('east', 'sas-dev'), ('west', 'sas-viya')]
+        assert [r['passed'] for r in results] == [True, False, True]
+        assert 'Pending: 1' in results[1]['output']
+        # One transport (and connection pool) per cluster
+        assert sorted(created) == ['east', 'west']
+
+    def test_unreachable_cluster_isolated(self, clusters):
+        """A failing transport fails only its own targets"""
+        def factory(context):
+            if context == 'gone':
+                raise OSError("connection refused")
+            return ApiTransport(clusters[context].url)
+
+        results = FanOutRunner(
+            [Target('gone', 'sas-viya'), Target('west', 'sas-viya')],
+            transport_factory=factory).run()
+
+        assert results[0]['passed'] is False
+        assert 'connection refused' in results[0]['error']
+        assert results[1]['passed'] is True
+
+    def test_concurrent_checks_keep_output_per_target(self, clusters, capsys):
+        """Targets running their checks concurrently neither lose nor leak output"""
+        targets = [Target(context, namespace)
+                   for context, namespace in [('east', 'sas-viya'), ('east', 'sas-dev'),
+                                              ('west', 'sas-viya')] * 2]
+        stdout = sys.stdout
+        for _ in range(3):
+            results = FanOutRunner(
+                targets, per_cluster=3, check_workers=4,
+                transport_factory=lambda context: ApiTransport(clusters[context].url)).run()
+
+            assert [r['output'].count('Testing Pod Health') for r in results] == [1] * 6
+            assert capsys.readouterr().out == ''
+            assert sys.stdout is stdout
@@ -0,0 +1,161 @@
+"""
+Tests for SASViyaKubectlTester against canned kubectl output
+"""
+
+import json
+import time
+
+import pytest
+
+from kubectl_health_checks import POD_HEALTH_FIELDS, POD_RESOURCE_FIELDS, SASViyaKubectlTester
+from kubectl_snapshot import ClusterSnapshot
+
+
+CANNED = {
+    'namespace': {'items': [{'metadata': {'name': 'sas-viya'}}]},
+    # Answer to the CAS controller's label-selected pod list
+    'cas-controller': {'items': [
+        {'metadata': {'name': 'sas-cas-server-default-controller'},
+         'status': {'phase': 'Running', 'containerStatuses': [{'ready': True}]}},
+    ]},
+    'pods': {'items': [
+        {'metadata': {'name': 'sas-logon-app-0'},
+         'spec': {'nodeName': 'node-1',
+                  'containers': [{'resources': {'limits': {'cpu': '2', 'memory': '2Gi'}}}]},
+         'status': {'phase': 'Running', 'containerStatuses': [{'ready': True}]}},
+    ]},
+    'pvc': {'items': [
+        {'metadata': {'name': 'sas-cas-server-data'}, 'status': {'phase': 'Bound'}},
+    ]},
+    'services': {'items': [{'metadata': {'name': 'sas-logon-app'}}]},
+    'endpoints': {'items': [
+        {'metadata': {'name': 'sas-logon-app'},
+         'subsets': [{'addresses': [{'ip': '10.0.0.1'}]}]},
+    ]},
+    'ingress': {'items': []},
+    'events': {'items': []},
+    'podmetrics': {'items': [
+        {'metadata': {'name': 'sas-logon-app-0'},
+         'containers': [{'usage': {'cpu': '250m', 'memory': '512Mi'}}]},
+    ]},
+    'nodemetrics': {'items': [
+        {'metadata': {'name': 'node-1'}, 'usage': {'cpu': '1500m', 'memory': '6Gi'}},
+    ]},
+    'nodes': {'items': [
+        {'metadata': {'name': 'node-1'},
+         'status': {'allocatable': {'cpu': '4', 'memory': '16Gi'}}},
+    ]},
+}
+
+
+class SlowRunner:
+    """Fake kubectl that answers from CANNED after a fixed delay"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, command):
+        self.calls.append(command)
+        time.sleep(self.delay)
+        words = command.split()
+        if words[2] == '--raw':
+            # Paginated list of a streamed kind: .../namespaces/sas-viya/<kind>?limit=...
+            kind = command.split('?')[0].rsplit('/', 1)[1]
+            if 'metrics.k8s.io' in command:
+                kind = 'podmetrics'
+            return True, json.dumps(CANNED[kind])
+        if '-l' in words:
+            return True, json.dumps(CANNED['cas-controller'])
+        return True, json.dumps(CANNED[words[2]])
+
+
+@pytest.fixture
+def make_tester():
+    def factory(delay=0.0):
+        runner = SlowRunner(delay)
+        tester = SASViyaKubectlTester(
+            "sas-viya", snapshot=ClusterSnapshot("sas-viya", runner=runner)
+        )
+        tester.run_kubectl = runner
+        return tester, runner
+    return factory
+
+
+class TestRunAllTests:
+    """Test sequential and concurrent execution"""
+
+    def test_sequential_run_passes(self, make_tester):
+        """All checks pass against a healthy namespace"""
+        tester, _ = make_tester()
+
+        assert tester.run_all_tests()
+        assert [t.test for t in tester.test_results] == [
+            'Namespace', 'CAS Controller', 'Pod Health', 'Persistent Volumes', 'Services',
+            'Ingress', 'Resource Usage'
+        ]
+
+    def test_missing_metrics_do_not_fail(self, make_tester):
+        """Without metrics-server the run passes and Resource Usage records nothing"""
+        tester, runner = make_tester()
+        answer = runner.__call__
+        tester.snapshot.transport.runner = lambda command: (
+            (False, '') if 'metrics' in command else answer(command))
+
+        assert tester.run_all_tests()
+        assert 'Resource Usage' not in [t.test for t in tester.test_results]
+
+    def test_concurrent_results_in_declaration_order(self, make_tester, capsys):
+        """Concurrent mode keeps result and output order deterministic"""
+        sequential, _ = make_tester()
+        sequential.run_all_tests()
+        expected_output = capsys.readouterr().out
+
+        concurrent, _ = make_tester()
+        assert concurrent.run_all_tests(workers=6)
+        output = capsys.readouterr().out
+
+        assert [t.test for t in concurrent.test_results] == \
+            [t.test for t in sequential.test_results]
+        # Timestamp line differs between runs
+        strip = lambda text: [l for l in text.splitlines() if not l.startswith('Timestamp')]
+        assert strip(output) == strip(expected_output)
+
+    def test_concurrent_wall_time(self, make_tester):
+        """Wall time tracks the slowest check rather than the sum"""
+        tester, runner = make_tester(delay=0.2)
+
+        start = time.monotonic()
+        tester.run_all_tests(workers=6)
+        elapsed = time.monotonic() - start
+
+        # Eleven kubectl calls at 0.2s each would take 2.2s sequentially;
+        # the slowest check (resource usage) makes three of them
+        assert len(runner.calls) == 11
+        assert elapsed < 1.2
+
+    def test_pods_read_once(self, make_tester):
+        """Pod Health and Resource Usage share one paged read of the pods"""
+        for workers in (1, 6):
+            tester, runner = make_tester()
+            tester.run_all_tests(workers=workers)
+
+            pod_lists = [c for c in runner.calls
+                         if '/pods?' in c and 'metrics.k8s.io' not in c]
+            assert len(pod_lists) == 1
+            results = {r.test: r for r in tester.test_results}
+            assert results['Pod Health'].details['total'] == len(CANNED['pods']['items'])
+            assert results['Resource Usage'].passed
+
+    def test_single_check_reads_own_fields(self, make_tester, monkeypatch):
+        """Outside a run each pod check pages through the pods with its own fields"""
+        tester, _ = make_tester()
+        scanned = []
+        scan = tester.snapshot.scan
+        monkeypatch.setattr(tester.snapshot, 'scan', lambda kind, readers: scanned.append(
+            [fields for fields, _ in readers]) or scan(kind, readers))
+
+        assert tester.test_pod_health()['total'] == len(CANNED['pods']['items'])
+        tester.test_resource_usage()
+
+        assert scanned == [[POD_HEALTH_FIELDS], [POD_RESOURCE_FIELDS]]
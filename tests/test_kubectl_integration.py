@@ -1,43 +1,55 @@
 import pytest
-import subprocess
-import json
-import yaml
+
+from kubectl_prefetch import DEPLOYMENT_FIELDS, ENDPOINT_FIELDS, NAMESPACE_FIELDS, PVC_FIELDS
+from kubectl_restarts import RESTART_FIELDS, RestartHistory
+from kubectl_rollout import wait_for_deployments
+from kubectl_state import state_file
+from kubectl_transport import TransportError
+
+CAS_CONTROLLER_SELECTOR = 'app.kubernetes.io/name=sas-cas-server-default-controller'
 
 class TestKubectlIntegration:
+    """
+    Cluster checks read from the session snapshot (see kubectl_prefetch):
+    every list is fetched concurrently once per run, so the tests only
+    look up objects in memory
+    """
     
     @pytest.fixture(scope="class")
-    def namespace(self):
-        return "sas-viya"
+    def namespace(self, kube_namespace):
+        return kube_namespace
     
-    def run_kubectl(self, command):
-        """Helper to run kubectl commands"""
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True
-        )
-        return result.returncode == 0, result.stdout, result.stderr
+    @pytest.fixture(scope="class")
+    def snapshot(self, cluster_snapshot):
+        """Resource lists shared by every test in the session"""
+        return cluster_snapshot
     
     @pytest.mark.critical
-    def test_namespace_exists(self, namespace):
+    def test_namespace_exists(self, namespace, snapshot):
         """Test if SAS Viya namespace exists"""
-        success, stdout, _ = self.run_kubectl(f"kubectl get namespace {namespace}")
-        assert success, f"Namespace {namespace} does not exist"
+        namespaces = snapshot.get('namespace', field_selector=f"metadata.name={namespace}",
+                                  fields=NAMESPACE_FIELDS)
+        assert namespaces is not None, "Cannot get namespaces"
+        assert namespaces.get('items'), f"Namespace {namespace} does not exist"
     
     @pytest.mark.critical
-    def test_cas_controller_running(self, namespace):
+    def test_cas_controller_running(self, snapshot):
         """Test if CAS controller is running"""
-        success, stdout, _ = self.run_kubectl(
-            f"kubectl get pods -n {namespace} "
-            "-l 'app.kubernetes.io/name=sas-cas-server-default-controller' "
-            "-o jsonpath='{.items[0].status.phase}'"
-        )
-        assert success, "Cannot get CAS controller status"
-        assert "Running" in stdout, f"CAS controller is not running. Status: {stdout}"
+        labels = dict(term.split('=', 1) for term in CAS_CONTROLLER_SELECTOR.split(','))
+        try:
+            controllers = [
+                pod for pod in snapshot.items('pods', fields=('metadata.labels', 'status.phase'))
+                if labels.items() <= (pod['metadata'].get('labels') or {}).items()
+            ]
+        except TransportError:
+            pytest.fail("Cannot get CAS controller status")
+        
+        assert controllers, "CAS controller pod not found"
+        status = controllers[0].get('status', {}).get('phase')
+        assert status == "Running", f"CAS controller is not running. Status: {status}"
     
     @pytest.mark.critical
-    def test_required_deployments(self, namespace):
+    def test_required_deployments(self, request, namespace, snapshot, kube_transport):
         """Test if required deployments are ready"""
         required_deployments = [
             "sas-logon-app",
@@ -47,20 +59,31 @@ class TestKubectlIntegration:
             "sas-folders"
         ]
         
+        wait = request.config.getoption('--wait-ready')
+        if wait:
+            # Rollout mode: one list, then watch until all are ready or time runs out
+            result = wait_for_deployments(kube_transport, namespace, required_deployments, wait)
+            missing = [name for name, status in result['deployments'].items()
+                       if status == 'missing']
+            if missing:
+                pytest.skip(f"Deployments not found: {missing}")
+            assert result['ready'], \
+                f"Not ready after {result['waited']}s: {result['deployments']}"
+            return
+        
+        deployments = snapshot.index('deployment', fields=DEPLOYMENT_FIELDS)
+        assert deployments is not None, "Cannot get deployments"
+        
         for deployment in required_deployments:
-            cmd = f"kubectl get deployment {deployment} -n {namespace} -o json"
-            success, stdout, _ = self.run_kubectl(cmd)
-            
-            if success and stdout:
-                dep_data = json.loads(stdout)
-                ready = dep_data.get('status', {}).get('readyReplicas', 0)
-                desired = dep_data.get('spec', {}).get('replicas', 1)
-                assert ready == desired, f"{deployment}: {ready}/{desired} replicas ready"
-            else:
+            dep_data = deployments.get(deployment)
+            if dep_data is None:
                 pytest.skip(f"Deployment {deployment} not found")
+            ready = dep_data.get('status', {}).get('readyReplicas', 0)
+            desired = dep_data.get('spec', {}).get('replicas', 1)
+            assert ready == desired, f"{deployment}: {ready}/{desired} replicas ready"
     
     @pytest.mark.services
-    def test_service_endpoints(self, namespace):
+    def test_service_endpoints(self, snapshot):
         """Test if critical services have endpoints"""
         critical_services = [
             "sas-logon-app",
@@ -68,54 +91,42 @@ class TestKubectlIntegration:
             "sas-postgres"
         ]
         
+        endpoints_by_name = snapshot.index('endpoints', fields=ENDPOINT_FIELDS)
+        assert endpoints_by_name is not None, "Cannot get endpoints"
+        
         for service in critical_services:
-            cmd = f"kubectl get endpoints {service} -n {namespace} -o json"
-            success, stdout, _ = self.run_kubectl(cmd)
-            
-            assert success, f"Cannot get endpoints for {service}"
+            endpoints = endpoints_by_name.get(service)
+            assert endpoints is not None, f"Cannot get endpoints for {service}"
             
-            endpoints = json.loads(stdout)
             subsets = endpoints.get('subsets', [])
             assert subsets, f"Service {service} has no endpoints"
             assert any(s.get('addresses') for s in subsets), \
                 f"Service {service} has no active addresses"
     
     @pytest.mark.slow
-    def test_pod_restart_count(self, namespace):
-        """Check if any pods have high restart counts"""
-        max_restarts = 5
-        
-        cmd = f"kubectl get pods -n {namespace} -o json"
-        success, stdout, _ = self.run_kubectl(cmd)
-        
-        assert success, "Cannot get pod information"
-        
-        pods = json.loads(stdout)
-        problematic_pods = []
+    def test_pod_restart_count(self, snapshot, namespace, state_dir):
+        """Check if any containers are restarting often within the last hour"""
+        history = RestartHistory(state_file(state_dir, 'restarts', namespace)
+                                 if state_dir else None)
         
-        for pod in pods.get('items', []):
-            pod_name = pod['metadata']['name']
-            for container in pod.get('status', {}).get('containerStatuses', []):
-                restart_count = container.get('restartCount', 0)
-                if restart_count > max_restarts:
-                    problematic_pods.append({
-                        'pod': pod_name,
-                        'container': container['name'],
-                        'restarts': restart_count
-                    })
+        try:
+            history.observe(snapshot.items('pods', fields=RESTART_FIELDS))
+        except TransportError:
+            pytest.fail("Cannot get pod information")
+        history.save()
         
+        problematic_pods = history.alerts()
         assert not problematic_pods, \
-            f"Pods with high restart counts: {problematic_pods}"
+            f"Containers restarting {history.threshold}+ times per {history.window:.0f}s: " \
+            f"{problematic_pods}"
     
     @pytest.mark.infrastructure
-    def test_persistent_volumes_bound(self, namespace):
+    def test_persistent_volumes_bound(self, snapshot):
         """Test if all PVCs are bound"""
-        cmd = f"kubectl get pvc -n {namespace} -o json"
-        success, stdout, _ = self.run_kubectl(cmd)
+        pvcs = snapshot.get('pvc', fields=PVC_FIELDS)
         
-        assert success, "Cannot get PVC information"
+        assert pvcs is not None, "Cannot get PVC information"
         
-        pvcs = json.loads(stdout)
         unbound_pvcs = []
         
         for pvc in pvcs.get('items', []):
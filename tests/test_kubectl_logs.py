@@ -0,0 +1,115 @@
+"""
+Tests for concurrent pod log scanning
+"""
+
+import time
+import tracemalloc
+
+from fake_kube_api import FakeKubeApiServer
+from kubectl_logs import LogScanner, SignatureSet, scan_namespace
+from kubectl_snapshot import ClusterSnapshot
+from kubectl_transport import ApiTransport
+
+
+def running_pod(name, containers=('main',)):
+    return {'metadata': {'name': name},
+            'spec': {'containers': [{'name': c} for c in containers]},
+            'status': {'phase': 'Running'}}
+
+
+class GeneratedLogs:
+    """Transport whose logs are generated line by line after a delay"""
+
+    def __init__(self, lines, delay=0.0):
+        self.lines = lines
+        self.delay = delay
+
+    def logs(self, pod, namespace=None, container=None, tail_lines=None, since_seconds=None):
+        time.sleep(self.delay)
+        for i in range(self.lines):
+            if i % 1000 == 0:
+                yield f"{i} ERROR sas-{pod}: request {i} failed: java.net.ConnectException: " \
+                      f"Connection refused"
+            else:
+                yield f'{{"level":"info","message":"handled request {i} for {pod}"}}'
+
+
+class TestLogScanner:
+    """Test signature counting, concurrency and memory"""
+
+    def test_namespace_scan(self):
+        """Running pods' containers are scanned; counts are per pod and signature"""
+        server = FakeKubeApiServer()
+        server.add('pods', [running_pod('sas-logon-app-0'),
+                            running_pod('sas-cas-server-default-controller', ('cas', 'sidecar')),
+                            dict(running_pod('sas-files-0'), status={'phase': 'Pending'})],
+                   namespace='sas-viya')
+        server.add_logs('sas-viya', 'sas-logon-app-0', [
+            '{"level":"info","message":"started"}',
+            '{"level":"error","message":"token check failed: invalid_token"}',
+            'Exception in thread "main" java.lang.OutOfMemoryError: Java heap space',
+            '{"level":"error","message":"lookup failed"}',
+        ], container='main')
+        server.add_logs('sas-viya', 'sas-cas-server-default-controller',
+                        ['cas started', 'ERROR: Could not connect: Connection refused'],
+                        container='cas')
+        with server:
+            result, scans = scan_namespace(
+                ClusterSnapshot('sas-viya', transport=ApiTransport(server.url)))
+
+        assert not result.passed
+        assert result.details['pods'] == {
+            'sas-logon-app-0/main': {'auth_failure': 1, 'out_of_memory': 1, 'error': 1},
+            'sas-cas-server-default-controller/cas': {'connection_refused': 1},
+        }
+        assert result.details['lines'] == 6
+        # The sidecar has no log to read
+        assert result.details['unreadable'] == ['sas-cas-server-default-controller/sidecar']
+        assert scans[0].samples['out_of_memory'][0].endswith('Java heap space')
+
+    def test_unreadable_logs_fail(self):
+        """A scan that cannot read every log does not pass, even with no matches"""
+        server = FakeKubeApiServer()
+        server.add('pods', [running_pod('sas-logon-app-0'),
+                            running_pod('sas-files-0', ('files', 'sidecar'))],
+                   namespace='sas-viya')
+        with server:
+            result, _ = scan_namespace(
+                ClusterSnapshot('sas-viya', transport=ApiTransport(server.url)))
+
+        assert not result.passed
+        assert result.details['lines'] == 0
+        assert result.details['unreadable'] == [
+            'sas-logon-app-0/main', 'sas-files-0/files', 'sas-files-0/sidecar']
+
+    def test_concurrent(self):
+        """Logs are streamed in parallel, up to the worker count"""
+        scanner = LogScanner(GeneratedLogs(1000, delay=0.3), 'sas-viya', workers=4)
+
+        started = time.perf_counter()
+        scans = scanner.scan([(f"pod-{i}", None) for i in range(4)])
+
+        assert time.perf_counter() - started < 0.3 * 4 / 2
+        assert [scan.pod for scan in scans] == ['pod-0', 'pod-1', 'pod-2', 'pod-3']
+
+    def test_memory_bounded(self):
+        """Only counts and samples are kept, however long the logs are"""
+        scanner = LogScanner(GeneratedLogs(20_000), 'sas-viya', workers=2)
+
+        tracemalloc.start()
+        scans = scanner.scan([('pod-0', None), ('pod-1', None)])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert all(scan.lines == 20_000 for scan in scans)
+        assert all(scan.counts == {'connection_refused': 20} for scan in scans)
+        assert all(len(scan.samples['connection_refused']) == 3 for scan in scans)
+        assert peak < 512 * 1024
+
+    def test_custom_signatures_checked_first(self):
+        """A line counts once, for the first signature it matches"""
+        signatures = SignatureSet({'ldap': r'LDAP', 'error': r'\bERROR\b'})
+
+        assert signatures.match('ERROR LDAP bind failed') == 'ldap'
+        assert signatures.match('ERROR disk full') == 'error'
+        assert signatures.match('all good') is None
@@ -0,0 +1,129 @@
+"""
+Tests for check and call instrumentation
+"""
+
+import json
+
+import pytest
+
+from fake_kube_api import FakeKubeApiServer
+from kubectl_health_checks import SASViyaKubectlTester
+from kubectl_metrics import Instrumentation, measure_call
+from kubectl_transport import ApiTransport, KubectlTransport
+
+
+@pytest.fixture
+def api_server():
+    server = FakeKubeApiServer()
+    server.add('pods', [
+        {'metadata': {'name': f'sas-pod-{i}'},
+         'status': {'phase': 'Running', 'containerStatuses': [{'ready': True}]}}
+        for i in range(5)
+    ], namespace='sas-viya')
+    server.add('pvc', [], namespace='sas-viya')
+    with server:
+        yield server
+
+
+class TestInstrumentation:
+    """Test call records and their exports"""
+
+    def test_calls_attributed_to_check(self):
+        """Calls made inside a check carry its name and namespace"""
+        instrumentation = Instrumentation()
+
+        with instrumentation.check('test_pod_health', 'sas-viya'):
+            with measure_call(instrumentation, 'api', 'list', 'pods') as record:
+                record.bytes = 100
+        with measure_call(instrumentation, 'api', 'get', 'pods'):
+            pass
+
+        first, second = instrumentation.calls
+        assert (first.check, first.namespace, first.bytes) == ('test_pod_health', 'sas-viya', 100)
+        assert second.check is None
+        assert instrumentation.checks[0]['check'] == 'test_pod_health'
+
+    def test_failure_recorded(self):
+        """An exception inside a call marks it failed and still records it"""
+        instrumentation = Instrumentation()
+
+        with pytest.raises(ValueError):
+            with measure_call(instrumentation, 'kubectl', 'list', 'pods'):
+                raise ValueError("boom")
+
+        assert instrumentation.calls[0].success is False
+
+    def test_prometheus_textfile(self, tmp_path):
+        """The textfile holds one sample per label set and escapes label values"""
+        instrumentation = Instrumentation()
+        with instrumentation.check('test_services', 'sas "viya"'):
+            for _ in range(3):
+                with measure_call(instrumentation, 'api', 'list', 'services') as record:
+                    record.retries = 1
+        path = tmp_path / 'sas_viya.prom'
+
+        instrumentation.write_prometheus(str(path))
+
+        text = path.read_text()
+        assert '# TYPE sas_viya_api_calls gauge' in text
+        assert ('sas_viya_api_calls{namespace="sas \\"viya\\"",check="test_services",'
+                'transport="api",operation="list",kind="services"} 3') in text
+        assert 'sas_viya_api_retries{' in text and '} 3\n' in text
+        assert list(tmp_path.iterdir()) == [path]
+
+
+class TestTransportInstrumentation:
+    """Test measurements taken by the transports"""
+
+    def test_api_stream_measured(self, api_server):
+        """Paged API reads record wire bytes and split transport from parse time"""
+        transport = ApiTransport(api_server.url)
+        transport.instrumentation = Instrumentation()
+
+        assert len(list(transport.iter_items('pods', 'sas-viya', limit=2))) == 5
+
+        record, = transport.instrumentation.calls
+        assert (record.transport, record.operation, record.kind) == ('api', 'iter_items', 'pods')
+        assert record.bytes == api_server.bytes_sent
+        assert record.wall_time >= record.transport_time > 0
+        assert record.parse_time > 0
+
+    def test_kubectl_timeout_recorded(self):
+        """A timed-out kubectl command is recorded as a failed timeout"""
+        transport = KubectlTransport(runner=lambda command: (False, "Command timed out"))
+        transport.instrumentation = Instrumentation()
+
+        assert transport.list('pods', 'sas-viya') is None
+
+        record, = transport.instrumentation.calls
+        assert record.timeout and not record.success
+
+    @pytest.mark.parametrize('workers', [1, 4])
+    def test_tester_records_every_check(self, api_server, tmp_path, workers):
+        """Each check is timed and its reads are attributed to it, prefetched or not"""
+        api_server.add('namespace', [{'metadata': {'name': 'sas-viya'}}])
+        api_server.add('pods', [
+            {'metadata': {'name': 'sas-cas-server-default-controller',
+                          'labels': {'app.kubernetes.io/name': 'sas-cas-server-default-controller'}},
+             'status': {'phase': 'Running', 'containerStatuses': [{'ready': True}]}}
+        ], namespace='sas-viya')
+        instrumentation = Instrumentation()
+        tester = SASViyaKubectlTester("sas-viya", transport=ApiTransport(api_server.url),
+                                      instrumentation=instrumentation)
+        tester.run_kubectl = lambda command: (False, "")
+
+        tester.run_all_tests(workers=workers)
+
+        assert sorted(c['check'] for c in instrumentation.checks) == sorted([
+            'test_namespace', 'test_cas_controller',
+            'test_pod_health', 'test_persistent_volumes', 'test_services',
+            'test_ingress', 'test_resource_usage', 'test_recent_events',
+        ])
+        assert all(c.check is not None for c in instrumentation.calls)
+        by_check = {(c.check, c.kind) for c in instrumentation.calls}
+        assert ('test_pod_health', 'pods') in by_check
+        assert ('test_resource_usage', 'nodes') in by_check
+
+        path = tmp_path / 'metrics.json'
+        instrumentation.write_json(str(path))
+        assert json.loads(path.read_text())['summary']
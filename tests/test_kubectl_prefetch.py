@@ -0,0 +1,66 @@
+"""
+Tests for the session prefetch shared between pytest workers
+"""
+
+import json
+import time
+
+import pytest
+
+from fake_kube_api import FakeKubeApiServer
+from kubectl_prefetch import DEPLOYMENT_FIELDS, integration_queries, shared_snapshot
+from kubectl_restarts import RESTART_FIELDS
+from kubectl_transport import ApiTransport, KubectlTransport
+
+
+@pytest.fixture
+def api_server():
+    server = FakeKubeApiServer()
+    server.add('namespace', [{'metadata': {'name': 'sas-viya'}}])
+    server.add('pods', [{
+        'metadata': {'name': 'sas-cas-server-default-controller',
+                     'labels': {'app.kubernetes.io/name': 'sas-cas-server-default-controller'}},
+        'spec': {'containers': [{'name': 'cas'}]},
+        'status': {'phase': 'Running',
+                   'containerStatuses': [{'name': 'cas', 'restartCount': 0}]},
+    }], namespace='sas-viya')
+    server.add('deployment', [{'metadata': {'name': 'sas-logon-app'},
+                               'spec': {'replicas': 2}, 'status': {'readyReplicas': 2}}],
+               namespace='sas-viya')
+    with server:
+        yield server
+
+
+class TestSharedSnapshot:
+    """Test that one worker fetches and the others load"""
+
+    def test_second_worker_reads_no_cluster(self, api_server, tmp_path):
+        """Workers after the first load the file and serve every test from memory"""
+        cache_path = str(tmp_path / 'snapshot.json')
+        queries = integration_queries('sas-viya')
+
+        first = shared_snapshot('sas-viya', ApiTransport(api_server.url), queries, cache_path)
+        fetched = len(api_server.requests)
+        second = shared_snapshot('sas-viya', ApiTransport(api_server.url), queries, cache_path)
+
+        assert fetched == len(queries)
+        assert second.index('deployment', fields=DEPLOYMENT_FIELDS)['sas-logon-app'] == \
+            first.index('deployment', fields=DEPLOYMENT_FIELDS)['sas-logon-app']
+        pods = list(second.items('pods', fields=RESTART_FIELDS))
+        assert pods[0] == {'metadata': {'name': 'sas-cas-server-default-controller'},
+                           'status': {'containerStatuses': [{'name': 'cas',
+                                                             'restartCount': 0}]}}
+        assert len(api_server.requests) == fetched
+
+    def test_prefetch_is_concurrent(self):
+        """Every list is fetched in about one call's time"""
+        def slow_kubectl(command):
+            time.sleep(0.2)
+            return True, json.dumps({'items': []})
+        queries = integration_queries('sas-viya')
+
+        started = time.perf_counter()
+        shared_snapshot('sas-viya', KubectlTransport(runner=slow_kubectl), queries)
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.2 * len(queries) / 2
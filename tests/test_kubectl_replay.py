@@ -0,0 +1,118 @@
+"""
+Tests for recording cluster responses and replaying them offline
+"""
+
+import contextlib
+import io
+import zipfile
+
+import pytest
+
+from fake_kube_api import FakeKubeApiServer
+from kubectl_health_checks import POD_HEALTH_FIELDS, SASViyaKubectlTester
+from kubectl_replay import RecordingTransport, ReplayTransport
+from kubectl_transport import ApiTransport, TransportError
+
+
+def pod(name, phase='Running'):
+    return {
+        'metadata': {'name': name, 'labels': {}},
+        'status': {'phase': phase, 'containerStatuses': [{'ready': phase == 'Running'}]},
+    }
+
+
+@pytest.fixture
+def api_server():
+    server = FakeKubeApiServer()
+    server.add('pods', [pod('sas-logon-app-0'), pod('sas-files-0', phase='Pending')],
+               namespace='sas-viya')
+    server.add('pvc', [{'metadata': {'name': 'sas-data'}, 'status': {'phase': 'Bound'}}],
+               namespace='sas-viya')
+    server.add('events', [{'involvedObject': {'name': 'sas-files-0'}, 'type': 'Warning',
+                           'reason': 'FailedScheduling', 'message': 'no nodes', 'count': 3,
+                           'lastTimestamp': '2024-05-01T12:00:00Z'}],
+               namespace='sas-viya')
+    with server:
+        yield server
+
+
+def run_tester(transport):
+    tester = SASViyaKubectlTester("sas-viya", transport=transport)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        tester.run_all_tests()
+    return tester.test_results, output.getvalue()
+
+
+class TestRecordReplay:
+    """Test that a replayed run matches the recorded one"""
+
+    def test_tester_replays_offline(self, api_server, tmp_path):
+        """Every check gives the same results from the archive with the server gone"""
+        # The critical checks pass, so every other check runs and is recorded
+        api_server.add('namespace', [{'metadata': {'name': 'sas-viya'}}])
+        api_server.add('pods', [{
+            'metadata': {'name': 'sas-cas-server-default-controller',
+                         'labels': {'app.kubernetes.io/name': 'sas-cas-server-default-controller'}},
+            'status': {'phase': 'Running', 'containerStatuses': [{'ready': True}]}}],
+            namespace='sas-viya')
+        archive = str(tmp_path / 'sas-viya.zip')
+        recorder = RecordingTransport(ApiTransport(api_server.url), archive)
+        recorded, recorded_output = run_tester(recorder)
+        recorder.close()
+        api_server.stop()
+
+        replay = ReplayTransport(archive)
+        replayed, replayed_output = run_tester(replay)
+
+        assert replayed == recorded
+        assert len(recorded) == 7
+        # Everything after the timestamp line is identical
+        assert replayed_output.split('Timestamp')[1].split('\n', 1)[1] == \
+            recorded_output.split('Timestamp')[1].split('\n', 1)[1]
+        assert replay.misses == []
+
+    def test_archive_read_lazily(self, api_server, tmp_path):
+        """Opening an archive reads only its index"""
+        archive = str(tmp_path / 'sas-viya.zip')
+        recorder = RecordingTransport(ApiTransport(api_server.url), archive)
+        list(recorder.iter_items('pods', 'sas-viya'))
+        recorder.close()
+
+        replay = ReplayTransport(archive)
+        opened = []
+        original_open = replay._zip.open
+        replay._zip.open = lambda name, *args, **kwargs: (
+            opened.append(name) or original_open(name, *args, **kwargs))
+
+        assert opened == []
+        assert [p['metadata']['name'] for p in replay.iter_items('pods', 'sas-viya')] == \
+            ['sas-logon-app-0', 'sas-files-0']
+        assert len(opened) == 1
+        assert zipfile.ZipFile(archive).getinfo(opened[0]).compress_type == zipfile.ZIP_DEFLATED
+
+    def test_projection_served_from_full_recording(self, api_server, tmp_path):
+        """A projected read replays from a recorded full read of the same list"""
+        archive = str(tmp_path / 'sas-viya.zip')
+        recorder = RecordingTransport(ApiTransport(api_server.url), archive)
+        recorder.list('pods', 'sas-viya')
+        recorder.close()
+
+        replay = ReplayTransport(archive)
+
+        items = replay.list('pods', 'sas-viya', fields=POD_HEALTH_FIELDS)['items']
+        assert items[0] == {'metadata': {'name': 'sas-logon-app-0'},
+                            'status': {'phase': 'Running',
+                                       'containerStatuses': [{'ready': True}]}}
+
+    def test_missing_entry_reported(self, api_server, tmp_path):
+        """Calls that were never recorded fail like an unreachable cluster"""
+        archive = str(tmp_path / 'sas-viya.zip')
+        RecordingTransport(ApiTransport(api_server.url), archive).close()
+
+        replay = ReplayTransport(archive)
+
+        assert replay.get('deployment', 'sas-logon-app', 'sas-viya') is None
+        with pytest.raises(TransportError):
+            list(replay.iter_items('events', 'sas-viya'))
+        assert len(replay.misses) == 2
@@ -0,0 +1,86 @@
+"""
+Tests for quantity parsing and the resource usage engine
+"""
+
+import pytest
+
+from kubectl_resources import (
+    NodeUsage, PodUsage, evaluate, format_memory, parse_cpu, parse_memory
+)
+
+
+def pod_metrics(name, cpu, memory):
+    return {'metadata': {'name': name}, 'containers': [{'usage': {'cpu': cpu, 'memory': memory}}]}
+
+
+def pod(name, node='node-1', cpu_limit='1', memory_limit='1Gi'):
+    limits = {}
+    if cpu_limit:
+        limits['cpu'] = cpu_limit
+    if memory_limit:
+        limits['memory'] = memory_limit
+    return {'metadata': {'name': name},
+            'spec': {'nodeName': node, 'containers': [{'resources': {'limits': limits}}]}}
+
+
+class TestQuantities:
+    """Test Kubernetes quantity normalization"""
+
+    @pytest.mark.parametrize('value,millicores', [
+        ('250m', 250), ('2', 2000), ('1.5', 1500), ('123456789n', 123.456789),
+        ('500u', 0.5), (1, 1000), (None, 0),
+    ])
+    def test_cpu(self, value, millicores):
+        """CPU quantities normalize to millicores"""
+        assert parse_cpu(value) == pytest.approx(millicores)
+
+    @pytest.mark.parametrize('value,size', [
+        ('512Mi', 512 * 2**20), ('2Gi', 2 * 2**30), ('1000Ki', 1000 * 2**10),
+        ('1G', 1e9), ('128974848', 128974848), ('1e3', 1000), ('129e6', 129e6),
+    ])
+    def test_memory(self, value, size):
+        """Memory quantities normalize to bytes, binary and decimal suffixes alike"""
+        assert parse_memory(value) == pytest.approx(size)
+
+    def test_invalid(self):
+        """Unknown suffixes are rejected rather than misread"""
+        with pytest.raises(ValueError):
+            parse_memory('12Xi')
+
+
+class TestResourceUsage:
+    """Test limit and allocatable evaluation"""
+
+    def test_top_orders_across_units(self):
+        """1.5 cores outranks 900m, and 1Gi outranks 900Mi, unlike a text sort"""
+        usage = PodUsage.from_metrics([
+            pod_metrics('sas-a', '900m', '900Mi'),
+            pod_metrics('sas-b', '1500000000n', '1Gi'),
+            pod_metrics('sas-c', '2m', '64Mi'),
+        ])
+
+        assert [usage.names[i] for i in usage.top(2, 'cpu')] == ['sas-b', 'sas-a']
+        assert [usage.names[i] for i in usage.top(1, 'memory')] == ['sas-b']
+
+    def test_limits_and_allocatable(self):
+        """Pods near their limit and nodes near allocatable are findings"""
+        pods = PodUsage.from_metrics(
+            [pod_metrics('sas-cas-0', '950m', '256Mi'),
+             pod_metrics('sas-files-0', '100m', '1000Mi'),
+             pod_metrics('sas-unlimited-0', '8', '30Gi')],
+            [pod('sas-cas-0'), pod('sas-files-0'),
+             pod('sas-unlimited-0', cpu_limit=None, memory_limit=None)])
+        nodes = NodeUsage.from_metrics(
+            [{'metadata': {'name': 'node-1'}, 'usage': {'cpu': '3600m', 'memory': '4Gi'}}],
+            [{'metadata': {'name': 'node-1'},
+              'status': {'allocatable': {'cpu': '4', 'memory': '16Gi'}}}])
+
+        result = evaluate(pods, nodes)
+
+        assert [p['pod'] for p in result['pods_near_cpu_limit']] == ['sas-cas-0']
+        assert [p['pod'] for p in result['pods_near_memory_limit']] == ['sas-files-0']
+        assert result['pods_near_cpu_limit'][0]['percent'] == 95.0
+        assert [n['node'] for n in result['nodes_cpu_pressure']] == ['node-1']
+        assert result['nodes_memory_pressure'] == []
+        assert result['top_memory'][0] == {'pod': 'sas-unlimited-0', 'cpu': '8000m',
+                                           'memory': format_memory(30 * 2**30)}
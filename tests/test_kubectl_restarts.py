@@ -0,0 +1,61 @@
+"""
+Tests for rate-based restart detection from the persisted restart history
+"""
+
+from datetime import datetime, timezone
+
+from kubectl_restarts import RestartHistory
+
+NOW = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc).timestamp()
+HOUR = 3600
+
+
+def pod(name, restarts, started_hours_ago, container='app'):
+    started = datetime.fromtimestamp(NOW - started_hours_ago * HOUR, timezone.utc)
+    return {
+        'metadata': {'name': name},
+        'status': {'startTime': started.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                   'containerStatuses': [{'name': container, 'restartCount': restarts}]},
+    }
+
+
+class TestRestartHistory:
+    """Test restart rates across runs"""
+
+    def test_fresh_crash_loop_caught_on_first_run(self):
+        """Restarts of a pod started within the window all count"""
+        history = RestartHistory()
+
+        history.observe([pod('sas-files-0', 4, 0.5), pod('sas-logon-app-0', 40, 30 * 24)],
+                        now=NOW)
+
+        assert [a['pod'] for a in history.alerts(now=NOW)] == ['sas-files-0']
+
+    def test_long_lived_pod_alerts_on_recent_restarts(self, tmp_path):
+        """A high lifetime count is fine until it rises quickly, across saved runs"""
+        path = str(tmp_path / 'restarts.json')
+        history = RestartHistory(path)
+        history.observe([pod('sas-logon-app-0', 40, 30 * 24)], now=NOW)
+        history.save()
+
+        for minutes, restarts in ((10, 40), (20, 42), (30, 44)):
+            history = RestartHistory(path)
+            history.observe([pod('sas-logon-app-0', restarts, 30 * 24)], now=NOW + minutes * 60)
+            history.save()
+
+        alerts = history.alerts(now=NOW + 30 * 60)
+        assert alerts == [{'pod': 'sas-logon-app-0', 'container': 'app',
+                           'restarts_in_window': 4, 'restarts': 44}]
+        # Two hours later the restarts have left the window
+        history.observe([pod('sas-logon-app-0', 44, 30 * 24)], now=NOW + 2 * HOUR)
+        assert history.alerts(now=NOW + 2 * HOUR) == []
+
+    def test_gone_pods_pruned_and_recreated_containers_reset(self):
+        """Pods missing from the list are dropped; a lower count starts over"""
+        history = RestartHistory()
+        history.observe([pod('sas-files-0', 2, 48), pod('sas-cas-0', 9, 48)], now=NOW)
+
+        history.observe([pod('sas-cas-0', 1, 0.1)], now=NOW + 600)
+
+        assert list(history.series) == ['sas-cas-0']
+        assert history.restart_rate('sas-cas-0', 'app', now=NOW + 600) == 1
@@ -0,0 +1,59 @@
+"""
+Tests for the result model and the JSON, JUnit and HTML report writers
+"""
+
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from kubectl_results import CheckResult, RunReport, write_reports
+
+
+@pytest.fixture
+def runs():
+    healthy = RunReport('sas-viya', 'prod')
+    healthy.start()
+    healthy.results.append(CheckResult('Pod Health', True, {'total': 3}, duration=0.25))
+    healthy.results.append(CheckResult(
+        'Services', False, {'services_without_endpoints': ['sas-logon-app', '<sas-files>']}))
+    healthy.finish()
+
+    unreachable = RunReport('sas-viya', 'dr')
+    unreachable.error = 'connection refused'
+    return [healthy, unreachable]
+
+
+class TestReportWriters:
+    """Test that one pass produces all three formats"""
+
+    def test_all_formats(self, runs, tmp_path):
+        """JSON and JUnit parse back with the same results; HTML escapes details"""
+        paths = {fmt: str(tmp_path / f"report.{fmt}") for fmt in ('json', 'junit', 'html')}
+
+        write_reports(runs, paths)
+
+        data = json.loads(open(paths['json']).read())
+        assert [r['context'] for r in data['runs']] == ['prod', 'dr']
+        assert data['runs'][0]['results'][1]['details']['services_without_endpoints'][1] == \
+            '<sas-files>'
+        assert data['runs'][1]['error'] == 'connection refused'
+
+        suites = ET.parse(paths['junit']).getroot()
+        assert suites.get('tests') == '2' and suites.get('failures') == '1'
+        assert suites.get('errors') == '1'
+        failure = suites.find("testsuite/testcase[@name='Services']/failure")
+        assert 'sas-logon-app' in failure.get('message')
+
+        page = open(paths['html']).read()
+        assert '&lt;sas-files&gt;' in page and '<sas-files>' not in page
+        assert page.count('<table>') == 2
+
+    def test_result_model(self, runs):
+        """Results are slotted and compare without their durations"""
+        result = runs[0].results[0]
+
+        assert not hasattr(result, '__dict__')
+        assert result == CheckResult('Pod Health', True, {'total': 3})
+        assert runs[0].failed == 1 and not runs[0].passed
+        assert runs[0].duration is not None
@@ -0,0 +1,58 @@
+"""
+Tests for waiting on deployment readiness during a rollout
+"""
+
+import threading
+import time
+
+import pytest
+
+from fake_kube_api import FakeKubeApiServer
+from kubectl_rollout import RolloutWaiter, wait_for_deployments
+from kubectl_transport import ApiTransport
+
+NAMES = ['sas-logon-app', 'sas-files']
+
+
+def deployment(name, ready, replicas=2):
+    return {'metadata': {'name': name, 'generation': 2},
+            'spec': {'replicas': replicas},
+            'status': {'observedGeneration': 2, 'updatedReplicas': replicas,
+                       'readyReplicas': ready}}
+
+
+@pytest.fixture
+def api_server():
+    server = FakeKubeApiServer()
+    server.add('deployment', [deployment('sas-logon-app', 2), deployment('sas-files', 0),
+                              deployment('sas-audit', 0)], namespace='sas-viya')
+    with server:
+        yield server
+
+
+class TestRolloutWaiter:
+    """Test one list plus a watch until ready, under a deadline"""
+
+    def test_returns_when_last_deployment_ready(self, api_server):
+        """A change seen on the watch ends the wait without polling"""
+        timer = threading.Timer(0.3, api_server.emit, args=(
+            'deployment', 'MODIFIED', deployment('sas-files', 2)), kwargs={'namespace': 'sas-viya'})
+        timer.start()
+        waiter = RolloutWaiter(ApiTransport(api_server.url), 'sas-viya', NAMES)
+
+        started = time.monotonic()
+        assert waiter.wait(timeout=10)
+
+        assert time.monotonic() - started < 2
+        assert waiter.requests == 2
+        assert waiter.status() == {'sas-logon-app': 'ready', 'sas-files': 'ready'}
+
+    def test_deadline_reports_pending(self, api_server):
+        """Deployments still not ready at the deadline are reported with their replicas"""
+        result = wait_for_deployments(ApiTransport(api_server.url), 'sas-viya',
+                                      NAMES + ['sas-folders'], timeout=0.5)
+
+        assert not result['ready']
+        assert result['waited'] < 3
+        assert result['deployments'] == {'sas-logon-app': 'ready', 'sas-files': '0/2 ready',
+                                         'sas-folders': 'missing'}
@@ -0,0 +1,91 @@
+"""
+Tests for the check registry and its dependency-aware scheduler
+"""
+
+import threading
+import time
+
+from kubectl_scheduler import HIGH, LOW, CheckRegistry, CheckScheduler, fetch_plan
+from kubectl_snapshot import ClusterSnapshot
+
+
+class DelayedTransport:
+    """Answers every list after a per-kind delay, counting the calls"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def list(self, kind, namespace=None, selector=None, field_selector=None, fields=None):
+        with self._lock:
+            self.calls.append((kind, fields))
+        time.sleep(self.delays.get(kind, 0))
+        return {'items': [{'metadata': {'name': f"{kind}-0"}}]}
+
+
+def registry(passing_critical=True):
+    checks = CheckRegistry()
+    checks.register('Events', priority=LOW)(lambda: None)
+    checks.register('Services', needs=[('services', None, None, ('metadata.name',)),
+                                       ('endpoints', None, None, ('metadata.name',))])(
+        lambda: None)
+    checks.register('Endpoints', priority=HIGH, needs=[
+        ('endpoints', None, None, ('metadata.name', 'subsets[].addresses'))])(lambda: None)
+    checks.register('Namespace', critical=True, needs=lambda namespace: [
+        ('namespace', None, f"metadata.name={namespace}", None)])(lambda: passing_critical)
+    return checks
+
+
+def run(checks, transport, workers):
+    finished = {}
+    started = time.perf_counter()
+
+    def execute(check):
+        passed = check.function()
+        finished[check.name] = time.perf_counter() - started
+        return passed is not False, check.name
+
+    scheduler = CheckScheduler(ClusterSnapshot('sas-viya', transport=transport), checks, workers)
+    return scheduler, scheduler.run(execute), finished
+
+
+class TestCheckScheduler:
+    """Test fetch planning, ordering and short-circuiting"""
+
+    def test_plan_merges_fields_by_priority(self):
+        """Each list is fetched once, with every field its readers need"""
+        plan = fetch_plan(registry(), 'sas-viya', stream_kinds=('pods',))
+
+        assert [(query, [c.name for c in users]) for query, users in plan] == [
+            (('namespace', None, 'metadata.name=sas-viya', None), ['Namespace']),
+            (('endpoints', None, None, ('metadata.name', 'subsets[].addresses')),
+             ['Endpoints', 'Services']),
+            (('services', None, None, ('metadata.name',)), ['Services']),
+        ]
+
+    def test_checks_start_as_inputs_arrive(self):
+        """Checks run once the critical check passes and their own lists are cached"""
+        transport = DelayedTransport({'namespace': 0.1, 'services': 0.5})
+        scheduler, outcomes, finished = run(registry(), transport, workers=4)
+
+        assert [payload for _, payload in outcomes] == ['Namespace', 'Endpoints', 'Services',
+                                                        'Events']
+        assert sorted(kind for kind, _ in transport.calls) == ['endpoints', 'namespace',
+                                                               'services']
+        # Endpoints did not wait for the slow services list
+        assert finished['Endpoints'] < 0.3 < finished['Services']
+        assert scheduler.skipped == []
+
+    def test_critical_failure_skips_the_rest(self):
+        """A failed critical check stops everything not yet started"""
+        transport = DelayedTransport({'namespace': 0.1, 'services': 0.5})
+        scheduler, outcomes, _ = run(registry(passing_critical=False), transport, workers=4)
+
+        assert [payload for _, payload in outcomes] == ['Namespace']
+        assert scheduler.failed.name == 'Namespace'
+        assert [check.name for check in scheduler.skipped] == ['Endpoints', 'Services', 'Events']
+
+        sequential, outcomes, _ = run(registry(passing_critical=False), DelayedTransport({}), 1)
+        assert [payload for _, payload in outcomes] == ['Namespace']
+        assert len(sequential.skipped) == 3
@@ -0,0 +1,88 @@
+"""
+Tests for the shared cluster snapshot cache
+"""
+
+import json
+
+from kubectl_snapshot import ClusterSnapshot
+
+
+class FakeRunner:
+    """Stands in for kubectl and counts how often each command runs"""
+
+    def __init__(self, succeed=True):
+        self.succeed = succeed
+        self.calls = []
+
+    def __call__(self, command):
+        self.calls.append(command)
+        if not self.succeed:
+            return False, "error"
+        return True, json.dumps({'items': [{'metadata': {'name': 'sas-logon-app-0'}}]})
+
+
+class TestClusterSnapshot:
+    """Test snapshot caching behaviour"""
+
+    def test_kind_fetched_once(self):
+        """Repeated reads of the same kind reuse one kubectl call"""
+        runner = FakeRunner()
+        snapshot = ClusterSnapshot("sas-viya", runner=runner)
+
+        first = snapshot.get('pods')
+        second = snapshot.get('pods')
+
+        assert first is second
+        assert runner.calls == ["kubectl get pods -n sas-viya -o json"]
+
+    def test_selectors_cached_separately(self):
+        """Different field selectors are distinct cache entries"""
+        runner = FakeRunner()
+        snapshot = ClusterSnapshot("sas-viya", runner=runner)
+
+        snapshot.get('events')
+        snapshot.get('events', field_selector='type=Warning')
+
+        assert len(runner.calls) == 2
+        assert runner.calls[1].endswith("--field-selector type=Warning")
+
+    def test_ttl_expiry_refetches(self):
+        """A zero TTL disables reuse"""
+        runner = FakeRunner()
+        snapshot = ClusterSnapshot("sas-viya", runner=runner, ttl=0)
+
+        snapshot.get('pvc')
+        snapshot.get('pvc')
+
+        assert len(runner.calls) == 2
+
+    def test_failure_not_cached(self):
+        """A failed fetch returns None and is retried next time"""
+        runner = FakeRunner(succeed=False)
+        snapshot = ClusterSnapshot("sas-viya", runner=runner)
+
+        assert snapshot.get('pods') is None
+        runner.succeed = True
+        assert snapshot.get('pods') is not None
+        assert len(runner.calls) == 2
+
+    def test_invalidate(self):
+        """Invalidating a kind forces a new fetch"""
+        runner = FakeRunner()
+        snapshot = ClusterSnapshot("sas-viya", runner=runner)
+
+        snapshot.get('pods')
+        snapshot.invalidate('pods')
+        snapshot.get('pods')
+
+        assert len(runner.calls) == 2
+
+    def test_index_by_name(self):
+        """Index joins items by name from a single list call"""
+        runner = FakeRunner()
+        snapshot = ClusterSnapshot("sas-viya", runner=runner)
+
+        endpoints = snapshot.index('endpoints')
+
+        assert list(endpoints) == ['sas-logon-app-0']
+        assert runner.calls == ["kubectl get endpoints -n sas-viya -o json"]
@@ -0,0 +1,280 @@
+"""
+Tests for the native API and kubectl transports using the fake API server
+"""
+
+import io
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+import yaml
+
+import kubectl_transport
+
+from fake_kube_api import FakeKubeApiServer
+from kubectl_health_checks import POD_HEALTH_FIELDS, SASViyaKubectlTester
+from kubectl_query import metadata_only, project
+from kubectl_transport import (
+    ApiTransport, KubectlTransport, KubeconfigError, TransportError,
+    iter_list_items, make_transport, resource_path
+)
+
+
+def pod(name, phase='Running', labels=None):
+    return {
+        'metadata': {'name': name, 'labels': labels or {}},
+        'status': {'phase': phase, 'containerStatuses': [{'ready': phase == 'Running'}]},
+    }
+
+
+@pytest.fixture
+def api_server():
+    server = FakeKubeApiServer()
+    server.add('pods', [
+        pod('sas-cas-server-default-controller',
+            labels={'app.kubernetes.io/name': 'sas-cas-server-default-controller'}),
+        pod('sas-logon-app-0'),
+        pod('sas-files-0', phase='Pending'),
+    ], namespace='sas-viya')
+    server.add('pvc', [], namespace='sas-viya')
+    server.add('deployment', [{'metadata': {'name': 'sas-logon-app'}}], namespace='sas-viya')
+    with server:
+        yield server
+
+
+class TestApiTransport:
+    """Test the pooled HTTP transport"""
+
+    def test_resource_paths(self):
+        """Core and grouped kinds map to their REST paths"""
+        assert resource_path('pods', 'sas-viya') == '/api/v1/namespaces/sas-viya/pods'
+        assert resource_path('deployment', 'sas-viya', 'sas-files') == \
+            '/apis/apps/v1/namespaces/sas-viya/deployments/sas-files'
+        assert resource_path('nodes', 'sas-viya') == '/api/v1/nodes'
+
+    def test_list_and_selector(self, api_server):
+        """Lists return parsed items and honour label selectors"""
+        transport = ApiTransport(api_server.url)
+
+        assert len(transport.list('pods', 'sas-viya')['items']) == 3
+        selected = transport.list(
+            'pods', 'sas-viya',
+            selector='app.kubernetes.io/name=sas-cas-server-default-controller')
+        assert [p['metadata']['name'] for p in selected['items']] == \
+            ['sas-cas-server-default-controller']
+
+    def test_get_missing_returns_none(self, api_server):
+        """A 404 maps to None like a failed kubectl get"""
+        transport = ApiTransport(api_server.url)
+
+        assert transport.get('deployment', 'sas-logon-app', 'sas-viya') is not None
+        assert transport.get('deployment', 'sas-folders', 'sas-viya') is None
+
+    def test_connection_reused(self, api_server):
+        """Sequential requests share one keep-alive connection"""
+        transport = ApiTransport(api_server.url)
+
+        for _ in range(5):
+            transport.list('pods', 'sas-viya')
+
+        assert transport.connections_opened == 1
+        assert api_server.connections == 1
+        transport.close()
+
+    def test_from_kubeconfig(self, api_server, tmp_path):
+        """Server and token are read from the current context"""
+        kubeconfig = tmp_path / 'config'
+        kubeconfig.write_text(yaml.safe_dump({
+            'current-context': 'sas-viya-context',
+            'contexts': [{'name': 'sas-viya-context',
+                          'context': {'cluster': 'eks-cluster', 'user': 'aws-user'}}],
+            'clusters': [{'name': 'eks-cluster', 'cluster': {'server': api_server.url}}],
+            'users': [{'name': 'aws-user', 'user': {'token': 'abc123'}}],
+        }))
+
+        transport = ApiTransport.from_kubeconfig(str(kubeconfig))
+
+        assert transport._auth_header() == 'Bearer abc123'
+        assert transport.list('pvc', 'sas-viya')['items'] == []
+
+    def test_missing_kubeconfig_falls_back(self, tmp_path, monkeypatch):
+        """auto mode falls back to kubectl; api mode raises"""
+        monkeypatch.setenv('KUBECONFIG', str(tmp_path / 'missing'))
+
+        assert isinstance(make_transport('auto'), KubectlTransport)
+        with pytest.raises(KubeconfigError):
+            make_transport('api')
+
+
+class TestExecCredentials:
+    """Test tokens from exec credential plugins such as aws eks get-token"""
+
+    @staticmethod
+    def plugin(output):
+        return kubectl_transport._exec_token_provider({
+            'command': sys.executable, 'args': ['-c', f"print({output!r})"]})
+
+    def test_expiration_formats(self):
+        """RFC 3339 timestamps with fractions or offsets are accepted"""
+        expected = datetime(2030, 1, 1, tzinfo=timezone.utc).timestamp() - 60
+        for stamp in ('2030-01-01T00:00:00Z', '2030-01-01T00:00:00.250Z',
+                      '2030-01-01T01:00:00+01:00'):
+            token, expiry = self.plugin(json.dumps(
+                {'status': {'token': 'k8s-aws-v1.abc', 'expirationTimestamp': stamp}}))()
+            assert token == 'k8s-aws-v1.abc'
+            assert expiry == pytest.approx(expected, abs=1)
+
+    def test_invalid_credential_raises(self):
+        """Unparsable plugin output is a KubeconfigError, not a crash"""
+        with pytest.raises(KubeconfigError):
+            self.plugin('not json')()
+        with pytest.raises(KubeconfigError):
+            self.plugin(json.dumps({'status': {'expirationTimestamp': 'tomorrow'}}))()
+
+    def test_provider_failure_is_transport_error(self, api_server):
+        """A failing plugin makes the call fail instead of raising to the check"""
+        def provider():
+            raise KubeconfigError('exec credential plugin failed: expired SSO session')
+
+        transport = ApiTransport(api_server.url, token_provider=provider)
+
+        assert transport.list('pods', 'sas-viya') is None
+        with pytest.raises(TransportError):
+            list(transport.iter_items('pods', 'sas-viya'))
+
+    def test_concurrent_refresh_runs_plugin_once(self, api_server):
+        """Workers finding the token expired share one plugin run"""
+        calls = []
+
+        def provider():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'fresh-token', time.time() + 3600
+
+        transport = ApiTransport(api_server.url, token_provider=provider, pool_size=8)
+        threads = [threading.Thread(target=transport.list, args=('pods', 'sas-viya'))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert transport._auth_header() == 'Bearer fresh-token'
+
+
+class TestPagination:
+    """Test paginated, incrementally parsed list reads"""
+
+    def test_parser_handles_split_chunks(self, monkeypatch):
+        """Items and header keys survive reads that split tokens and UTF-8"""
+        monkeypatch.setattr(kubectl_transport, 'READ_SIZE', 3)
+        payload = {
+            'kind': 'EventList',
+            'metadata': {'continue': 'abc'},
+            'items': [{'message': 'Back-off restarting ✓', 'count': 12345}, {}],
+        }
+        header = {}
+
+        items = list(iter_list_items(io.BytesIO(json.dumps(payload).encode()).read, header))
+
+        assert items == payload['items']
+        assert header == {'kind': 'EventList', 'metadata': {'continue': 'abc'}}
+
+    def test_api_pages_on_one_connection(self, api_server):
+        """limit/continue pages are fetched over the same keep-alive connection"""
+        transport = ApiTransport(api_server.url)
+
+        names = [p['metadata']['name'] for p in transport.iter_items('pods', 'sas-viya', limit=2)]
+
+        assert len(names) == 3
+        assert sum('limit=2' in r for r in api_server.requests) == 2
+        assert transport.connections_opened == 1
+
+    def test_kubectl_pages_with_raw(self, api_server):
+        """The kubectl transport pages through `get --raw`"""
+        def runner(command):
+            url = command.split("'")[1]
+            path, _, query = url.partition('?')
+            params = dict(part.split('=', 1) for part in query.split('&'))
+            status, body = api_server.handle(path, params)
+            return status == 200, json.dumps(body)
+
+        transport = KubectlTransport(runner=runner)
+
+        assert len(list(transport.iter_items('pods', 'sas-viya', limit=1))) == 3
+
+    def test_failed_page_raises(self):
+        """A failed page surfaces as TransportError"""
+        transport = KubectlTransport(runner=lambda command: (False, ''))
+
+        with pytest.raises(TransportError):
+            list(transport.iter_items('events', 'sas-viya'))
+
+    def test_failed_kubectl_watch_raises(self, failing_kubectl):
+        """A kubectl watch that exits non-zero surfaces as TransportError"""
+        with pytest.raises(TransportError):
+            list(KubectlTransport().watch('pods', 'sas-viya', '100'))
+
+
+class TestProjection:
+    """Test declared-field queries"""
+
+    def test_project_nested_lists(self):
+        """Only declared paths survive, including inside lists"""
+        item = {
+            'metadata': {'name': 'sas-logon-app-0', 'managedFields': [{}] * 3},
+            'spec': {'containers': [{'env': []}]},
+            'status': {'phase': 'Running',
+                       'containerStatuses': [{'ready': True, 'image': 'x'}, {'ready': False}]},
+        }
+
+        assert project(item, POD_HEALTH_FIELDS) == {
+            'metadata': {'name': 'sas-logon-app-0'},
+            'status': {'phase': 'Running',
+                       'containerStatuses': [{'ready': True}, {'ready': False}]},
+        }
+        assert metadata_only(('metadata.name', 'metadata.labels'))
+        assert not metadata_only(POD_HEALTH_FIELDS)
+
+    def test_metadata_query_uses_partial_objects(self, api_server):
+        """Metadata-only fields are served as PartialObjectMetadata"""
+        transport = ApiTransport(api_server.url)
+
+        data = transport.list('pods', 'sas-viya', fields=('metadata.name',))
+
+        assert data['kind'] == 'PartialObjectMetadataList'
+        assert data['items'][0] == {'metadata': {'name': 'sas-cas-server-default-controller'}}
+
+    def test_gzip_shrinks_wire_bytes(self, api_server):
+        """Large responses arrive compressed and are decoded transparently"""
+        api_server.add('events', [
+            {'metadata': {'name': f'event-{i}'}, 'type': 'Warning', 'reason': 'BackOff',
+             'message': 'Back-off restarting failed container sas-cas-server ' * 4}
+            for i in range(500)
+        ], namespace='sas-viya')
+        transport = ApiTransport(api_server.url)
+
+        items = list(transport.iter_items('events', 'sas-viya', fields=('reason',)))
+
+        assert len(items) == 500
+        assert items[0] == {'reason': 'BackOff'}
+        raw_size = len(json.dumps({'items': api_server.objects[('events', 'sas-viya')]}))
+        assert api_server.bytes_sent * 10 < raw_size
+
+
+class TestTesterOverApi:
+    """Run the health checks end to end against the fake server"""
+
+    def test_pod_health(self, api_server):
+        """Pod health counts come from the API transport"""
+        tester = SASViyaKubectlTester("sas-viya", transport=ApiTransport(api_server.url))
+
+        status = tester.test_pod_health()
+
+        assert status['total'] == 3
+        assert status['pending'] == 1
+        assert tester.test_results[0].passed is False
@@ -0,0 +1,181 @@
+"""
+Tests for the watch-driven monitor using the fake API server
+"""
+
+import io
+import time
+
+import pytest
+
+from fake_kube_api import FakeKubeApiServer
+from kubectl_transport import ApiTransport, KubectlTransport
+from kubectl_watch_monitor import ClusterModel, WatchMonitor
+
+
+def pod(name, phase='Running', ready=True, labels=None):
+    return {
+        'metadata': {'name': name, 'labels': labels or {}},
+        'status': {'phase': phase, 'containerStatuses': [{'ready': ready, 'state': {}}]},
+    }
+
+
+def wait_for_redraw(monitor, deadline=5.0):
+    end = time.monotonic() + deadline
+    while time.monotonic() < end:
+        if monitor.step(timeout=0.1):
+            return True
+    return False
+
+
+@pytest.fixture
+def monitor():
+    server = FakeKubeApiServer()
+    server.add('pods', [pod('sas-logon-app-0'), pod('sas-files-0')], namespace='sas-viya')
+    server.add('deployment', [{'metadata': {'name': 'sas-logon-app'},
+                               'spec': {'replicas': 1}, 'status': {'readyReplicas': 1}}],
+               namespace='sas-viya')
+    with server:
+        output = io.StringIO()
+        watcher = WatchMonitor(ApiTransport(server.url), 'sas-viya',
+                               watch_timeout=2, output=output)
+        watcher.server = server
+        watcher.start()
+        assert watcher.step(timeout=0.1)
+        yield watcher
+        watcher.stop()
+
+
+class TestClusterModel:
+    """Test delta application"""
+
+    def test_irrelevant_change_ignored(self):
+        """Changes to fields the dashboard does not show cause no redraw"""
+        model = ClusterModel()
+        model.replace('pods', [pod('sas-logon-app-0')])
+
+        relabelled = pod('sas-logon-app-0', labels={'team': 'viya'})
+
+        assert not model.apply('pods', {'type': 'MODIFIED', 'object': relabelled})
+        assert model.apply('pods', {'type': 'MODIFIED', 'object': pod('sas-logon-app-0', ready=False)})
+        assert model.apply('pods', {'type': 'DELETED', 'object': relabelled})
+        assert model.state['pods'] == {}
+
+    def test_top_pods_ranked_by_parsed_cpu(self):
+        """Top consumers are ordered by CPU quantity, not by text"""
+        model = ClusterModel()
+
+        assert model.set_top_pods([
+            {'metadata': {'name': name}, 'containers': [{'usage': {'cpu': cpu, 'memory': '1Gi'}}]}
+            for name, cpu in [('sas-a', '900m'), ('sas-b', '2'), ('sas-c', '95000000n')]
+        ])
+        assert [name for _, name, _ in model.top_pods] == ['sas-b', 'sas-a', 'sas-c']
+        assert model.top_pods[0] == (2000.0, 'sas-b', '1Gi')
+
+
+class TestWatchMonitor:
+    """Test the monitor against live watch streams"""
+
+    def test_initial_list_renders_once(self, monitor):
+        """Startup lists each kind once and draws the dashboard"""
+        output = monitor.output.getvalue()
+
+        assert "Running: 2" in output
+        assert "sas-logon-app" in output
+        assert not monitor.step(timeout=0.2)
+
+    def test_pod_failure_detected(self, monitor):
+        """A watch event redraws without waiting for a poll interval"""
+        monitor.server.emit('pods', 'MODIFIED', pod('sas-files-0', phase='Failed', ready=False),
+                            namespace='sas-viya')
+
+        assert wait_for_redraw(monitor)
+        assert "Failed: 1" in monitor.output.getvalue()
+
+    def test_resync_after_compaction(self, monitor):
+        """A 410 Gone on resume triggers a fresh list"""
+        monitor.server.compact()
+        monitor.server.emit('pods', 'ADDED', pod('sas-folders-0'), namespace='sas-viya')
+
+        assert wait_for_redraw(monitor)
+        assert 'sas-folders-0' in monitor.model.state['pods']
+
+
+class StubbornTransport:
+    """Every watch ends in an error status and every relist fails"""
+
+    def __init__(self, code=410):
+        self.code = code
+        self.watches = 0
+
+    def list(self, kind, namespace=None, selector=None, field_selector=None, fields=None):
+        return None
+
+    def watch(self, kind, namespace=None, resource_version=None, selector=None,
+              field_selector=None, timeout_seconds=300):
+        self.watches += 1
+        yield {'type': 'ERROR', 'object': {'kind': 'Status', 'code': self.code}}
+
+
+class QuietTransport:
+    """Every watch ends without an event"""
+
+    def __init__(self):
+        self.watches = 0
+
+    def watch(self, kind, namespace=None, resource_version=None, selector=None,
+              field_selector=None, timeout_seconds=300):
+        self.watches += 1
+        return iter(())
+
+
+class RecordingStop:
+    """Stop event that records waits instead of sleeping, set after a few"""
+
+    def __init__(self, waits):
+        self.waits = []
+        self.limit = waits
+
+    def is_set(self):
+        return len(self.waits) >= self.limit
+
+    def wait(self, seconds):
+        self.waits.append(seconds)
+
+
+class TestWatchBackoff:
+    """Test that failing watches back off instead of looping hot"""
+
+    @pytest.mark.parametrize('code', [410, 500])
+    def test_errors_back_off(self, code):
+        """A 410 whose relist fails, or any other error, waits longer each time"""
+        transport = StubbornTransport(code)
+        watcher = WatchMonitor(transport, 'sas-viya', output=io.StringIO())
+        watcher.resource_versions['pods'] = '100'
+        watcher._stop = RecordingStop(waits=6)
+
+        watcher._follow('pods', None)
+
+        assert watcher._stop.waits == [1, 2, 4, 8, 16, 30]
+        assert transport.watches == 6
+
+    def test_empty_watches_back_off(self):
+        """A watch that ends without events or bookmarks is not retried at once"""
+        transport = QuietTransport()
+        watcher = WatchMonitor(transport, 'sas-viya', output=io.StringIO())
+        watcher.resource_versions['pods'] = '100'
+        watcher._stop = RecordingStop(waits=4)
+
+        watcher._follow('pods', None)
+
+        assert watcher._stop.waits == [1, 2, 4, 8]
+        assert transport.watches == 4
+
+    def test_failed_kubectl_watch_backs_off(self, failing_kubectl):
+        """A kubectl watch that exits non-zero waits before the next one"""
+        watcher = WatchMonitor(KubectlTransport(), 'sas-viya', output=io.StringIO())
+        watcher.resource_versions['pods'] = '100'
+        watcher._stop = RecordingStop(waits=3)
+
+        watcher._follow('pods', None)
+
+        assert watcher._stop.waits == [1, 2, 4]